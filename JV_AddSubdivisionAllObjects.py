@@ -7,32 +7,370 @@ Version: 1.0.0
 Written for Maxon Cinema 4D R21.207
 Python version 2.7.18
 Description-US: Apply subdivision to all scene objects. Naming & Subdivision is the top hirearchy/Group.
+
+                DEDUPLICATE = True: top objects with exactly the same geometry (points, polygons, child objects, tags &
+                materials, compared in their own axis so position/rotation/scale don't matter) are subdivided once,
+                the copies are replaced by Render Instances of the subdivided master. Materials are compared by their
+                index in the document, linked objects by their GUID. Visibility, enabled state, layer and the other object
+                parameters must match too. Animated objects (any track on the object or its children) and Nulls without
+                Polygon objects are kept as they are.
+
+                SDS_BUDGET = True: Editor & Render subdivision levels per object from scene polygon budgets. Each level
+                multiplies the polygons by 4, levels go first to the objects with the largest polygons (bounding box size
+                against polygon count) until EDITOR_POLYGON_BUDGET/RENDER_POLYGON_BUDGET is used. The projected polygon
+                counts are printed before anything is changed, DRY_RUN = True stops there.
+
+                CHUNKED = True: progress in the status bar, ESC cancels between objects. The new Subdivision Surfaces are
+                kept in a checkpoint next to the document, the next run continues with the remaining objects and the
+                subdivision levels planned by the cancelled run (see jv_scheduler.py).
 """
 
 # Libraries
+import os
+import sys
+import math
+import array
+import heapq
+import hashlib
 import c4d
 from c4d import gui
 
+script_folder = os.path.dirname(os.path.abspath(__file__)) # Shared jv_ modules live next to this script
+if script_folder not in sys.path:
+    sys.path.append(script_folder)
+import jv_undo
+import jv_profile
+import jv_scene
+import jv_scheduler
+
+DEDUPLICATE = False # Replace exact copies of a top object with Render Instances of one subdivided master
+SDS_BUDGET = False # Subdivision levels from the polygon budgets below (off: Editor 1, Render default for every object)
+EDITOR_POLYGON_BUDGET = 2000000 # Scene polygons in the viewport after subdivision
+RENDER_POLYGON_BUDGET = 20000000 # Scene polygons at render time after subdivision
+SDS_MAX_LEVEL = 4 # Highest subdivision level assigned by SDS_BUDGET
+DRY_RUN = False # Only print the projected polygon counts, the document is not changed
+CHUNKED = True # Add subdivision in chunks: status bar progress, ESC cancels, the next run resumes (see jv_scheduler.py)
+UNDO_MODE = "modified" # Undo strategy: all, modified, snapshot or none (see jv_undo.py)
+PROFILE = False # Print stage timings & counters (see jv_profile.py)
+PROFILE_MEMORY = False # Also measure peak Python memory (slower, Python 3 only)
+PROFILE_REPORT = None # Optional: save the profile report to this .json/.csv file
+undo = None # jv_undo.UndoRecorder of the running script (set in main())
+profiler = jv_profile.NULL_PROFILER # jv_profile profiler of the running script (set in main())
+
+
+GEOMETRY_TYPES = (5100, 5140) # Polygon object & Null: the only objects compared by geometryKey() (Nulls only with Polygon objects under them)
+VARIABLE_TAGS = (5671, 5711, 5682, 431000045) # UVW, Normal, Vertex Map & Vertex Color tags: compared by their data
+SELECTION_TAGS = (5673, 5674, 5701) # Polygon, Point & Edge selection tags
+SKIPPED_TAGS = (5600, 5604) # Point & Polygon tags, part of the geometry
+SKIPPED_PARAMETERS = ("ID_BASELIST_NAME", "ID_BASEOBJECT_REL_POSITION", "ID_BASEOBJECT_REL_ROTATION", "ID_BASEOBJECT_REL_SCALE") # Name & position: the instance keeps them
+LAYER_TYPE = 100004801 # Layer: linked by the objects, compared by its place in the Layer Manager
+try:
+    PLAIN_TYPES = (bool, int, long, float, str, unicode) # Python 2
+except NameError:
+    PLAIN_TYPES = (bool, int, float, str)
+
+
+# Function - Bytes of an array (Python 2: tostring)
+def arrayBytes(values):
+    return values.tobytes() if hasattr(values, "tobytes") else values.tostring()
+
+
+# Function - Stable key of a linked node: index of a material in the document, GUID of an object, None if it can't be compared
+def linkKey(link, materials):
+    if link is None:
+        return "none"
+    if isinstance(link, c4d.BaseMaterial):
+        for index, material in enumerate(materials):
+            if material == link: # Every API call returns a new wrapper, compare the nodes (not id())
+                return "material %d" % index
+        return None # Material of another document
+    if isinstance(link, c4d.BaseObject):
+        return "object %d" % link.GetGUID()
+    if link.GetType() == LAYER_TYPE:
+        path = []
+        while link is not None: # Index among its siblings, up to the top layer
+            index = 0
+            pred = link.GetPred()
+            while pred is not None:
+                index += 1
+                pred = pred.GetPred()
+            path.append(str(index))
+            link = link.GetUp()
+        return "layer %s" % "/".join(reversed(path))
+    return None
+
+
+# Function - Add a parameter container to the hash (links by linkKey(), False if a value can't be compared)
+def hashContainer(digest, container, materials, skipped=()):
+    for parameter, value in sorted(container, key=lambda item: item[0]):
+        if parameter in skipped:
+            continue
+        if isinstance(value, PLAIN_TYPES):
+            digest.update(("%d=%r;" % (parameter, value)).encode("utf-8"))
+        elif isinstance(value, c4d.Vector):
+            digest.update(("%d=%r,%r,%r;" % (parameter, value.x, value.y, value.z)).encode("utf-8"))
+        elif isinstance(value, c4d.BaseList2D):
+            key = linkKey(value, materials)
+            if key is None:
+                return False
+            digest.update(("%d=@%s;" % (parameter, key)).encode("utf-8")) # Same material/link object
+        elif value is not None:
+            return False
+    return True
+
+
+# Function - Add the tags of obj to the hash, False if a tag can't be compared
+def hashTags(digest, obj, point_count, polygon_count, materials):
+    for tag in obj.GetTags():
+        tag_type = tag.GetType()
+        if tag_type in SKIPPED_TAGS:
+            continue
+        digest.update(("tag %d;" % tag_type).encode("utf-8"))
+        if tag_type == c4d.Ttexture:
+            material = linkKey(tag.GetMaterial(), materials)
+            if material is None:
+                return False
+            digest.update(("material @%s;" % material).encode("utf-8"))
+            if not hashContainer(digest, tag.GetDataInstance(), materials): # Projection, Selection, Offset & Tiles
+                return False
+        elif tag_type in VARIABLE_TAGS:
+            digest.update(bytes(tag.GetLowlevelDataAddressR())) # Raw UVW/Normal/Vertex Map data
+        elif tag_type in SELECTION_TAGS:
+            count = polygon_count if tag_type == 5673 else point_count
+            digest.update(arrayBytes(array.array("b", tag.GetBaseSelect().GetAll(count))))
+            digest.update(tag.GetName().encode("utf-8")) # Texture Tags restrict by selection name
+        elif not hashContainer(digest, tag.GetDataInstance(), materials): # Phong, Display...
+            return False
+    return True
+
+
+# Function - Hash of a top object's geometry in its own axis (points, polygons, children, tags & parameters), None if not comparable
+# Animated objects are never compared: the instance sits at the duplicate's current matrix and would lose its tracks
+def geometryKey(root, materials):
+    digest = hashlib.sha1()
+    polygon_objects = 0
+    doc = root.GetDocument()
+    skipped = [getattr(c4d, parameter) for parameter in SKIPPED_PARAMETERS]
+    try:
+        for obj in [root] + list(jv_scene.walkObjects(root.GetDown())):
+            obj_type = obj.GetType()
+            if obj_type not in GEOMETRY_TYPES: # Generators, splines, deformers... are not compared
+                return None
+            if obj.GetCTracks(): # Position, parameter or PLA animation
+                return None
+            digest.update(("object %d %d;" % (obj_type, len(obj.GetChildren()))).encode("utf-8"))
+            layer = linkKey(obj.GetLayerObject(doc), materials)
+            if layer is None:
+                return None
+            digest.update(("modes %d %d %d @%s;" % (obj.GetEditorMode(), obj.GetRenderMode(), obj.GetDeformMode(), layer)).encode("utf-8"))
+            if not hashContainer(digest, obj.GetDataInstance(), materials, skipped): # Display color, X-Ray, visibility...
+                return None
+            if obj is not root: # Child position relative to its parent (the root's own position doesn't matter)
+                ml = obj.GetMl()
+                digest.update(arrayBytes(array.array("d", [ml.off.x, ml.off.y, ml.off.z, ml.v1.x, ml.v1.y, ml.v1.z,
+                                                           ml.v2.x, ml.v2.y, ml.v2.z, ml.v3.x, ml.v3.y, ml.v3.z])))
+            point_count = polygon_count = 0
+            if obj_type == c4d.Opolygon:
+                points = obj.GetAllPoints()
+                polygons = obj.GetAllPolygons()
+                point_count, polygon_count = len(points), len(polygons)
+                polygon_objects += 1
+                digest.update(("points %d polygons %d;" % (point_count, polygon_count)).encode("utf-8"))
+                digest.update(arrayBytes(array.array("d", [value for point in points for value in (point.x, point.y, point.z)])))
+                digest.update(arrayBytes(array.array("l", [index for polygon in polygons for index in (polygon.a, polygon.b, polygon.c, polygon.d)])))
+            if not hashTags(digest, obj, point_count, polygon_count, materials):
+                return None
+    except (AttributeError, TypeError, ValueError):
+        return None # Data the hash can't read: keep the object as it is
+    if not polygon_objects:
+        return None # Empty Nulls: nothing to subdivide, every empty Null would match
+    return digest.hexdigest()
+
+
+# Function - Group top objects with the same geometryKey(), masters keep their scene order
+def findDuplicates(objs, materials):
+    groups = {}
+    masters = []
+    for obj in objs:
+        key = geometryKey(obj, materials)
+        if key is None:
+            masters.append((obj, []))
+            continue
+        if key not in groups:
+            groups[key] = (obj, [])
+            masters.append(groups[key])
+        else:
+            groups[key][1].append(obj)
+    return masters
+
+
+# Function - Polygons, quads after one subdivision and bounding box diagonal (world) of a top object and its children
+def polygonStats(root):
+    polygons = quads = 0
+    low = high = None
+    for obj in [root] + list(jv_scene.walkObjects(root.GetDown(), (c4d.Opolygon,))):
+        if obj.GetType() != c4d.Opolygon:
+            continue
+        all_polygons = obj.GetAllPolygons()
+        triangles = sum(1 for polygon in all_polygons if polygon.c == polygon.d)
+        polygons += len(all_polygons)
+        quads += 4 * len(all_polygons) - triangles # Quad -> 4 quads, triangle -> 3 quads
+        mg, mp, rad = obj.GetMg(), obj.GetMp(), obj.GetRad()
+        for x in (-rad.x, rad.x):
+            for y in (-rad.y, rad.y):
+                for z in (-rad.z, rad.z):
+                    corner = mg * (mp + c4d.Vector(x, y, z)) # Bounding box corner in world space
+                    low = corner if low is None else c4d.Vector(min(low.x, corner.x), min(low.y, corner.y), min(low.z, corner.z))
+                    high = corner if high is None else c4d.Vector(max(high.x, corner.x), max(high.y, corner.y), max(high.z, corner.z))
+    return polygons, quads, (high - low).GetLength() if low is not None else 0.0
+
+
+# Function - Polygons of an object after level subdivisions
+def subdividedPolygons(polygons, quads, level):
+    return polygons if level == 0 else quads * 4 ** (level - 1)
+
+
+# Function - Subdivision level per object within budget, largest polygons (size / sqrt(polygons)) are subdivided first
+def assignLevels(stats, budget, max_level, start_levels=None):
+    levels = list(start_levels) if start_levels is not None else [0] * len(stats)
+    total = sum(subdividedPolygons(polygons, quads, level) for (polygons, quads, size), level in zip(stats, levels))
+    heap = [(-size / math.sqrt(subdividedPolygons(polygons, quads, levels[index])), index)
+            for index, (polygons, quads, size) in enumerate(stats) if polygons]
+    heapq.heapify(heap)
+    while heap:
+        edge, index = heapq.heappop(heap)
+        polygons, quads, size = stats[index]
+        level = levels[index]
+        if level >= max_level:
+            continue
+        extra = subdividedPolygons(polygons, quads, level + 1) - subdividedPolygons(polygons, quads, level)
+        if total + extra > budget: # Too big for what is left, smaller objects may still fit
+            continue
+        levels[index] = level + 1
+        total += extra
+        heapq.heappush(heap, (-size / math.sqrt(subdividedPolygons(polygons, quads, level + 1)), index))
+    return levels, total
+
+
+# Function - Editor & Render levels of the masters within EDITOR_POLYGON_BUDGET/RENDER_POLYGON_BUDGET, printed before any change
+def budgetLevels(masters):
+    stats = [polygonStats(obj) for obj, duplicates in masters] # Render Instances share their master's subdivided polygons
+    editor_levels, editor_total = assignLevels(stats, EDITOR_POLYGON_BUDGET, SDS_MAX_LEVEL)
+    render_levels, render_total = assignLevels(stats, RENDER_POLYGON_BUDGET, SDS_MAX_LEVEL, editor_levels) # Render >= Editor
+
+    histogram = {}
+    for levels in zip(editor_levels, render_levels):
+        histogram[levels] = histogram.get(levels, 0) + 1
+    print("Subdivision budget: %d objects, %d polygons before subdivision" % (len(stats), sum(polygons for polygons, quads, size in stats)))
+    print("  Editor: %d polygons (budget %d)%s" % (editor_total, EDITOR_POLYGON_BUDGET, " - over budget" if editor_total > EDITOR_POLYGON_BUDGET else ""))
+    print("  Render: %d polygons (budget %d)%s" % (render_total, RENDER_POLYGON_BUDGET, " - over budget" if render_total > RENDER_POLYGON_BUDGET else ""))
+    print("  Levels (editor/render): " + ", ".join("%d/%d: %d" % (editor, render, count) for (editor, render), count in sorted(histogram.items())))
+    return zip(editor_levels, render_levels)
+
+
+# Function - Add a Subdivision Surface above obj (render_level None: keep the default)
+def addSubdivision(doc, obj, editor_level=1, render_level=None):
+    subd = c4d.BaseObject(1007455) # Create subdivision surface modifier
+    undo.AddUndo(c4d.UNDOTYPE_CHANGE, subd) # Change undo
+    subd[c4d.SDSOBJECT_SUBDIVIDE_UV] = 2002 # Set subdivision UVs to Boundary
+    subd[c4d.SDSOBJECT_SUBEDITOR_CM] = editor_level # Set Editor subdivision (1 unless SDS_BUDGET)
+    if render_level is not None:
+        subd[c4d.SDSOBJECT_SUBRAY_CM] = render_level # Set Render subdivision
+    doc.InsertObject(subd) # Insert subdivision surface modifier
+    subd.SetName(obj.GetName()) # Set name for subdivision 
+    undo.AddUndo(c4d.UNDOTYPE_NEW, subd) # New undo
+    undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Change undo
+    obj.InsertUnder(subd) # Parent the object to the subdivision surface modifier
+    return subd
+
+
+# Function - Replace duplicate with a Render Instance of the subdivided master
+def addInstance(doc, subd, master, duplicate):
+    instance = c4d.BaseObject(c4d.Oinstance) # Create instance object
+    instance[c4d.INSTANCEOBJECT_LINK] = subd # Instance the Subdivision Surface (subdivided once at render time)
+    instance[c4d.INSTANCEOBJECT_RENDERINSTANCE_MODE] = c4d.INSTANCEOBJECT_RENDERINSTANCE_MODE_SINGLEINSTANCE # Render Instance
+    instance.SetName(duplicate.GetName()) # Keep the duplicate name
+    doc.InsertObject(instance) # Insert instance object
+    instance.SetMg(duplicate.GetMg() * ~master.GetMl()) # Master sits in subd with its own matrix -> undo it for the duplicate
+    undo.AddUndo(c4d.UNDOTYPE_NEW, instance) # New undo
+    undo.AddDeleteUndo(duplicate) # Delete undo
+    duplicate.Remove() # Remove the duplicate geometry
+    return instance
+
+
+# Function - Subdivide the masters & instance their duplicates, one step per master
+def subdivisionSteps(doc, masters, levels, created):
+    for (obj, duplicates), (editor_level, render_level) in zip(masters, levels):
+        subd = addSubdivision(doc, obj, editor_level, render_level)
+        for duplicate in duplicates:
+            addInstance(doc, subd, obj, duplicate)
+        created["objects"] += 1 + len(duplicates) # Inserted at the top of the Object Manager
+        yield subd
+
 
 # Main function
 def main():
+    global undo, profiler
+    profiler = jv_profile.createProfiler("JV_AddSubdivisionAllObjects", PROFILE, PROFILE_MEMORY) # NULL_PROFILER unless PROFILE is set
     doc = c4d.documents.GetActiveDocument() # Get active C4D Document
+    undo = jv_undo.UndoRecorder(doc, UNDO_MODE, profiler) # AddUndo calls go through the selected undo strategy
     all_objs = doc.GetObjects() # Get all objects in the scene
-    
-    doc.StartUndo() # Start recording undos
-
-    for obj in all_objs:
-        subd = c4d.BaseObject(1007455) # Create subdivision surface modifier
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, subd) # Change undo
-        subd[c4d.SDSOBJECT_SUBDIVIDE_UV] = 2002 # Set subdivision UVs to Boundary
-        subd[c4d.SDSOBJECT_SUBEDITOR_CM] = 1 # Set Editor subdivision to 1
-        doc.InsertObject(subd) # Insert subdivision surface modifier
-        subd.SetName(obj.GetName()) # Set name for subdivision 
-        doc.AddUndo(c4d.UNDOTYPE_NEW, subd) # New undo
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Change undo
-        obj.InsertUnder(subd) # Parent the object to the subdivision surface modifier
-
-    doc.EndUndo() # Stop recording undos
+    checkpoint = jv_scheduler.Checkpoint(doc, "JV_AddSubdivisionAllObjects") if CHUNKED else None
+    resume = checkpoint.load() if checkpoint is not None else None
+    if resume and resume.get("objects") == len(all_objs):
+        all_objs = all_objs[resume["created"]:] # Objects of the cancelled run are first, skip them
+        print("Resuming a cancelled run, %d objects left (%s)" % (len(all_objs), checkpoint.path))
+    else:
+        resume = None
+
+    if DEDUPLICATE:
+        with profiler.stage("find duplicates"):
+            masters = findDuplicates(all_objs, doc.GetMaterials()) # (master, duplicates) in scene order
+    else:
+        masters = [(obj, []) for obj in all_objs]
+
+    if resume and len(resume["levels"]) == len(masters):
+        levels = [tuple(level) for level in resume["levels"]] # Levels planned for the whole scene by the cancelled run
+    elif SDS_BUDGET:
+        with profiler.stage("subdivision budget"):
+            levels = list(budgetLevels(masters)) # (editor, render) level per master
+    else:
+        levels = [(1, None)] * len(masters)
+    if DRY_RUN: # Nothing is changed in the document
+        profiler.finish(PROFILE_REPORT)
+        return
+
+    undo.StartUndo() # Start recording undos
+
+    with profiler.stage("add subdivision"):
+        scheduler = jv_scheduler.Scheduler("JV_AddSubdivisionAllObjects", profiler=profiler) if CHUNKED else None
+        created = {"objects": 0}
+        try:
+            jv_scheduler.runSteps(scheduler, "add subdivision", subdivisionSteps(doc, masters, levels, created), len(masters))
+        except jv_scheduler.Cancelled as cancelled:
+            done = resume["created"] if resume else 0
+            checkpoint.save({"created": done + created["objects"], "objects": len(doc.GetObjects()),
+                             "levels": levels[cancelled.completed:]}) # Every object is subdivided or untouched
+            print("Cancelled: %s - run the script again to resume" % cancelled)
+            scheduler.finish() # Clear the status bar
+            undo.EndUndo() # Stop recording undos
+            profiler.finish(PROFILE_REPORT)
+            c4d.EventAdd() # refresh c4d
+            return
+        if scheduler is not None:
+            scheduler.finish()
+            checkpoint.clear() # Finished, nothing to resume
+    instances = len(all_objs) - len(masters)
+    profiler.count("subdivision objects", len(masters))
+    profiler.count("parameter writes", (3 if SDS_BUDGET else 2) * len(masters) + 2 * instances)
+    if DEDUPLICATE:
+        profiler.count("render instances", instances)
+        print("Deduplicate: %d objects, %d subdivided, %d replaced by Render Instances" % (len(all_objs), len(masters), instances))
+
+    undo.EndUndo() # Stop recording undos
+    print(undo.report()) # Undo entries recorded by UNDO_MODE
+    profiler.count("undo entries", undo.recorded)
+    profiler.finish(PROFILE_REPORT) # Print the summary, save the report
     c4d.EventAdd() # refresh c4d
 
 # Execute main()
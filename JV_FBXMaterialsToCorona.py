@@ -12,195 +12,235 @@ Description-US: Convert FBX Standard Roughness Materials to Vray 5.0: supports:
                 - Metal
                 - Normal Bump
                 - Alpha/Opacity
-                - Glass: any materials using "Transparency" will be converted to Glass - Comment out line 63-73 if not required
+                - Glass: any materials using "Transparency" will be converted to Glass - Remove the "glass" block in CORONA_MAPPING if not required
                 
-                Change/Add your own material settings in Function: newCoronaMaterial(current_material, new_corona_mat)
+                Change/Add your own material settings in CORONA_MAPPING (keep jv_mapping.py next to this script)
+                DRY_RUN = True prints the conversion plan without changing the scene, PLAN_PATH/APPLY_PLAN save and apply it (see jv_plan.py)
+                PREVIEW_PROXIES = True adds downscaled textures in take "JV Viewport Proxies", a manual toggle: the Main take stays current,
+                activate the proxy take for viewport work and the Main take again before rendering (see jv_proxy.py)
+                VIEWPORT_BUDGET = 2048 (MB) picks the Texture Preview Sizes within a viewport texture memory budget (see jv_preview.py)
+                MATERIAL_LIBRARY = True copies materials converted by earlier runs from a local library (see jv_library.py)
+                CHUNKED = True shows the progress in the status bar, ESC cancels: run the script again to resume (see jv_scheduler.py)
+                RENDER_PROFILE picks the render settings profile, VALIDATE_RENDER_SETTINGS = True removes duplicate video posts (see jv_render.py)
+                FLIP_NORMAL_GREEN = True points the DirectX normal maps at copies with the green channel inverted (DirectX -> OpenGL, see jv_normals.py)
 """
 
 # Libraries
+import os
+import sys
 import c4d
 from c4d import gui
 
-
-# Class - Object iterator 
-class ObjectIterator :
-        def __init__(self, baseObject):
-            self.baseObject = baseObject
-            self.currentObject = baseObject
-            self.objectStack = []
-            self.depth = 0
-            self.nextDepth = 0
-
-        def __iter__(self):
-            return self
-
-        def next(self):
-            if self.currentObject == None :
-                raise StopIteration
-
-            obj = self.currentObject
-            self.depth = self.nextDepth
-
-            child = self.currentObject.GetDown()
-            if child :
-                self.nextDepth = self.depth + 1
-                self.objectStack.append(self.currentObject.GetNext())
-                self.currentObject = child
-            else :
-                self.currentObject = self.currentObject.GetNext()
-                while( self.currentObject == None and len(self.objectStack) > 0 ) :
-                    self.currentObject = self.objectStack.pop()
-                    self.nextDepth = self.nextDepth - 1
-            return obj
-
-
-# Function - Convert current_material Materials to Corona Materials
-def newCoronaMaterial(current_material, new_corona_mat):
-    # Set Corona Material Settings for both Metal/Dialectric materials
-    new_corona_mat[c4d.BRDFVRAYMTL_OPTION_USE_ROUGHNESS] = True # Set Reflection -> "Use Roughness"
-    new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_COLOR] = current_material[c4d.MATERIAL_COLOR_COLOR] # Copy Diffuse Color -> Corona Diffuse Color
-    new_corona_mat[c4d.CORONA_MATERIAL_PREVIEWSIZE] = 10 # Material -> Editor -> Texture Preview Size -> 1024x1024
-
-    # Copy texture + paths from current_material to Corona Materials
-    try:
-        # Glass - OVERRIDE materials using Transparency in material with Corona Glass Shader Settings
-        if current_material[c4d.MATERIAL_USE_TRANSPARENCY] == True: # If using Transparency in material
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_REFRACT] = True # Enable Refraction
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_IOR_VALUE] = 1.517 # Set Fresnel -> 1.517 (Glass)
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_VALUE] = 0 # No Roughness for Glass
-    except:
-        pass # Skip if material not Glass
-
-    try:
-        # Diffuse
-        diffuse_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-
-        new_diffuse_path = current_material[c4d.MATERIAL_COLOR_SHADER][c4d.BITMAPSHADER_FILENAME] # Location of current_material Diffuse texture
-        new_corona_mat.InsertShader(diffuse_shader) # Insert diffuse shader into Corona material
-        new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_COLOR_TEXTURE] = diffuse_shader # Set path of bitmap current_material -> bitmap path
-        diffuse_shader[c4d.BITMAPSHADER_FILENAME] = new_diffuse_path # Assign texture path for bitmap to current_material -> bitmap path
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Roughness
-        roughness_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-        roughness_layer_id = current_material.GetReflectionLayerIndex(0) # Reflectance layer texture index location ('Specular')
-
-        new_rough_path = current_material[roughness_layer_id.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS][c4d.BITMAPSHADER_FILENAME] # current_material Reflectance Layers -> Specular -> Width / Texture remap to Corona Material -> Base Layer -> Roughness
-        new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_TEXTURE] = roughness_shader # Assign Specular texture to Base Layer -> Roughness
-        roughness_shader[c4d.BITMAPSHADER_FILENAME] = new_rough_path # Assign texture path for bitmap to current_material -> bitmap path
-        new_corona_mat.InsertShader(roughness_shader) # Insert bitmap shader into Corona material
-        new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Color Profile for bitmap -> linear
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Normal Bump
-        if current_material[c4d.MATERIAL_BUMP_SHADER] != None: # If there is no texture in Bump skip this block
-            normal_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-            normal_corona_bump = c4d.BaseShader(1035405) # Create Corona Normal Texture
-            new_corona_mat.InsertShader(normal_corona_bump) # Insert Corona Normal Texture into Corona Material
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_TEXTURE] = normal_corona_bump # Assign Corona Normal Texture to Bump
-
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_ENABLE] = True # Enable Bump Map
-            new_bump_path = current_material[c4d.MATERIAL_BUMP_SHADER][c4d.BITMAPSHADER_FILENAME] # current_material Normal Bump texture -> Corona Material -> Base Layer -> Bump -> Normal -> texture
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_TEXTURE][c4d.CORONA_NORMALMAP_TEXTURE] = normal_shader # Create Corona material -> Bump Map -> Normal bitmap shader
-            new_corona_mat[c4d.MATERIAL_BUMP_SHADER] = normal_shader # Create empty bitmap shader
-            normal_shader[c4d.BITMAPSHADER_FILENAME] = new_bump_path # Assign texture path for bitmap to current_material -> bitmap path
-            new_corona_mat.InsertShader(normal_shader) # Insert bitmap shader into Corona material
-
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Opacity
-        if current_material[c4d.MATERIAL_ALPHA_SHADER] != None: # If there is no texture in Alpha skip this block
-            opacity_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_ALPHA] = True # Enable Opacity
-            new_opacity_path = current_material[c4d.MATERIAL_ALPHA_SHADER][c4d.BITMAPSHADER_FILENAME] # Location of current_material Opacity texture
-            new_corona_mat.InsertShader(opacity_shader) # Insert Opacity shader into Corona material
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_ALPHA_TEXTURE] = opacity_shader # Set path of bitmap -> current_material -> bitmap path
-            opacity_shader[c4d.BITMAPSHADER_FILENAME] = new_opacity_path # Assign texture path for bitmap to current_material -> bitmap path
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_ALPHA_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Opacity texture -> Color Profile -> Linear
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Metalness
-        count_layer = current_material.GetReflectionLayerCount() # Check in material if there is more than 1 Reflectance layer (default 'Specular') & Metal Materials have ('Reflection' and 'Specular')
-        if count_layer > 1:
-            metal_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-            metal_layer_id = current_material.GetReflectionLayerIndex(1)  # current_material Metal texture index location for current_material Material ('Reflection')
-
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_VALUE] = 0 # Set Corona material -> General -> Mode -> Metal
-            new_metal_path = current_material[metal_layer_id.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE][c4d.BITMAPSHADER_FILENAME] # current_material Metal texture -> Corona Material -> General -> Mode -> Metal
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_TEXTURE] = metal_shader # Set path of bitmap current_material -> bitmap path
-            metal_shader[c4d.BITMAPSHADER_FILENAME] = new_metal_path # Assign texture path for bitmap to current_material -> bitmap path
-            new_corona_mat.InsertShader(metal_shader) # Insert bitmap shader into Corona material
-            new_corona_mat[c4d.CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Metal texture -> Color Profile -> Linear
-    except:
-        pass # Skip if some textures are not input
-
-    return new_corona_mat
-
-
-# Function - Convert materials from current_material to Corona
-def convertMaterials(materials, collected_objs):
-    for current_material in materials:
-        new_corona_mat = c4d.BaseMaterial(1056306) # Create new Corona material
-        doc.InsertMaterial(new_corona_mat) # Insert Corona material into document
-        doc.AddUndo(c4d.UNDOTYPE_NEW, new_corona_mat) # New undo
-        new_corona_mat.SetName(current_material.GetName()) # Assign Coronamaterial name as current_material name
-        replace_material = newCoronaMaterial(current_material, new_corona_mat) # Run Function to replace current material with Corona material
-
-       # Go through Objects -> Tags -> Texture Tags -> Replace Material
-        for obj in collected_objs: # Loop through object selection
-                tags = obj.GetTags() # Get objects tags
-
-                for tag in tags: # Loop through tags
-                    if type(tag).__name__ == "TextureTag": # If Texture tag founded
-                        mat = tag.GetMaterial() # Get material from tag
-                        doc.AddUndo(c4d.UNDOTYPE_CHANGE, tag) # Change undo
-                        if mat.GetName() == replace_material.GetName(): # If the material name matches
-                            tag.SetMaterial(replace_material) # Replace current_material with Corona material
-
-    c4d.CallCommand(12168, 12168) # Remove unused materials
+script_folder = os.path.dirname(os.path.abspath(__file__)) # Shared jv_ modules live next to this script
+if script_folder not in sys.path:
+    sys.path.append(script_folder)
+import jv_mapping
+import jv_undo
+import jv_textures
+import jv_scene
+import jv_profile
+import jv_plan
+import jv_proxy
+import jv_preview
+import jv_library
+import jv_scheduler
+import jv_render
+import jv_normals
+
+MANIFEST_PATH = None # Optional: path to a manifest written by jv_fbxmanifest.py -> convert its materials without importing the FBX
+PLAN_PATH = None # Optional: save the conversion plan to this .json file (see jv_plan.py)
+DRY_RUN = False # Only plan the conversion (console summary, PLAN_PATH), the document is not changed
+APPLY_PLAN = None # Optional: apply a plan saved by PLAN_PATH instead of planning again
+UNDO_MODE = "modified" # Undo strategy: all, modified, snapshot or none (see jv_undo.py)
+MERGE_MATERIALS = True # Convert FBX materials with the same colour, textures & flags once (see jv_mapping.mergeGroups)
+TEXTURE_PREFLIGHT = False # Report missing/large texture files before converting (see jv_textures.py)
+TEXTURE_DETECTION = True # Color Profile & normal map/bump from the texture contents instead of the mapping table (see jv_textures.py)
+VIEWPORT_BUDGET = None # Optional: viewport texture memory in MB, Texture Preview Sizes are allocated by material users (see jv_preview.py)
+MATERIAL_LIBRARY = False # Copy materials converted by earlier runs (any scene) from a local library instead of building them (see jv_library.py)
+MATERIAL_LIBRARY_SIZE = 5000 # Materials kept in the library, the least recently used are removed
+CHUNKED = True # Create materials & remap tags in chunks: status bar progress, ESC cancels (see jv_scheduler.py)
+RENDER_PROFILE = "corona" # Render settings profile of the active Render Settings, the video post is reused (see jv_render.py)
+VALIDATE_RENDER_SETTINGS = False # Also remove duplicate video posts from every Render Settings entry (see jv_render.py)
+PREVIEW_PROXIES = False # Downscaled copies of the textures in a take you activate for viewport work (manual toggle, the Main take stays current, see jv_proxy.py)
+PREVIEW_PROXY_SIZE = 1024 # Longest side of the proxies (px), matches the 1024x1024 material previews
+FLIP_NORMAL_GREEN = False # DirectX normal maps (names with _dx/DirectX, 3ds Max manifests, DIRECTX_NORMAL_MAPS): the new materials use cached copies with the green channel inverted (see jv_normals.py)
+DIRECTX_NORMAL_MAPS = () # Optional: more DirectX normal maps for FLIP_NORMAL_GREEN, file names, paths or material names (other maps are OpenGL and kept)
+PROFILE = False # Print stage timings & counters (see jv_profile.py)
+PROFILE_MEMORY = False # Also measure peak Python memory (slower, Python 3 only)
+PROFILE_REPORT = None # Optional: save the profile report to this .json/.csv file
+OBJECT_TYPES = (5100, 5159) # Texture Tags of Polygon object or Base object (non editable) are remapped
+undo = None # jv_undo.UndoRecorder of the running script (set in main())
+profiler = jv_profile.NULL_PROFILER # jv_profile profiler of the running script (set in main())
+
+# Corona material settings: FBX Standard material slots -> Corona Physical Material (see jv_mapping.py for the table layout)
+CORONA_MAPPING = {
+    "material": 1056306, # Corona Physical material
+    "values": [
+        (c4d.BRDFVRAYMTL_OPTION_USE_ROUGHNESS, True), # Set Reflection -> "Use Roughness"
+        (c4d.CORONA_MATERIAL_PREVIEWSIZE, 10), # Material -> Editor -> Texture Preview Size -> 1024x1024
+    ],
+    "color": [c4d.CORONA_PHYSICAL_MATERIAL_BASE_COLOR], # Copy Diffuse Color -> Corona Diffuse Color
+    "glass": [ # Glass - remove this block if not required
+        (c4d.CORONA_PHYSICAL_MATERIAL_REFRACT, True), # Enable Refraction
+        (c4d.CORONA_PHYSICAL_MATERIAL_BASE_IOR_VALUE, 1.517), # Set Fresnel -> 1.517 (Glass)
+        (c4d.CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_VALUE, 0), # No Roughness for Glass
+    ],
+    "metallic": [(c4d.CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_VALUE, 0)], # Metal materials (more than 1 Reflectance layer) -> General -> Mode -> Metal
+    "slots": [
+        ("diffuse", {"parameter": c4d.CORONA_PHYSICAL_MATERIAL_BASE_COLOR_TEXTURE}), # Diffuse texture -> Base Layer -> Color
+        ("roughness", {"parameter": c4d.CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_TEXTURE, "profile": 1}), # Reflectance -> Specular texture -> Base Layer -> Roughness (linear)
+        ("bump", {"parameter": c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_TEXTURE, # Normal Bump texture -> Base Layer -> Bump -> Normal -> texture
+                  "wrapper": 1035405, "wrapper_parameter": c4d.CORONA_NORMALMAP_TEXTURE, # Corona Normal Texture
+                  "values": [(c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_ENABLE, True)], # Enable Bump Map
+                  "height": {"parameter": c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_TEXTURE, "profile": 1, # Height map (found by jv_textures) -> Base Layer -> Bump -> texture (linear)
+                             "values": [(c4d.CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_ENABLE, True)]}}), # Enable Bump Map
+        ("alpha", {"parameter": c4d.CORONA_PHYSICAL_MATERIAL_ALPHA_TEXTURE, "profile": 1, # Opacity texture -> Opacity (linear)
+                   "values": [(c4d.CORONA_PHYSICAL_MATERIAL_ALPHA, True)]}), # Enable Opacity
+        ("metal", {"parameter": c4d.CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_TEXTURE, "profile": 1}), # Reflectance -> Reflection texture -> General -> Mode -> Metal (linear)
+    ],
+}
+
+
+# Function - Plan the conversion of materials to Corona (the document is not changed)
+def convertMaterials(materials, material_tags, material_users):
+    plan = jv_mapping.compilePlan(CORONA_MAPPING) # Resolve CORONA_MAPPING once for all materials
+    textures = {}
+    if TEXTURE_PREFLIGHT or TEXTURE_DETECTION:
+        with profiler.stage("texture preflight"):
+            textures = jv_textures.preflight(doc, materials, report=TEXTURE_PREFLIGHT) # Check the texture files of the source materials
+    merged = {}
+    if MERGE_MATERIALS:
+        with profiler.stage("merge materials"):
+            merged = jv_mapping.mergeGroups(materials) # Duplicate material -> representative
+        if merged:
+            for line in jv_mapping.mergeReport(merged):
+                print(line)
+    with profiler.stage("plan"):
+        conversion = jv_plan.planScene(doc, plan, materials, material_tags, material_users, textures=textures if TEXTURE_DETECTION else None,
+                                       object_types=OBJECT_TYPES, merged=merged, profiler=profiler) # New materials, reused materials & Texture Tags to remap
+    if VIEWPORT_BUDGET:
+        with profiler.stage("viewport budget"):
+            budgetPreviews(conversion, textures)
+    return conversion
+
+
+# Function - Texture Preview Size of every new material within VIEWPORT_BUDGET, most used materials first (see jv_preview.py)
+def budgetPreviews(conversion, textures):
+    budget = VIEWPORT_BUDGET * jv_preview.MB
+    entries = jv_preview.conversionEntries(conversion, textures) # Users & texture resolutions of the new materials
+    values, total = jv_preview.allocatePreviews(entries, budget)
+    jv_preview.setPreviewValues(conversion, c4d.CORONA_MATERIAL_PREVIEWSIZE, values) # Replaces the 1024x1024 of CORONA_MAPPING
+    for line in jv_preview.budgetReport(entries, values, budget):
+        print(line)
+
+
+# Function - Plan the conversion of materials listed in a jv_fbxmanifest manifest to Corona (no FBX import required)
+def convertManifest(manifest_path):
+    import jv_fbxmanifest
+
+    manifest = jv_fbxmanifest.loadManifest(manifest_path) # Material slots & texture paths read from the FBX
+    textures = {}
+    if TEXTURE_PREFLIGHT or TEXTURE_DETECTION:
+        with profiler.stage("texture preflight"):
+            textures = jv_textures.preflight(doc, entries=manifest["materials"], report=TEXTURE_PREFLIGHT) # Check the texture files of the manifest
+    plan = jv_mapping.compilePlan(CORONA_MAPPING) # Resolve CORONA_MAPPING once for all materials
+    with profiler.stage("plan"):
+        conversion = jv_plan.planManifest(doc, plan, manifest["materials"], textures if TEXTURE_DETECTION else None, manifest.get("application")) # New materials only
+    if VIEWPORT_BUDGET:
+        with profiler.stage("viewport budget"):
+            budgetPreviews(conversion, textures)
+    return conversion
+
+
+# Function - Load a conversion plan saved by PLAN_PATH, checked against CORONA_MAPPING & the scene materials
+def loadConversion(plan_path, materials):
+    conversion = jv_plan.loadPlan(plan_path)
+    jv_plan.checkConversion(conversion, jv_mapping.compilePlan(CORONA_MAPPING), materials) # ValueError if the scene changed
+    return conversion
 
 
 # Function - Convert render engine to Physical
 def setupCoronaEngine():
-    render_data = doc.GetActiveRenderData() # Assign doc.GetActiveRenderData() to variable render_data (for undo)
-    doc.AddUndo(c4d.UNDOTYPE_CHANGE, render_data) # Change undo
-    corona_engine_id = 1030480 # Corona render engine ID
-    render_data[c4d.RDATA_RENDERENGINE] = corona_engine_id # Assign Corona render engine
-    video_post = c4d.documents.BaseVideoPost(corona_engine_id) # Initializes a new base video post (pvp)
-    render_data.InsertVideoPost(video_post) # Insert video post into render engine (Corona settings)
+    print(jv_render.profileSummary(jv_render.applyProfile(doc, RENDER_PROFILE, undo))) # Reuse the Corona video post of an earlier run, remove duplicates
 
 
 # Main function
 def main():
+    global undo, profiler
+    profiler = jv_profile.createProfiler("JV_FBXMaterialsToCorona", PROFILE, PROFILE_MEMORY) # NULL_PROFILER unless PROFILE is set
     doc = c4d.documents.GetActiveDocument() # Get active C4D Document
+    undo = jv_undo.UndoRecorder(doc, UNDO_MODE, profiler) # AddUndo calls go through the selected undo strategy
     materials = doc.GetMaterials() # Get all scene materials
-    obj = doc.GetFirstObject() # Get first object in the document
-    scene = ObjectIterator(obj) # Iterate through all objects
-    
-    doc.StartUndo() # Start recording undos
-
-    # Convert render engine to Corona
-    setupCoronaEngine()
 
-    # Collect scene Polygon/Base objects
-    collected_objs = [] # Empty list to collect all scene objects
-    for obj in scene:
-        if (obj.GetType() == 5100) or (obj.GetType() == 5159): # If obj is Polygon object or Base object (non editable)
-            collected_objs.append(obj) # Append objects to collected_objs
+    # Plan the conversion: materials to create, Texture Tags to remap, materials to delete
+    material_tags = material_users = None # Texture Tags are collected again when a saved plan is applied
+    if APPLY_PLAN:
+        conversion = loadConversion(APPLY_PLAN, materials) # Plan of an earlier dry run
+    elif MANIFEST_PATH:
+        conversion = convertManifest(MANIFEST_PATH) # Materials from a jv_fbxmanifest manifest
+    else:
+        with profiler.stage("scene index"):
+            index = jv_scene.sceneIndex(doc) # Shared with the other scripts while the scene is unchanged
+            material_tags = index.materialTags(OBJECT_TYPES) # Texture Tags of scene Polygon/Base objects by material (remapped)
+            material_users = index.materialTags() # Texture Tags of every object by material (a material still used elsewhere is kept)
+        conversion = convertMaterials(materials, material_tags, material_users)
+    print(jv_plan.summary(conversion))
+    if PLAN_PATH:
+        jv_plan.savePlan(conversion, PLAN_PATH) # Review the plan or apply it later with APPLY_PLAN
+    if DRY_RUN: # Nothing is changed in the document
+        profiler.finish(PROFILE_REPORT)
+        return
+
+    undo.StartUndo() # Start recording undos
 
-    # Convert scene materials to Corona
-    convertMaterials(materials, collected_objs)
-
-    doc.EndUndo() # Stop recording undos
+    # Convert render engine to Corona
+    with profiler.stage("render settings"):
+        setupCoronaEngine()
+        if VALIDATE_RENDER_SETTINGS:
+            for line in jv_render.validateScene(doc, undo): # Duplicate video posts of all Render Settings
+                print(line)
+
+    # Green flipped copies of the normal maps, written into the material plans before the materials are built
+    if FLIP_NORMAL_GREEN:
+        with profiler.stage("normal maps"):
+            print(jv_normals.summary(jv_normals.flipPlanNormals(doc, conversion, DIRECTX_NORMAL_MAPS, profiler=profiler)))
+
+    # Create the Corona materials, remap the Texture Tags & remove unused materials in one pass
+    with profiler.stage("apply"):
+        library = jv_library.MaterialLibrary("corona", max_materials=MATERIAL_LIBRARY_SIZE) if MATERIAL_LIBRARY else None
+        scheduler = jv_scheduler.Scheduler("JV_FBXMaterialsToCorona", profiler=profiler) if CHUNKED else None
+        try:
+            result = jv_plan.applyConversion(doc, conversion, undo, profiler, material_tags, library=library, scheduler=scheduler,
+                                             material_users=material_users)
+        except jv_scheduler.Cancelled as cancelled:
+            result = None # Finished materials & tags stay, the next run reuses them
+            print("Cancelled: %s - run the script again to resume" % cancelled)
+        if scheduler is not None:
+            scheduler.finish() # Clear the status bar
+    if library is not None:
+        with profiler.stage("material library"):
+            library.save() # Add the new materials, remove the least recently used
+        print(library.report())
+        profiler.count("library hits", library.hits)
+    if result is None: # Cancelled
+        undo.EndUndo() # Stop recording undos
+        profiler.finish(PROFILE_REPORT)
+        c4d.EventAdd() # refresh c4d
+        return
+    profiler.count("materials reused", result["reused"])
+    if result["kept"]:
+        print("Kept %d source materials still used by Texture Tags of other object types" % result["kept"])
+
+    # Viewport proxies of the textures in a take the user activates, the Main take keeps the original files for rendering
+    if PREVIEW_PROXIES:
+        with profiler.stage("preview proxies"):
+            converted = [mat for mat in doc.GetMaterials() if mat.GetType() == CORONA_MAPPING["material"]] # New & reused materials
+            print(jv_proxy.summary(jv_proxy.applyProxies(doc, converted, undo, PREVIEW_PROXY_SIZE, profiler=profiler)))
+
+    undo.EndUndo() # Stop recording undos
+    print(undo.report()) # Undo entries recorded by UNDO_MODE
+    profiler.count("undo entries", undo.recorded)
+    profiler.finish(PROFILE_REPORT) # Print the summary, save the report
     c4d.EventAdd() # refresh c4d
 
 
@@ -11,150 +11,184 @@ Description-US: Convert FBX Standard Roughness Materials to Physical, supports:
                 - Roughness - materials without a roughness texture will be set to roughness 100%
                 - Metal
                 - Normal Bump
-                - Transmissive (Glass) note: any materials using "Transparency" will be converted to Glass. Comment out line 158-174 if not required
-                - Other textures will be kept in the conversion but not color profile corrected (linear/srgb)
+                - Transmissive (Glass) note: any materials using "Transparency" will be converted to Glass. Comment out the Glass (Transparency) block in convertMaterials() if not required
+                - Color Profiles (linear/sRGB) and normal map or height map for Bump are read from the texture contents (TEXTURE_DETECTION, see jv_textures.py)
+                - Other textures will be kept in the conversion but not color profile corrected (linear/srgb) if TEXTURE_DETECTION is off
                 
                 Change/Add your own material settings in Function: convertMaterials(mat):
+                DRY_RUN = True prints the conversion plan without changing the scene, PLAN_PATH/APPLY_PLAN save and apply it (see jv_plan.py)
+                PREVIEW_PROXIES = True adds downscaled textures in take "JV Viewport Proxies", a manual toggle: the Main take stays current,
+                activate the proxy take for viewport work and the Main take again before rendering (see jv_proxy.py)
+                VIEWPORT_BUDGET = 2048 (MB) picks the Texture Preview Sizes within a viewport texture memory budget (see jv_preview.py)
+                CHUNKED = True shows the progress in the status bar, ESC cancels: the next run converts the remaining materials (see jv_scheduler.py)
+                RENDER_PROFILE picks the render settings profile, VALIDATE_RENDER_SETTINGS = True removes duplicate video posts (see jv_render.py)
+                FLIP_NORMAL_GREEN = True points the DirectX normal maps at copies with the green channel inverted (DirectX -> OpenGL, see jv_normals.py)
 """
 
 # Libraries
+import os
+import sys
 import c4d
 
+script_folder = os.path.dirname(os.path.abspath(__file__)) # Shared jv_ modules live next to this script
+if script_folder not in sys.path:
+    sys.path.append(script_folder)
+import jv_undo
+import jv_mapping
+import jv_textures
+import jv_profile
+import jv_plan
+import jv_proxy
+import jv_preview
+import jv_scene
+import jv_scheduler
+import jv_render
+import jv_normals
+
+MANIFEST_PATH = None # Optional: path to a manifest written by jv_fbxmanifest.py -> convert its materials without importing the FBX
+PLAN_PATH = None # Optional: save the conversion plan to this .json file (see jv_plan.py)
+DRY_RUN = False # Only plan the conversion (console summary, PLAN_PATH), the document is not changed
+APPLY_PLAN = None # Optional: apply a plan saved by PLAN_PATH instead of planning again
+UNDO_MODE = "modified" # Undo strategy: all, modified, snapshot or none (see jv_undo.py)
+MERGE_MATERIALS = True # Convert FBX materials with the same colour, textures & flags once (see jv_mapping.mergeGroups)
+TEXTURE_PREFLIGHT = False # Report missing/large texture files before converting (see jv_textures.py)
+TEXTURE_DETECTION = True # Color Profile & normal map/bump from the texture contents (see jv_textures.py)
+VIEWPORT_BUDGET = None # Optional: viewport texture memory in MB, Texture Preview Sizes are allocated by material users (see jv_preview.py)
+PREVIEW_PROXIES = False # Downscaled copies of the textures in a take you activate for viewport work (manual toggle, the Main take stays current, see jv_proxy.py)
+PREVIEW_PROXY_SIZE = 1024 # Longest side of the proxies (px), matches the 1024x1024 material previews
+FLIP_NORMAL_GREEN = False # DirectX normal maps (names with _dx/DirectX, 3ds Max manifests, DIRECTX_NORMAL_MAPS): the Normal textures use cached copies with the green channel inverted (see jv_normals.py)
+DIRECTX_NORMAL_MAPS = () # Optional: more DirectX normal maps for FLIP_NORMAL_GREEN, file names, paths or material names (other maps are OpenGL and kept)
+CHUNKED = True # Convert materials in chunks: status bar progress, ESC cancels, the next run resumes (see jv_scheduler.py)
+RENDER_PROFILE = "physical" # Render settings profile of the active Render Settings, the video post is reused (see jv_render.py)
+VALIDATE_RENDER_SETTINGS = False # Also remove duplicate video posts from every Render Settings entry (see jv_render.py)
+PROFILE = False # Print stage timings & counters (see jv_profile.py)
+PROFILE_MEMORY = False # Also measure peak Python memory (slower, Python 3 only)
+PROFILE_REPORT = None # Optional: save the profile report to this .json/.csv file
+undo = None # jv_undo.UndoRecorder of the running script (set in main())
+profiler = jv_profile.NULL_PROFILER # jv_profile profiler of the running script (set in main())
+
+
+# Function - Color Profile of a slot found by jv_textures, default if not detected
+def slotProfile(detected, slot, default):
+    profile = detected[slot][0] if slot in detected else None
+    return default if profile is None else profile
+
+
+# Function - Textures of the FBX Reflectance layers: 'Specular' (Roughness) & 'Reflection' (Metal, only on Metal materials)
+def readReflectanceLayers(mat):
+    count = mat.GetReflectionLayerCount() # More than 1 Reflectance layer (default 'Specular') -> 'Conductor/Metal'
+    layers = {"count": count, "metal": count > 1, "metal_shader": None, "roughness_shader": None}
+    specular_layer = mat.GetReflectionLayerIndex(0) if count > 0 else None # Old 'Specular' layer (None if the material has no Reflectance layers)
+    if specular_layer is not None:
+        layers["roughness_shader"] = mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] # Roughness texture
+    if count > 1:
+        reflection_id = mat.GetReflectionLayerIndex(1).GetDataID() # Old 'Reflection' layer
+        layers["metal_shader"] = mat[reflection_id + c4d.REFLECTION_LAYER_COLOR_TEXTURE] # Metal texture
+    return layers
+
+
+# Function - Final Reflectance stack (bottom to top) as (name, values, shaders) with shaders as (parameter, shader, Color Profile)
+def reflectanceStack(mat, old_layers, roughness_profile, metal_profile):
+    diffuse_shader = mat[c4d.MATERIAL_COLOR_SHADER] # Diffuse texture (moved from the Color node)
+    diffuse_color = mat[c4d.MATERIAL_COLOR_COLOR]
+    roughness_shader = old_layers["roughness_shader"]
+
+    # 'Diffuse' layer (Albedo)
+    diffuse_values = [(c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION, 7), # Set Type -> 'Lambertian'
+                      (c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR, 1)] # Specular strength -> 100%
+    if old_layers["metal"]:
+        diffuse_values.append((c4d.REFLECTION_LAYER_COLOR_COLOR, diffuse_color)) # Diffuse Color -> Reflectance -> Diffuse -> Layer Color
+    layers = [("Diffuse", diffuse_values, [(c4d.REFLECTION_LAYER_COLOR_TEXTURE, diffuse_shader, None)])] # Diffuse texture -> Diffuse layer
+
+    # 'Reflection' layer (Roughness)
+    layers.append(("Reflection", [
+        (c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION, 3), # Set type -> 'GGX'
+        (c4d.REFLECTION_LAYER_MAIN_ADDITIVE, 0), # Set attenuation -> 'Average'
+        (c4d.REFLECTION_LAYER_MAIN_VALUE_REFLECTION, 1.0), # Set reflection strength -> 100%
+        (c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS, 1.0), # Set roughness level -> 100%
+        (c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR, 1.0), # Set specular level -> 100%
+        (c4d.REFLECTION_LAYER_FRESNEL_MODE, 1), # Set fresnel -> dielectric
+        (c4d.REFLECTION_LAYER_FRESNEL_VALUE_IOR, 1.5), # Set fresnel value -> 1.5
+    ], [(c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS, roughness_shader, roughness_profile)])) # Specular texture -> Roughness
+
+    # 'Metal' layer (Metal materials only)
+    if old_layers["metal"]:
+        layers.append(("Metal", [
+            (c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION, 3), # Set Type -> GGX
+            (c4d.REFLECTION_LAYER_MAIN_ADDITIVE, 4), # Set attenuation -> 'Metal'
+            (c4d.REFLECTION_LAYER_MAIN_VALUE_REFLECTION, 1.0), # Set reflection strength -> 100%
+            (c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS, 1.0), # Set roughness level -> 100%
+            (c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR, 1.0), # Set specular level -> 100%
+            (c4d.REFLECTION_LAYER_FRESNEL_MODE, 2), # Set fresnel -> 'Conductor'
+            (c4d.REFLECTION_LAYER_FRESNEL_VALUE_ETA, 0), # Set fresnel -> 0
+            (c4d.REFLECTION_LAYER_COLOR_COLOR, diffuse_color), # Diffuse Color -> Reflectance -> Metal -> Layer Color
+        ], [(c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS, roughness_shader, roughness_profile), # Roughness texture -> Roughness
+            (c4d.REFLECTION_LAYER_COLOR_TEXTURE, diffuse_shader, None), # Diffuse texture -> Layer Color
+            (c4d.REFLECTION_LAYER_TRANS_TEXTURE, old_layers["metal_shader"], metal_profile)])) # Metal texture -> Layer Mask
+    return layers
+
+
+# Function - Create the Reflectance layers (bottom to top) with all their settings, then remove the old_count FBX layers below them
+def buildReflectanceLayers(mat, layers, old_count):
+    for name, values, shaders in layers:
+        layer = mat.AddReflectionLayer() # New layers are added on top
+        layer.SetName(name)
+        layer_id = layer.GetDataID() # Layer parameter IDs of the new layer (no index lookups)
+        for parameter, value in values:
+            mat[layer_id + parameter] = value
+        for parameter, shader, profile in shaders:
+            if shader is None: # Skip if texture is not input
+                continue
+            mat[layer_id + parameter] = shader
+            if profile is not None:
+                shader[c4d.BITMAPSHADER_COLORPROFILE] = profile # Set texture Color Profile (linear unless detected)
+    for index in range(len(layers) + old_count - 1, len(layers) - 1, -1): # Old layers sit below the new ones
+        mat.RemoveReflectionLayerIndex(index)
+
 
 # Function - Convert FBX materials to Physical/PBR
-def convertMaterials(mat):
+def convertMaterials(mat, detected=None, preview=10):
+    detected = detected or {} # Slot -> (Color Profile, height map) from jv_mapping.detectSlots()
+    roughness_profile = slotProfile(detected, "roughness", 1) # Linear unless the texture contents say otherwise
+    metal_profile = slotProfile(detected, "metal", 1)
+
     # General settings for material
-    doc.AddUndo(c4d.UNDOTYPE_CHANGE, mat) # Start undo
-    mat[c4d.MATERIAL_PREVIEWSIZE] = 10 # Material -> Editor -> Texture Preview Size -> 1024x1024
+    undo.AddUndo(c4d.UNDOTYPE_CHANGE, mat) # Start undo
+    mat[c4d.MATERIAL_PREVIEWSIZE] = preview # Material -> Editor -> Texture Preview Size -> 1024x1024 (or VIEWPORT_BUDGET)
+
+    # Color Profiles of the Diffuse and Alpha textures (only if found by jv_textures)
+    for shader_id, slot in ((c4d.MATERIAL_COLOR_SHADER, "diffuse"), (c4d.MATERIAL_ALPHA_SHADER, "alpha")):
+        profile = slotProfile(detected, slot, None)
+        if profile is not None and mat[shader_id] != None:
+            mat[shader_id][c4d.BITMAPSHADER_COLORPROFILE] = profile # Set texture Color Profile
 
     # Copy Bump to Normal and apply settings
     if mat[c4d.MATERIAL_BUMP_SHADER] != None: # If there is no texture in bump node skip this block
-        try:
-            mat[c4d.MATERIAL_USE_BUMP] = 0 # Disable Bump material node
-            mat[c4d.MATERIAL_USE_NORMAL] = 1 # Enable Normal material node
-            mat[c4d.MATERIAL_NORMAL_SHADER] = mat[c4d.MATERIAL_BUMP_SHADER] # Copy Bump texture -> Normal node
-            mat[c4d.MATERIAL_NORMAL_SHADER][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Normal texture -> Linear Color Profile
-            mat[c4d.MATERIAL_BUMP_SHADER] = None # Disable Bump material node
-        except:
-            pass # Skip if some textures are not input
-
-    # If material is a 'Conductor/Metal'
-    count_layer = mat.GetReflectionLayerCount() # Check if there is more than 1 Reflectance layer (default 'Specular')
-    # If material is not using Transparency (Glass)
-    if mat[c4d.MATERIAL_USE_TRANSPARENCY] != True:
-        if count_layer > 1:
-            # Create new 'Diffuse' in Reflectance Layer
-            try:
-                diffuse_layer = mat.AddReflectionLayer() # Add new layer to Reflectance material node
-                diffuse_layer.SetName("Diffuse") # Set Reflectance layer name to "Diffuse"
-                main_layer = mat.GetReflectionLayerIndex(0) # Settings for Diffuse layer
-
-                # Set properties for Diffuse/Albedo layer
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 7 # Set Type -> 'Lambertian'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR] = 1 # Specular strength -> 100%
-                if mat[c4d.MATERIAL_COLOR_SHADER] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] = mat[c4d.MATERIAL_COLOR_SHADER] # Copies Diffuse texture -> Diffuse Reflectance layer
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_COLOR] = mat[c4d.MATERIAL_COLOR_COLOR] # Diffuse Color -> Reflectance -> Diffuse -> Layer Color
-                mat[c4d.MATERIAL_COLOR_SHADER] = None # Remove Color texture
-                mat[c4d.MATERIAL_USE_COLOR] = 0 # Disable Color material node
-            except:
-                pass # Skip if some textures are not input
-
-            # Create new 'Reflection' in Reflectance Layer (Roughness)
+        if detected.get("bump", (None, False))[1]: # Height map (found by jv_textures) -> keep it in the Bump node
             try:
-                roughness_layer = mat.AddReflectionLayer() # Add new layer to Reflectance material node
-                roughness_layer.SetName("Reflection") # Set Reflectance layer name to "Reflection"
-                main_layer = mat.GetReflectionLayerIndex(0) # Settings for Reflection layer
-                specular_layer = mat.GetReflectionLayerIndex(2) # Old 'Specular' layer to copy from
-                # Set properties for Reflection layer
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 3 # Set type -> 'GGX'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_ADDITIVE] = 0 # Set attenuation -> 'Average'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_REFLECTION] = 1.0 # Set reflection strength -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS] = 1.0 # Set roughness level -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR] = 1.0 # Set specular level -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_FRESNEL_MODE] = 1 # Set fresnel -> dielectric
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_FRESNEL_VALUE_IOR] = 1.5 # Set fresnel value -> 1.5
-                # Copy texture from old Specular layer -> new Roughness layer
-                if mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] = mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] # Copy Specular texture -> Reflection/Roughness layer
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Roughness texture -> Linear Color Profile
+                mat[c4d.MATERIAL_BUMP_SHADER][c4d.BITMAPSHADER_COLORPROFILE] = slotProfile(detected, "bump", 1) # Set Bump texture -> Linear Color Profile
             except:
-                pass # Skip if some textures are not input
-
-            # Create new 'Metal' layer
-            try:
-                metal_layer = mat.AddReflectionLayer() # Add new layer to Reflectance material node
-                metal_layer.SetName("Metal") # Set Reflectance layer name to "Metal"
-                main_layer = mat.GetReflectionLayerIndex(0) # Settings for Metal layer
-                roughness_layer_id = mat.GetReflectionLayerIndex(1) # New 'Reflection' layer in Reflectance (Roughness)
-                diffuse_layer_id = mat.GetReflectionLayerIndex(2) # New 'Diffuse' layer in Reflectance
-                specular_layer = mat.GetReflectionLayerIndex(3) # Old 'Specular' (Roughness) layer to copy from
-                reflection_layer_id = mat.GetReflectionLayerIndex(4) # Old 'Reflection' (Metal) layer to copy from
-                # Set properties for Metal layer
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 3 # Set Type -> GGX
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_ADDITIVE] = 4 # Set attenuation -> 'Metal'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_REFLECTION] = 1.0 # Set reflection strength -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS] = 1.0 # Set roughness level -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR] = 1.0 # Set specular level -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_FRESNEL_MODE] = 2 # Set fresnel -> 'Conductor'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_FRESNEL_VALUE_ETA] = 0 # Set fresnel -> 0
-                # Copy texture from old Diffuse/Specular layer to new Metal layer
-                if mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] = mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] # Copy Roughness texture -> Reflection/Roughness layer
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Roughness texture -> Linear Color Profile
-                if mat[diffuse_layer_id.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] = mat[diffuse_layer_id.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] # Copies diffuse texture -> Layer Color
-                if mat[reflection_layer_id.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_TRANS_TEXTURE] = mat[reflection_layer_id.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] # Copies metal texture -> Layer Mask
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_TRANS_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Metal texture -> Linear Color Profile
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_COLOR] = mat[c4d.MATERIAL_COLOR_COLOR] # Copies Diffuse Color -> Reflectance -> Metal -> Layer Color
-                # Remove old Reflectance layers
-                mat.RemoveReflectionLayerIndex(4) # Remove old 'Reflection' (Metal) layer
-                mat.RemoveReflectionLayerIndex(3) # Remove old 'Specular' (Roughness) layer
-            except:
-                pass # Skip if some textures are not input
-
-        # If material is a 'Dialectric' / not Metal
+                pass # Skip if bump is not a bitmap
         else:
-            # Create new 'Diffuse' in Reflectance Layer (Albedo)
             try:
-                #if mat[c4d.MATERIAL_COLOR_SHADER] != None: # If there is a Diffuse texture
-                diffuse_layer = mat.AddReflectionLayer() # Add new layer to Reflectance material node
-                diffuse_layer.SetName("Diffuse") # Set Reflectance layer name to "Diffuse"
-                main_layer = mat.GetReflectionLayerIndex(0) # Settings for Diffuse layer
-                # Set properties for Diffuse/Albedo layer
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 7 # Set Type -> 'Lambertian'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR] = 1 # Specular strength -> 100%
-                if mat[c4d.MATERIAL_COLOR_SHADER] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE] = mat[c4d.MATERIAL_COLOR_SHADER] # Copies Diffuse texture -> Diffuse Reflectance layer
-                mat[c4d.MATERIAL_COLOR_SHADER] = None # Remove Color texture from Color material node
-                mat[c4d.MATERIAL_USE_COLOR] = 0 # Disable Color material node
-            except:
-                pass # Skip if some textures are not input
-
-            # Create new 'Reflection' in Reflectance Layer (Roughness)
-            try:
-                roughness_layer = mat.AddReflectionLayer() # Add new layer to Reflectance material node
-                roughness_layer.SetName("Reflection") # Set Reflectance layer name to "Reflection"
-                main_layer = mat.GetReflectionLayerIndex(0) # Settings for Reflection layer
-                specular_layer = mat.GetReflectionLayerIndex(2) # Old Specular layer to copy from
-                # Set properties for Reflection layer
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 3 # Set Type -> 'GGX'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_ADDITIVE] = 0 # Set attenuation -> 'Average'
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_REFLECTION] = 1.0 # Set reflection strength -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS] = 1.0 # Set roughness level -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_SPECULAR] = 1.0 # Set specular level -> 100%
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_FRESNEL_MODE] = 1 # Set fresnel -> dielectric
-                mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_FRESNEL_VALUE_IOR] = 1.5 # Set fresnel value -> 1.5
-                # Copy texture from old Specular layer to new Roughness layer
-                if mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] != None: # Check if texture exists
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] = mat[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS] # Copy Roughness texture -> Reflection/Roughness layer
-                    mat[main_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Roughness texture -> Linear Color Profile
-                # Remove old Reflectance layers
-                mat.RemoveReflectionLayerIndex(2) # Remove old 'Specular' (Roughness)
+                mat[c4d.MATERIAL_USE_BUMP] = 0 # Disable Bump material node
+                mat[c4d.MATERIAL_USE_NORMAL] = 1 # Enable Normal material node
+                mat[c4d.MATERIAL_NORMAL_SHADER] = mat[c4d.MATERIAL_BUMP_SHADER] # Copy Bump texture -> Normal node
+                mat[c4d.MATERIAL_NORMAL_SHADER][c4d.BITMAPSHADER_COLORPROFILE] = slotProfile(detected, "bump", 1) # Set Normal texture -> Linear Color Profile
+                mat[c4d.MATERIAL_BUMP_SHADER] = None # Disable Bump material node
             except:
                 pass # Skip if some textures are not input
 
+    # If material is not using Transparency (Glass)
+    if mat[c4d.MATERIAL_USE_TRANSPARENCY] != True:
+        try:
+            old_layers = readReflectanceLayers(mat) # Old 'Specular' (Roughness) & 'Reflection' (Metal) layers, read once
+            layers = reflectanceStack(mat, old_layers, roughness_profile, metal_profile) # Final Diffuse/Reflection/Metal stack
+            buildReflectanceLayers(mat, layers, old_layers["count"]) # Create the stack in one pass, remove the old layers
+            mat[c4d.MATERIAL_COLOR_SHADER] = None # Remove Color texture from Color material node
+            mat[c4d.MATERIAL_USE_COLOR] = 0 # Disable Color material node
+        except (AttributeError, TypeError):
+            pass # Skip if a Reflectance layer or texture can not be read
 
     else: # If material is using Transparency (Glass)
         try:
@@ -163,8 +197,9 @@ def convertMaterials(mat):
             mat[c4d.MATERIAL_TRANSPARENCY_REFRACTION] = 1.517 # Set Fresnel -> 1.517 (Glass)
             mat[c4d.MATERIAL_TRANSPARENCY_COLOR] = c4d.Vector(1,1,1) # Set Transparency color -> White
             transparency_layer = mat.GetReflectionLayerTrans() # Select *Transparency* layer from Reflectance
-            mat[transparency_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 3 # Set Transparency type -> GGX
-            mat[transparency_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS] = 0 # Set Transparency Roughness -> 0%
+            transparency_id = transparency_layer.GetDataID() # Layer parameter IDs (looked up once)
+            mat[transparency_id + c4d.REFLECTION_LAYER_MAIN_DISTRIBUTION] = 3 # Set Transparency type -> GGX
+            mat[transparency_id + c4d.REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS] = 0 # Set Transparency Roughness -> 0%
             mat[c4d.MATERIAL_COLOR_SHADER] = None # Remove Color texture from Color material node
             mat[c4d.MATERIAL_USE_COLOR] = 0 # Disable Color material node
             mat.RemoveReflectionAllLayers() # Remove all Reflectance layers
@@ -173,33 +208,211 @@ def convertMaterials(mat):
             pass # Skip if material not using Translucency
 
 
+# Function - Build the FBX Standard materials listed in a jv_fbxmanifest manifest (no FBX import required, not inserted)
+# Returns the materials and the application that wrote the FBX
+def manifestMaterials(manifest_path):
+    import jv_fbxmanifest
+
+    manifest = jv_fbxmanifest.loadManifest(manifest_path) # Material slots & texture paths read from the FBX
+    return [jv_fbxmanifest.buildSourceMaterial(entry) for entry in manifest["materials"]], manifest.get("application") # Standard materials as the FBX importer creates them
+
+
+# Function - Plan the in-place conversion: material index & name, Color Profiles & normal/height maps (the document is not changed)
+def planConversion(doc, materials, material_tags, manifest_path=None, application=None):
+    textures = {}
+    if TEXTURE_PREFLIGHT or TEXTURE_DETECTION:
+        with profiler.stage("texture preflight"):
+            textures = jv_textures.preflight(doc, materials, report=TEXTURE_PREFLIGHT) # Check the texture files of the source materials
+    conversion = {"version": jv_plan.PLAN_VERSION, "renderer": "physical", "document": doc.GetDocumentName(),
+                  "manifest": manifest_path, "application": application, "materials": [], "merged": []}
+    merged = {}
+    if MERGE_MATERIALS and not manifest_path: # Manifest materials have no Texture Tags to merge
+        with profiler.stage("merge materials"):
+            merged = jv_mapping.mergeGroups(materials) # Duplicate material -> representative
+        if merged:
+            for line in jv_mapping.mergeReport(merged):
+                print(line)
+    index_of = dict((mat, index) for index, mat in enumerate(materials))
+    with profiler.stage("plan"):
+        for mat, representative in merged.items():
+            conversion["merged"].append({"source": index_of[mat], "name": mat.GetName(), "into": index_of[representative]})
+        for index, mat in enumerate(materials):
+            if mat in merged: # Converted through its representative
+                continue
+            detected = {}
+            if TEXTURE_DETECTION and mat.GetType() == c4d.Mmaterial:
+                detected = jv_mapping.detectSlots(jv_mapping.readSourceSlots(mat), textures)["detected"] # Color Profiles & normal/height map
+            conversion["materials"].append({"source": index, "name": mat.GetName(), "detected": detected})
+    if VIEWPORT_BUDGET:
+        with profiler.stage("viewport budget"):
+            budgetPreviews(conversion, materials, material_tags, textures)
+    return conversion
+
+
+# Function - Texture Preview Size of every material within VIEWPORT_BUDGET, most used materials first (see jv_preview.py)
+def budgetPreviews(conversion, materials, material_tags, textures):
+    budget = VIEWPORT_BUDGET * jv_preview.MB
+    users = dict((entry["source"], len(material_tags.get(materials[entry["source"]], []))) for entry in conversion["materials"])
+    for entry in conversion["merged"]: # Texture Tags of duplicates move to their representative
+        users[entry["into"]] += len(material_tags.get(materials[entry["source"]], []))
+    entries = []
+    for entry in conversion["materials"]:
+        mat = materials[entry["source"]]
+        slots = jv_mapping.readSourceSlots(mat) if mat.GetType() == c4d.Mmaterial else {}
+        paths = [slots[slot] for slot in jv_mapping.SLOTS if slots.get(slot)]
+        entries.append({"name": entry["name"], "users": users[entry["source"]], "sides": jv_preview.textureSides(paths, textures)})
+    values, total = jv_preview.allocatePreviews(entries, budget)
+    for entry, value in zip(conversion["materials"], values):
+        entry["preview"] = value # Replaces the 1024x1024 of convertMaterials()
+    for line in jv_preview.budgetReport(entries, values, budget):
+        print(line)
+
+
+# Function - Raise ValueError if a loaded plan does not fit the scene materials
+def checkConversion(conversion, materials):
+    if conversion.get("version") != jv_plan.PLAN_VERSION or conversion.get("renderer") != "physical":
+        raise ValueError("Not a Physical conversion plan")
+    for entry in conversion["materials"] + conversion["merged"]:
+        if entry["source"] >= len(materials) or materials[entry["source"]].GetName() != entry["name"]:
+            raise ValueError("Conversion plan does not match the scene materials (%s)" % entry["name"])
+
+
+# Function - Point the Texture Tags of merged duplicates at their representative and remove the duplicates
+def mergeMaterials(conversion, materials, material_tags):
+    for entry in conversion["merged"]:
+        duplicate, representative = materials[entry["source"]], materials[entry["into"]]
+        for tag in material_tags.get(duplicate, []):
+            undo.AddUndo(c4d.UNDOTYPE_CHANGE, tag) # Change undo
+            tag.SetMaterial(representative) # Replace duplicate with its representative
+        undo.AddDeleteUndo(duplicate) # Delete undo
+        duplicate.Remove() # Remove duplicate material
+
+
+# Function - (material name, Bitmap shader) in the Bump node of the planned materials that become normal maps (height maps stay in the Bump node)
+def normalShaders(conversion, materials):
+    shaders = []
+    for entry in conversion["materials"]:
+        shader = materials[entry["source"]][c4d.MATERIAL_BUMP_SHADER]
+        if shader is not None and shader.GetType() == c4d.Xbitmap and not entry["detected"].get("bump", (None, False))[1]:
+            shaders.append((entry["name"], shader))
+    return shaders
+
+
+# Function - Convert the planned materials, one step per material
+def convertSteps(conversion, materials):
+    for entry in conversion["materials"]:
+        mat = materials[entry["source"]]
+        with profiler.item("material", mat): # Time per material
+            with profiler.stage("convert material"):
+                convertMaterials(mat, entry["detected"], entry.get("preview", 10))
+        yield mat
+
+
+# Function - Save the materials left by a cancelled run, indexes of the current scene (duplicates are already merged)
+def saveCheckpoint(checkpoint, doc, conversion, materials, completed):
+    index_of = dict((mat, index) for index, mat in enumerate(doc.GetMaterials()))
+    remaining = [dict(entry, source=index_of[materials[entry["source"]]]) for entry in conversion["materials"][completed:]]
+    checkpoint.save({"plan": dict(conversion, materials=remaining, merged=[], manifest=None)})
+
+
 # Function - Convert render engine to Physical
 def setupPhysicalEngine():
     try:
-        render_data = doc.GetActiveRenderData() # Assign doc.GetActiveRenderData() -> variable render_data (for undo)
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, render_data) # Start undo
-        physical_engine_id = 1023342 # Physical render engine ID
-        render_data[c4d.RDATA_RENDERENGINE] = physical_engine_id # Assign Physical render engine
-        video_post = c4d.documents.BaseVideoPost(physical_engine_id) # Initializes a new base video post (pvp)
-        render_data.InsertVideoPost(video_post) # Insert video post into render engine (Physical settings)
+        print(jv_render.profileSummary(jv_render.applyProfile(doc, RENDER_PROFILE, undo))) # Reuse the Physical video post of an earlier run
     except:
         pass # Skip if cannot detect Physical Render Engine
 
 
 # Function - Main
 def main():
+    global undo, profiler
+    profiler = jv_profile.createProfiler("JV_FBXMaterialsToPhysical", PROFILE, PROFILE_MEMORY) # NULL_PROFILER unless PROFILE is set
     doc = c4d.documents.GetActiveDocument() # Get active C4D Document
-    materials = doc.GetMaterials() # Get all scene materials
-    doc.StartUndo() # Start recording undos
+    undo = jv_undo.UndoRecorder(doc, UNDO_MODE, profiler) # AddUndo calls go through the selected undo strategy
+
+    # Plan the conversion: Color Profiles & normal/height map of every material
+    checkpoint = jv_scheduler.Checkpoint(doc, "JV_FBXMaterialsToPhysical") if CHUNKED else None
+    resume = checkpoint.load() if checkpoint is not None and not APPLY_PLAN else None
+    if resume:
+        conversion = resume["plan"] # Materials left by a cancelled run
+        manifest_path = None
+        print("Resuming a cancelled conversion (%s)" % checkpoint.path)
+    elif APPLY_PLAN:
+        conversion = jv_plan.loadPlan(APPLY_PLAN) # Plan of an earlier dry run
+        manifest_path = conversion["manifest"]
+    else:
+        conversion = None
+        manifest_path = MANIFEST_PATH
+    with profiler.stage("manifest materials"):
+        materials, application = manifestMaterials(manifest_path) if manifest_path else (doc.GetMaterials(), None) # Manifest materials are only inserted when applied
+    with profiler.stage("scene index"):
+        material_tags = jv_scene.sceneIndex(doc).materialTags() if not manifest_path else {} # Texture Tags of every object by material (index shared while the scene is unchanged)
+    if conversion is None:
+        conversion = planConversion(doc, materials, material_tags, manifest_path, application)
+    checkConversion(conversion, materials) # ValueError if the scene changed since the plan was saved
+    print("Conversion plan: %d materials to convert, %d merged" % (len(conversion["materials"]), len(conversion["merged"])))
+    if PLAN_PATH:
+        jv_plan.savePlan(conversion, PLAN_PATH) # Review the plan or apply it later with APPLY_PLAN
+    if DRY_RUN: # Nothing is changed in the document
+        profiler.finish(PROFILE_REPORT)
+        return
+
+    undo.StartUndo() # Start recording undos
 
     # Convert render engine to Physical
-    setupPhysicalEngine()
+    with profiler.stage("render settings"):
+        setupPhysicalEngine()
+        if VALIDATE_RENDER_SETTINGS:
+            for line in jv_render.validateScene(doc, undo): # Duplicate video posts of all Render Settings
+                print(line)
+
+    # Materials from a jv_fbxmanifest manifest instead of the scene
+    if manifest_path:
+        with profiler.stage("manifest materials"):
+            for mat in materials:
+                doc.InsertMaterial(mat) # Insert material into document
+                undo.AddUndo(c4d.UNDOTYPE_NEW, mat) # New undo
+
+    # Merge duplicate materials into their representative
+    if conversion["merged"]:
+        with profiler.stage("merge materials"):
+            mergeMaterials(conversion, materials, material_tags)
+        profiler.count("materials merged", len(conversion["merged"]))
+
+    # Green flipped copies of the normal maps, the Bump textures point at them before they move to the Normal node
+    if FLIP_NORMAL_GREEN:
+        with profiler.stage("normal maps"):
+            print(jv_normals.summary(jv_normals.flipShaders(doc, normalShaders(conversion, materials), undo, DIRECTX_NORMAL_MAPS, conversion.get("application"), profiler=profiler))) # Shaders of a cancelled run already point at their copies
 
     # Convert scene materials to Physical
-    for mat in materials:
-        convertMaterials(mat)
+    with profiler.stage("apply"):
+        scheduler = jv_scheduler.Scheduler("JV_FBXMaterialsToPhysical", profiler=profiler) if CHUNKED else None
+        try:
+            jv_scheduler.runSteps(scheduler, "convert materials", convertSteps(conversion, materials), len(conversion["materials"]))
+        except jv_scheduler.Cancelled as cancelled:
+            saveCheckpoint(checkpoint, doc, conversion, materials, cancelled.completed) # Every material is converted or untouched
+            print("Cancelled: %s - run the script again to resume" % cancelled)
+            profiler.count("materials converted", cancelled.completed)
+            scheduler.finish() # Clear the status bar
+            undo.EndUndo() # Stop recording undos
+            profiler.finish(PROFILE_REPORT)
+            c4d.EventAdd() # Refresh c4d
+            return
+        if scheduler is not None:
+            scheduler.finish()
+            checkpoint.clear() # Finished, nothing to resume
+    profiler.count("materials converted", len(conversion["materials"]))
+
+    # Viewport proxies of the textures in a take the user activates, the Main take keeps the original files for rendering
+    if PREVIEW_PROXIES:
+        with profiler.stage("preview proxies"):
+            converted = [materials[entry["source"]] for entry in conversion["materials"]]
+            print(jv_proxy.summary(jv_proxy.applyProxies(doc, converted, undo, PREVIEW_PROXY_SIZE, profiler=profiler)))
 
-    doc.EndUndo() # Stop recording undos
+    undo.EndUndo() # Stop recording undos
+    print(undo.report()) # Undo entries recorded by UNDO_MODE
+    profiler.count("undo entries", undo.recorded)
+    profiler.finish(PROFILE_REPORT) # Print the summary, save the report
     c4d.EventAdd() # Refresh c4d
 
 if __name__=='__main__':
@@ -12,211 +12,257 @@ Description-US: Convert FBX Standard Roughness Materials to Vray 5.0: supports:
                 - Metal
                 - Normal Bump
                 - Alpha/Opacity
-                - Glass: any materials using "Transparency" will be converted to Glass. Comment out line 68-79 if not required
-
-                Change/Add your own material settings in Function: newVrayMaterial(current_material, new_vray_mat)
+                - Glass: any materials using "Transparency" will be converted to Glass. Remove the "glass" block in VRAY_MAPPING if not required
+
+                Change/Add your own material settings in VRAY_MAPPING (keep jv_mapping.py next to this script)
+                DRY_RUN = True prints the conversion plan without changing the scene, PLAN_PATH/APPLY_PLAN save and apply it (see jv_plan.py)
+                PREVIEW_PROXIES = True adds downscaled textures in take "JV Viewport Proxies", a manual toggle: the Main take stays current,
+                activate the proxy take for viewport work and the Main take again before rendering (see jv_proxy.py)
+                VIEWPORT_BUDGET = 2048 (MB) picks one Editor Map Size within a viewport texture memory budget and sets it in the V-Ray preferences (see jv_preview.py)
+                MATERIAL_LIBRARY = True copies materials converted by earlier runs from a local library (see jv_library.py)
+                CHUNKED = True shows the progress in the status bar, ESC cancels: run the script again to resume (see jv_scheduler.py)
+                RENDER_PROFILE picks the render settings profile, VALIDATE_RENDER_SETTINGS = True removes duplicate video posts (see jv_render.py)
+                FLIP_NORMAL_GREEN = True points the DirectX normal maps at copies with the green channel inverted (DirectX -> OpenGL, see jv_normals.py)
                 
                 Warning: 
-                Preferences can be permanently changed - Comment in line 208 if required. Changes:
+                Preferences can be permanently changed - Comment in changePreferences() in main() if required (VIEWPORT_BUDGET calls it). Changes:
                 Edit -> Preferences -> Renderer -> V-Ray -> Materials -> Previews -> Enable
                 Edit -> Preferences -> Renderer -> V-Ray -> Materials -> Previews -> Editor Map Size: 1024x1024 (4MB)
 """
 
 # Libraries
+import os
+import sys
 import c4d
 from c4d import gui
 
-
-# Class - Object iterator
-class ObjectIterator :
-        def __init__(self, baseObject):
-            self.baseObject = baseObject
-            self.currentObject = baseObject
-            self.objectStack = []
-            self.depth = 0
-            self.nextDepth = 0
-
-        def __iter__(self):
-            return self
-
-        def next(self):
-            if self.currentObject == None :
-                raise StopIteration
-
-            obj = self.currentObject
-            self.depth = self.nextDepth
-
-            child = self.currentObject.GetDown()
-            if child :
-                self.nextDepth = self.depth + 1
-                self.objectStack.append(self.currentObject.GetNext())
-                self.currentObject = child
-            else :
-                self.currentObject = self.currentObject.GetNext()
-                while( self.currentObject == None and len(self.objectStack) > 0 ) :
-                    self.currentObject = self.objectStack.pop()
-                    self.nextDepth = self.nextDepth - 1
-            return obj
-
-
-# Function - Convert current_material Materials to V-Ray Materials
-def newVrayMaterial(current_material, new_vray_mat):
-    # Set V-Ray Material Settings for both Metal/Dialectric materials
-    new_vray_mat[c4d.BRDFVRAYMTL_OPTION_USE_ROUGHNESS] = True # Set Reflection -> "Use Roughness"
-    new_vray_mat[c4d.BRDFVRAYMTL_REFLECT_VALUE] = c4d.Vector(255,255,255) # Set Reflection color -> White
-    new_vray_mat[c4d.BRDFVRAYMTL_DIFFUSE_VALUE] = current_material[c4d.MATERIAL_COLOR_COLOR] # Copy Diffuse Color -> Vray Diffuse Color
-
-    # Copy texture + paths from current_material to V-Ray Materials
-    try:
-        # Glass - OVERRIDE materials using Transparency in material with V-Ray Glass Shader Settings
-        if current_material[c4d.MATERIAL_USE_TRANSPARENCY] == True: # If using Transparency in material
-            new_vray_mat[c4d.BRDFVRAYMTL_REFRACT_VALUE] = c4d.Vector(255,255,255) # Set Refraction color -> White
-            new_vray_mat[c4d.BRDFVRAYMTL_REFRACT_IOR_VALUE] = 1.517 # Set Fresnel -> 1.517 (Glass)
-            new_vray_mat[c4d.BRDFVRAYMTL_REFLECT_VALUE] = c4d.Vector(255,255,255) # Set Reflection color -> White
-            new_vray_mat[c4d.BRDFVRAYMTL_REFLECT_GLOSSINESS_VALUE] = 0 # No Roughness for Glass
-    except:
-        pass # Skip if material not Glass
-
-    try:
-        # Diffuse
-        diffuse_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-
-        new_diffuse_path = current_material[c4d.MATERIAL_COLOR_SHADER][c4d.BITMAPSHADER_FILENAME] # Location of current_material Diffuse texture
-        new_vray_mat.InsertShader(diffuse_shader) # Insert diffuse shader into V-Ray material
-        new_vray_mat[c4d.BRDFVRAYMTL_DIFFUSE_TEXTURE] = diffuse_shader # Set path of bitmap current_material -> bitmap path
-        diffuse_shader[c4d.BITMAPSHADER_FILENAME] = new_diffuse_path # Assign texture path for bitmap to current_material -> bitmap path
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Roughness
-        roughness_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-        roughness_layer_id = current_material.GetReflectionLayerIndex(0) # Reflectance layer texture index location ('Specular')
-
-        new_rough_path = current_material[roughness_layer_id.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS][c4d.BITMAPSHADER_FILENAME] # current_material Reflectance Layers -> Specular -> Width / Texture remap to V-Ray Material -> Reflection -> Roughness
-        new_vray_mat[c4d.BRDFVRAYMTL_REFLECT_GLOSSINESS_TEXTURE] = roughness_shader # Assign Specular texture to Reflection -> Roughness
-        roughness_shader[c4d.BITMAPSHADER_FILENAME] = new_rough_path # Assign texture path for bitmap to current_material -> bitmap path
-        new_vray_mat.InsertShader(roughness_shader) # Insert bitmap shader into V-Ray material
-        new_vray_mat[c4d.BRDFVRAYMTL_REFLECT_GLOSSINESS_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Color Profile for bitmap -> linear
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Normal Bump
-        if current_material[c4d.MATERIAL_BUMP_SHADER] != None: # If there is no texture in Bump skip this block
-            normal_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-            normal_vray_bump = c4d.BaseShader(1057881) # Create V-Ray Normal Texture
-            new_vray_mat.InsertShader(normal_vray_bump) # Insert V-Ray Normal Texture into V-Ray Material
-            new_vray_mat[c4d.BRDFVRAYMTL_BUMP_MAP] = normal_vray_bump # Assign V-Ray Normal Texture to Bump
-
-            new_bump_path = current_material[c4d.MATERIAL_BUMP_SHADER][c4d.BITMAPSHADER_FILENAME] # current_material Normal Bump texture -> V-Ray Material -> Bump -> VrayNormalMap -> Map
-            new_vray_mat[c4d.BRDFVRAYMTL_BUMP_MAP][c4d.TEXNORMALBUMP_BUMP_TEX_COLOR] = normal_shader # Create V-Ray material -> Bump Map -> VrayNormalMap bitmap shader
-            new_vray_mat[c4d.MATERIAL_BUMP_SHADER] = normal_shader # Create empty bitmap shader
-            normal_shader[c4d.BITMAPSHADER_FILENAME] = new_bump_path # Assign texture path for bitmap to current_material -> bitmap path
-            new_vray_mat.InsertShader(normal_shader) # Insert bitmap shader into V-Ray material
-            new_vray_mat[c4d.BRDFVRAYMTL_BUMP_MAP][c4d.TEXNORMALBUMP_BUMP_TEX_COLOR][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Normal texture -> Color Profile -> Linear
-            new_vray_mat[c4d.BRDFVRAYMTL_BUMP_MAP][c4d.TEXNORMALBUMP_MAP_TYPE] = 1 # Set Normal Map Type -> Tangent Space
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Opacity
-        opacity_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-
-        new_opacity_path = current_material[c4d.MATERIAL_ALPHA_SHADER][c4d.BITMAPSHADER_FILENAME] # Location of current_material Opacity texture
-        new_vray_mat.InsertShader(opacity_shader) # Insert opacity shader into V-Ray material
-        new_vray_mat[c4d.BRDFVRAYMTL_OPACITY_COLOR_TEXTURE] = opacity_shader # Set path of bitmap -> current_material -> bitmap path
-        opacity_shader[c4d.BITMAPSHADER_FILENAME] = new_opacity_path # Assign texture path for bitmap to current_material -> bitmap path
-        new_vray_mat[c4d.BRDFVRAYMTL_OPACITY_COLOR_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Opacity texture -> Color Profile -> Linear
-    except:
-        pass # Skip if some textures are not input
-
-    try:
-        # Metalness
-        count_layer = current_material.GetReflectionLayerCount() # Check in material if there is more than 1 Reflectance layer (default 'Specular') & Metal Materials have ('Reflection' and 'Specular')
-        if count_layer > 1:
-            metal_shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
-            metal_layer_id = current_material.GetReflectionLayerIndex(1)  # current_material Metal texture index location for current_material Material ('Reflection')
-
-            new_metal_path = current_material[metal_layer_id.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE][c4d.BITMAPSHADER_FILENAME] # current_material Metal texture -> V-Ray Material -> Reflection -> Metalness
-            new_vray_mat[c4d.BRDFVRAYMTL_METALNESS_TEXTURE] = metal_shader # Set path of bitmap current_material -> bitmap path
-            metal_shader[c4d.BITMAPSHADER_FILENAME] = new_metal_path # Assign texture path for bitmap to current_material -> bitmap path
-            new_vray_mat.InsertShader(metal_shader) # Insert bitmap shader into V-Ray material
-            new_vray_mat[c4d.BRDFVRAYMTL_METALNESS_VALUE] = 1 # Set V-ray Material -> Reflection > Metalness to 1.0
-            new_vray_mat[c4d.BRDFVRAYMTL_METALNESS_TEXTURE][c4d.BITMAPSHADER_COLORPROFILE] = 1 # Set Metal texture -> Color Profile -> Linear
-    except:
-        pass # Skip if some textures are not input
-
-    return new_vray_mat
-
-
-# Function - Convert materials from current_material to V-Ray
-def convertMaterials(materials, collected_objs):
-    for current_material in materials:
-        new_vray_mat = c4d.BaseMaterial(1053286) # Create new V-Ray material
-        doc.InsertMaterial(new_vray_mat) # Insert V-Ray material into document
-        doc.AddUndo(c4d.UNDOTYPE_NEW, new_vray_mat) # New undo
-        new_vray_mat.SetName(current_material.GetName()) # Assign V-Ray material name as current_material name
-        replace_material = newVrayMaterial(current_material, new_vray_mat) # Run Function to replace current material with V-Ray material
-
-       # Go through Objects -> Tags -> Texture Tags -> Replace Material
-        for obj in collected_objs: # Loop through object selection
-                tags = obj.GetTags() # Get objects tags
-
-                for tag in tags: # Loop through tags
-                    if type(tag).__name__ == "TextureTag": # If Texture tag founded
-                        mat = tag.GetMaterial() # Get material from tag
-                        doc.AddUndo(c4d.UNDOTYPE_CHANGE, tag) # Change undo
-                        if mat.GetName() == replace_material.GetName(): # If the material name matches
-                            tag.SetMaterial(replace_material) # Replace current_material with V-Ray material
-
-    c4d.CallCommand(12168, 12168) # Remove unused materials
+script_folder = os.path.dirname(os.path.abspath(__file__)) # Shared jv_ modules live next to this script
+if script_folder not in sys.path:
+    sys.path.append(script_folder)
+import jv_mapping
+import jv_undo
+import jv_textures
+import jv_scene
+import jv_profile
+import jv_plan
+import jv_proxy
+import jv_preview
+import jv_library
+import jv_scheduler
+import jv_render
+import jv_normals
+
+MANIFEST_PATH = None # Optional: path to a manifest written by jv_fbxmanifest.py -> convert its materials without importing the FBX
+PLAN_PATH = None # Optional: save the conversion plan to this .json file (see jv_plan.py)
+DRY_RUN = False # Only plan the conversion (console summary, PLAN_PATH), the document is not changed
+APPLY_PLAN = None # Optional: apply a plan saved by PLAN_PATH instead of planning again
+UNDO_MODE = "modified" # Undo strategy: all, modified, snapshot or none (see jv_undo.py)
+MERGE_MATERIALS = True # Convert FBX materials with the same colour, textures & flags once (see jv_mapping.mergeGroups)
+TEXTURE_PREFLIGHT = False # Report missing/large texture files before converting (see jv_textures.py)
+TEXTURE_DETECTION = True # Color Profile & normal map/bump from the texture contents instead of the mapping table (see jv_textures.py)
+VIEWPORT_BUDGET = None # Optional: viewport texture memory in MB, picks one Editor Map Size and sets it with changePreferences() (see jv_preview.py)
+MATERIAL_LIBRARY = False # Copy materials converted by earlier runs (any scene) from a local library instead of building them (see jv_library.py)
+MATERIAL_LIBRARY_SIZE = 5000 # Materials kept in the library, the least recently used are removed
+CHUNKED = True # Create materials & remap tags in chunks: status bar progress, ESC cancels (see jv_scheduler.py)
+RENDER_PROFILE = "vray" # Render settings profile of the active Render Settings, the video post is reused (see jv_render.py)
+VALIDATE_RENDER_SETTINGS = False # Also remove duplicate video posts from every Render Settings entry (see jv_render.py)
+PREVIEW_PROXIES = False # Downscaled copies of the textures in a take you activate for viewport work (manual toggle, the Main take stays current, see jv_proxy.py)
+PREVIEW_PROXY_SIZE = 1024 # Longest side of the proxies (px), matches the 1024x1024 material previews
+FLIP_NORMAL_GREEN = False # DirectX normal maps (names with _dx/DirectX, 3ds Max manifests, DIRECTX_NORMAL_MAPS): the new materials use cached copies with the green channel inverted (see jv_normals.py)
+DIRECTX_NORMAL_MAPS = () # Optional: more DirectX normal maps for FLIP_NORMAL_GREEN, file names, paths or material names (other maps are OpenGL and kept)
+PROFILE = False # Print stage timings & counters (see jv_profile.py)
+PROFILE_MEMORY = False # Also measure peak Python memory (slower, Python 3 only)
+PROFILE_REPORT = None # Optional: save the profile report to this .json/.csv file
+OBJECT_TYPES = (5100, 5159) # Texture Tags of Polygon object or Base object (non editable) are remapped
+undo = None # jv_undo.UndoRecorder of the running script (set in main())
+profiler = jv_profile.NULL_PROFILER # jv_profile profiler of the running script (set in main())
+
+# V-Ray material settings: FBX Standard material slots -> V-Ray Material (see jv_mapping.py for the table layout)
+VRAY_MAPPING = {
+    "material": 1053286, # V-Ray material
+    "values": [
+        (c4d.BRDFVRAYMTL_OPTION_USE_ROUGHNESS, True), # Set Reflection -> "Use Roughness"
+        (c4d.BRDFVRAYMTL_REFLECT_VALUE, c4d.Vector(255,255,255)), # Set Reflection color -> White
+    ],
+    "color": [c4d.BRDFVRAYMTL_DIFFUSE_VALUE], # Copy Diffuse Color -> Vray Diffuse Color
+    "glass": [ # Glass - remove this block if not required
+        (c4d.BRDFVRAYMTL_REFRACT_VALUE, c4d.Vector(255,255,255)), # Set Refraction color -> White
+        (c4d.BRDFVRAYMTL_REFRACT_IOR_VALUE, 1.517), # Set Fresnel -> 1.517 (Glass)
+        (c4d.BRDFVRAYMTL_REFLECT_VALUE, c4d.Vector(255,255,255)), # Set Reflection color -> White
+        (c4d.BRDFVRAYMTL_REFLECT_GLOSSINESS_VALUE, 0), # No Roughness for Glass
+    ],
+    "slots": [
+        ("diffuse", {"parameter": c4d.BRDFVRAYMTL_DIFFUSE_TEXTURE}), # Diffuse texture -> Diffuse
+        ("roughness", {"parameter": c4d.BRDFVRAYMTL_REFLECT_GLOSSINESS_TEXTURE, "profile": 1}), # Reflectance -> Specular texture -> Reflection -> Roughness (linear)
+        ("bump", {"parameter": c4d.BRDFVRAYMTL_BUMP_MAP, "profile": 1, # Normal Bump texture -> Bump -> VrayNormalMap -> Map (linear)
+                  "wrapper": 1057881, "wrapper_parameter": c4d.TEXNORMALBUMP_BUMP_TEX_COLOR, # V-Ray Normal Texture
+                  "wrapper_values": [(c4d.TEXNORMALBUMP_MAP_TYPE, 1)], # Set Normal Map Type -> Tangent Space
+                  "height": {"parameter": c4d.BRDFVRAYMTL_BUMP_MAP, "profile": 1, # Height map (found by jv_textures) -> Bump -> VrayNormalMap -> Map (linear)
+                             "wrapper": 1057881, "wrapper_parameter": c4d.TEXNORMALBUMP_BUMP_TEX_COLOR, # V-Ray Normal Texture
+                             "wrapper_values": [(c4d.TEXNORMALBUMP_MAP_TYPE, 0)]}}), # Set Normal Map Type -> Bump Map
+        ("alpha", {"parameter": c4d.BRDFVRAYMTL_OPACITY_COLOR_TEXTURE, "profile": 1}), # Opacity texture -> Opacity (linear)
+        ("metal", {"parameter": c4d.BRDFVRAYMTL_METALNESS_TEXTURE, "profile": 1, # Reflectance -> Reflection texture -> Reflection -> Metalness (linear)
+                   "values": [(c4d.BRDFVRAYMTL_METALNESS_VALUE, 1)]}), # Set Metalness to 1.0
+    ],
+}
+
+
+# Function - Plan the conversion of materials to V-Ray (the document is not changed)
+def convertMaterials(materials, material_tags, material_users):
+    plan = jv_mapping.compilePlan(VRAY_MAPPING) # Resolve VRAY_MAPPING once for all materials
+    textures = {}
+    if TEXTURE_PREFLIGHT or TEXTURE_DETECTION:
+        with profiler.stage("texture preflight"):
+            textures = jv_textures.preflight(doc, materials, report=TEXTURE_PREFLIGHT) # Check the texture files of the source materials
+    merged = {}
+    if MERGE_MATERIALS:
+        with profiler.stage("merge materials"):
+            merged = jv_mapping.mergeGroups(materials) # Duplicate material -> representative
+        if merged:
+            for line in jv_mapping.mergeReport(merged):
+                print(line)
+    with profiler.stage("plan"):
+        conversion = jv_plan.planScene(doc, plan, materials, material_tags, material_users, textures=textures if TEXTURE_DETECTION else None,
+                                       object_types=OBJECT_TYPES, merged=merged, profiler=profiler) # New materials, reused materials & Texture Tags to remap
+    if VIEWPORT_BUDGET:
+        with profiler.stage("viewport budget"):
+            budgetPreviews(conversion, textures)
+    return conversion
+
+
+# Function - Editor Map Size shared by the new materials within VIEWPORT_BUDGET (see jv_preview.py)
+def budgetPreviews(conversion, textures):
+    budget = VIEWPORT_BUDGET * jv_preview.MB
+    entries = jv_preview.conversionEntries(conversion, textures) # Users & texture resolutions of the new materials
+    value, total = jv_preview.uniformPreview(entries, budget) # V-Ray previews are sized in the preferences, not per material
+    conversion["preview"] = value # Used by changePreferences()
+    for line in jv_preview.budgetReport(entries, [value] * len(entries), budget):
+        print(line)
+
+
+# Function - Plan the conversion of materials listed in a jv_fbxmanifest manifest to V-Ray (no FBX import required)
+def convertManifest(manifest_path):
+    import jv_fbxmanifest
+
+    manifest = jv_fbxmanifest.loadManifest(manifest_path) # Material slots & texture paths read from the FBX
+    textures = {}
+    if TEXTURE_PREFLIGHT or TEXTURE_DETECTION:
+        with profiler.stage("texture preflight"):
+            textures = jv_textures.preflight(doc, entries=manifest["materials"], report=TEXTURE_PREFLIGHT) # Check the texture files of the manifest
+    plan = jv_mapping.compilePlan(VRAY_MAPPING) # Resolve VRAY_MAPPING once for all materials
+    with profiler.stage("plan"):
+        conversion = jv_plan.planManifest(doc, plan, manifest["materials"], textures if TEXTURE_DETECTION else None, manifest.get("application")) # New materials only
+    if VIEWPORT_BUDGET:
+        with profiler.stage("viewport budget"):
+            budgetPreviews(conversion, textures)
+    return conversion
+
+
+# Function - Load a conversion plan saved by PLAN_PATH, checked against VRAY_MAPPING & the scene materials
+def loadConversion(plan_path, materials):
+    conversion = jv_plan.loadPlan(plan_path)
+    jv_plan.checkConversion(conversion, jv_mapping.compilePlan(VRAY_MAPPING), materials) # ValueError if the scene changed
+    return conversion
 
 
 # Function - Setup Scene Vray Settings
 def setupVrayEngine():
-    render_data = doc.GetActiveRenderData() # Assign doc.GetActiveRenderData() -> variable render_data (for undo)
-    doc.AddUndo(c4d.UNDOTYPE_CHANGE, render_data) # Change undo
-    vray_engine_id = 1053272 # Vray render engine ID
-    render_data[c4d.RDATA_RENDERENGINE] = vray_engine_id # Assign V-Ray render engine
-    video_post = c4d.documents.BaseVideoPost(vray_engine_id) # Initializes a new base video post (pvp)
-    render_data.InsertVideoPost(video_post) # Insert video post into render engine (Vray settings)
+    print(jv_render.profileSummary(jv_render.applyProfile(doc, RENDER_PROFILE, undo))) # Reuse the V-Ray video post of an earlier run, remove duplicates
 
 
 # Function - Change C4D Preferences
-def changePreferences():
+def changePreferences(preview_size=10):
     vray_pref_id = 1053273 # Vray preference plugin ID
     plugin_pref = c4d.plugins.FindPlugin(vray_pref_id, c4d.PLUGINTYPE_PREFS) # Assign V-Ray to variable plugin_pref
     plugin_pref[c4d.VRAY_PREFS_MATERIAL_PREVIEW_ENABLE] = True # Set Preferences -> Renderer -> V-Ray > Materials -> Previews -> Enabled = True
-    plugin_pref[c4d.VRAY_PREFS_VIEWPORT_PREVIEW_SIZE] = 10 # Set Preferences -> Renderer -> V-Ray > Materials -> Previews -> Editor Map Size -> 1024x1024
+    plugin_pref[c4d.VRAY_PREFS_VIEWPORT_PREVIEW_SIZE] = preview_size # Set Preferences -> Renderer -> V-Ray > Materials -> Previews -> Editor Map Size -> 1024x1024 (or VIEWPORT_BUDGET)
 
 
 # Main function
 def main():
+    global undo, profiler
+    profiler = jv_profile.createProfiler("JV_FBXMaterialsToVray", PROFILE, PROFILE_MEMORY) # NULL_PROFILER unless PROFILE is set
     doc = c4d.documents.GetActiveDocument() # Get active C4D document
+    undo = jv_undo.UndoRecorder(doc, UNDO_MODE, profiler) # AddUndo calls go through the selected undo strategy
     materials = doc.GetMaterials() # Get all scene materials
-    obj = doc.GetFirstObject() # Get first object in the document
-    scene = ObjectIterator(obj) # Iterate through all objects
 
-    doc.StartUndo() # Start recording undos
+    # Plan the conversion: materials to create, Texture Tags to remap, materials to delete
+    material_tags = material_users = None # Texture Tags are collected again when a saved plan is applied
+    if APPLY_PLAN:
+        conversion = loadConversion(APPLY_PLAN, materials) # Plan of an earlier dry run
+    elif MANIFEST_PATH:
+        conversion = convertManifest(MANIFEST_PATH) # Materials from a jv_fbxmanifest manifest
+    else:
+        with profiler.stage("scene index"):
+            index = jv_scene.sceneIndex(doc) # Shared with the other scripts while the scene is unchanged
+            material_tags = index.materialTags(OBJECT_TYPES) # Texture Tags of scene Polygon/Base objects by material (remapped)
+            material_users = index.materialTags() # Texture Tags of every object by material (a material still used elsewhere is kept)
+        conversion = convertMaterials(materials, material_tags, material_users)
+    print(jv_plan.summary(conversion))
+    if PLAN_PATH:
+        jv_plan.savePlan(conversion, PLAN_PATH) # Review the plan or apply it later with APPLY_PLAN
+    if DRY_RUN: # Nothing is changed in the document
+        profiler.finish(PROFILE_REPORT)
+        return
+
+    undo.StartUndo() # Start recording undos
 
     # Convert render engine to V-Ray
-    setupVrayEngine()
+    with profiler.stage("render settings"):
+        setupVrayEngine()
+        if VALIDATE_RENDER_SETTINGS:
+            for line in jv_render.validateScene(doc, undo): # Duplicate video posts of all Render Settings
+                print(line)
 
     # Change C4D Preferences
     # Warning: This changes your Edit -> Preferences -> Renderer -> V-Ray -> Materials settings
     #changePreferences()
-
-    # Collect scene Polygon/Base objects
-    collected_objs = [] # Empty list to collect all scene objects
-    for obj in scene:
-        if (obj.GetType() == 5100) or (obj.GetType() == 5159): # If obj is Polygon object or Base object (non editable)
-            collected_objs.append(obj) # Append objects to collected_objs
-
-    # Convert scene materials to V-Ray
-    convertMaterials(materials, collected_objs)
-
-    doc.EndUndo() # Stop recording undos
+    if VIEWPORT_BUDGET and "preview" in conversion: # V-Ray has one Editor Map Size, the budget only applies through the preferences
+        changePreferences(conversion["preview"])
+        size = jv_preview.PREVIEW_SIZES[conversion["preview"]]
+        print("V-Ray preferences: Editor Map Size set to %dx%d (VIEWPORT_BUDGET)" % (size, size))
+
+    # Green flipped copies of the normal maps, written into the material plans before the materials are built
+    if FLIP_NORMAL_GREEN:
+        with profiler.stage("normal maps"):
+            print(jv_normals.summary(jv_normals.flipPlanNormals(doc, conversion, DIRECTX_NORMAL_MAPS, profiler=profiler)))
+
+    # Create the V-Ray materials, remap the Texture Tags & remove unused materials in one pass
+    with profiler.stage("apply"):
+        library = jv_library.MaterialLibrary("vray", max_materials=MATERIAL_LIBRARY_SIZE) if MATERIAL_LIBRARY else None
+        scheduler = jv_scheduler.Scheduler("JV_FBXMaterialsToVray", profiler=profiler) if CHUNKED else None
+        try:
+            result = jv_plan.applyConversion(doc, conversion, undo, profiler, material_tags, library=library, scheduler=scheduler,
+                                             material_users=material_users)
+        except jv_scheduler.Cancelled as cancelled:
+            result = None # Finished materials & tags stay, the next run reuses them
+            print("Cancelled: %s - run the script again to resume" % cancelled)
+        if scheduler is not None:
+            scheduler.finish() # Clear the status bar
+    if library is not None:
+        with profiler.stage("material library"):
+            library.save() # Add the new materials, remove the least recently used
+        print(library.report())
+        profiler.count("library hits", library.hits)
+    if result is None: # Cancelled
+        undo.EndUndo() # Stop recording undos
+        profiler.finish(PROFILE_REPORT)
+        c4d.EventAdd() # Refresh Cinema 4D
+        return
+    profiler.count("materials reused", result["reused"])
+    if result["kept"]:
+        print("Kept %d source materials still used by Texture Tags of other object types" % result["kept"])
+
+    # Viewport proxies of the textures in a take the user activates, the Main take keeps the original files for rendering
+    if PREVIEW_PROXIES:
+        with profiler.stage("preview proxies"):
+            converted = [mat for mat in doc.GetMaterials() if mat.GetType() == VRAY_MAPPING["material"]] # New & reused materials
+            print(jv_proxy.summary(jv_proxy.applyProxies(doc, converted, undo, PREVIEW_PROXY_SIZE, profiler=profiler)))
+
+    undo.EndUndo() # Stop recording undos
+    print(undo.report()) # Undo entries recorded by UNDO_MODE
+    profiler.count("undo entries", undo.recorded)
+    profiler.finish(PROFILE_REPORT) # Print the summary, save the report
     c4d.EventAdd() # Refresh Cinema 4D
 
 
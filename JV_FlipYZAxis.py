@@ -7,27 +7,346 @@ Version: 1.0.0
 Written for Maxon Cinema 4D R21.207
 Python version 2.7.18
 Description-US: Flip Z/Y Axis for Nulls, Nested Nulls and Polygon objects.
+
+                FLIP_MODE:
+                - matrix     (default) one pass over the whole hierarchy, objects stay where they are in the Object Manager:
+                             Polygon & Spline points (and spline tangents) are rotated, Polygon/Spline/Null matrices are
+                             corrected, Instances of them get the same correction, other objects (generators, lights,
+                             cameras...) keep their global position/rotation. Position/Rotation/Scale animation tracks
+                             are converted with the matrices: Y/Z Position & Scale tracks are swapped as whole tracks,
+                             Rotation keys are read, converted and written back together (H, P & B keyed at the same times,
+                             exact at the keys, between keys the rotation interpolates in the new axes)
+                - reparent   original flip: children are removed and re-inserted under their Null, top level Polygon/Null only
+
+                CHUNKED = True (matrix mode): progress in the status bar, ESC cancels between chunks of objects. The
+                flipped objects are kept in a checkpoint next to the document, the next run continues after them
+                (see jv_scheduler.py).
 """
 
+import os
+import sys
 import c4d
 import math
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from c4d import gui
 from c4d import GeListNode
 
+script_folder = os.path.dirname(os.path.abspath(__file__)) # Shared jv_ modules live next to this script
+if script_folder not in sys.path:
+    sys.path.append(script_folder)
+import jv_undo
+import jv_profile
+import jv_scene
+import jv_scheduler
+
+try:
+    import numpy as np # Optional: batched point transforms
+except ImportError:
+    np = None # Fall back to transforming one c4d.Vector at a time
+
+FLIPPED_TYPES = (5100, 5101, 5140) # Polygon, Spline & Null objects get the flipped axis (Instances of them too)
+FLIPPED_NAMES = {5100: "polygon", 5101: "spline", 5140: "null"} # Counter names, Instances count as "instance"
+TWO_PI = 2.0 * math.pi
+POINT_CHUNK_SIZE = 1000000 # Points transformed per batch (bounds the temporary NumPy arrays of the in-place transform)
+THREADED_POINT_COUNT = 2000000 # Meshes with more points than this have their batches spread over a thread pool
+FLIP_MODE = "matrix" # "matrix" or "reparent" (see Description)
+CHUNKED = True # Matrix mode in chunks: status bar progress, ESC cancels, the next run resumes (see jv_scheduler.py)
+UNDO_MODE = "modified" # Undo strategy: all, modified, snapshot or none (see jv_undo.py)
+PROFILE = False # Print stage timings & counters (see jv_profile.py)
+PROFILE_MEMORY = False # Also measure peak Python memory (slower, Python 3 only)
+PROFILE_REPORT = None # Optional: save the profile report to this .json/.csv file
+undo = None # jv_undo.UndoRecorder of the running script (set in main())
+profiler = jv_profile.NULL_PROFILER # jv_profile profiler of the running script (set in main())
+
+
+# Function - View the objects point memory (Point tag: one vector per point) as a (N,3) float64 array, None if not available
+def pointMemory(obj, count):
+    tag = obj.GetTag(c4d.Tpoint) # Hidden tag holding the points of Polygon & Spline objects
+    if tag is None:
+        return None
+    try:
+        points = np.frombuffer(tag.GetLowlevelDataAddressW(), dtype=np.float64) # c4d.Vector is 3 x 64bit float
+    except (AttributeError, TypeError, ValueError):
+        return None # Point memory not exposed by this Cinema 4D version
+    if points.size != count * 3 or not points.flags.writeable:
+        return None # Unexpected layout, use GetAllPoints/SetAllPoints instead
+    return points.reshape(count, 3)
+
+
+# Function - Run transform_chunk for every (start, stop) chunk, in a thread pool for large meshes
+def runChunks(transform_chunk, chunks, count):
+    if count > THREADED_POINT_COUNT and len(chunks) > 1:
+        pool = ThreadPool(min(len(chunks), multiprocessing.cpu_count())) # NumPy releases the GIL while multiplying
+        try:
+            pool.map(transform_chunk, chunks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for chunk in chunks:
+            transform_chunk(chunk)
+
+
+# Function - Rotation part of transform as a (3,3) array for row vectors
+def rotationArray(transform):
+    return np.array([[transform.v1.x, transform.v1.y, transform.v1.z],
+                     [transform.v2.x, transform.v2.y, transform.v2.z],
+                     [transform.v3.x, transform.v3.y, transform.v3.z]], dtype=np.float64) # p * transform = p.x * v1 + p.y * v2 + p.z * v3 + off
+
+
+# Function - Apply transform to the point memory of obj in place as batched matrix multiplies, False if the memory is not available
+def transformPointsNumpy(obj, transform):
+    count = obj.GetPointCount() # Number of points/vertex
+    points = pointMemory(obj, count)
+    if points is None:
+        return False
+    rotation = rotationArray(transform)
+    offset = np.array([transform.off.x, transform.off.y, transform.off.z], dtype=np.float64)
+    chunks = [(start, min(start + POINT_CHUNK_SIZE, count)) for start in range(0, count, POINT_CHUNK_SIZE)]
+
+    # Transform one chunk of the point memory, no c4d.Vector is created
+    def transformChunk(chunk):
+        start, stop = chunk
+        points[start:stop] = np.dot(points[start:stop], rotation) + offset
+    runChunks(transformChunk, chunks, count)
+    return True
+
+
+# Function - Apply transform to all points of obj
+def transformPoints(obj, transform):
+    if profiler.enabled:
+        profiler.count("points", obj.GetPointCount())
+    if np is None or not transformPointsNumpy(obj, transform): # Point memory in batches when NumPy can reach it
+        points = obj.GetAllPoints() # Find all points/vertex of the object
+        obj.SetAllPoints([p * transform for p in points]) # Apply new transform to the object points
+    obj.Message(c4d.MSG_UPDATE) # Refresh changes to object points
+
+
+# Function - View the spline tangent memory (Tangent tag: left & right vector per point) as a (N*2,3) float64 array, None if not available
+def tangentMemory(obj, count):
+    tag = obj.GetTag(c4d.Ttangent)
+    if tag is None:
+        return None
+    try:
+        tangents = np.frombuffer(tag.GetLowlevelDataAddressW(), dtype=np.float64) # Writable tangent memory of the spline
+    except (AttributeError, TypeError, ValueError):
+        return None # Tangent memory not exposed by this Cinema 4D version
+    if tangents.size != count * 6 or not tangents.flags.writeable:
+        return None # Unexpected layout, use GetTangent/SetTangent instead
+    return tangents.reshape(count * 2, 3)
+
+
+# Function - Apply the rotation of transform to all tangents of a spline (tangents are directions, no offset)
+def transformTangents(obj, transform):
+    count = obj.GetTangentCount() # Linear splines have no tangents
+    if count == 0:
+        return
+    tangents = tangentMemory(obj, count) if np is not None else None
+    if tangents is not None:
+        tangents[:] = np.dot(tangents, rotationArray(transform)) # All tangents in one multiply
+    else:
+        rotation = c4d.Matrix(c4d.Vector(0), transform.v1, transform.v2, transform.v3)
+        all_tangents = [obj.GetTangent(index) for index in range(count)] # Read all, then write all
+        for index, tangent in enumerate(all_tangents):
+            obj.SetTangent(index, tangent["vl"] * rotation, tangent["vr"] * rotation)
+
+
+# Function - Object gets the flipped axis (points rotated, matrix corrected): Polygon, Spline, Null & Instances of them
+def flipsAxis(obj, depth=0):
+    obj_type = obj.GetType()
+    if obj_type in FLIPPED_TYPES:
+        return True
+    if obj_type == c4d.Oinstance and depth < 16: # Instance of an instance... (cycles stop at 16)
+        link = obj[c4d.INSTANCEOBJECT_LINK]
+        return link is not None and flipsAxis(link, depth + 1) # The instance shows the flipped geometry of its link
+    return False
+
+
+# Function - X, Y & Z tracks of a vector parameter (None if not animated) and their DescIDs
+def vectorTracks(obj, parameter):
+    descids = [c4d.DescID(c4d.DescLevel(parameter, c4d.DTYPE_VECTOR, 0), c4d.DescLevel(component, c4d.DTYPE_REAL, 0))
+               for component in (c4d.VECTOR_X, c4d.VECTOR_Y, c4d.VECTOR_Z)]
+    return [obj.FindCTrack(descid) for descid in descids], descids
+
+
+# Function - Swap the Y & Z tracks of a vector parameter (whole tracks, no key is rewritten), negate_y: the old Y keys become -Z
+def swapTracks(obj, parameter, negate_y, counts):
+    (track_x, track_y, track_z), descids = vectorTracks(obj, parameter)
+    if track_y is None and track_z is None:
+        return
+    if track_y is not None:
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, track_y) # Undo for the track keys & parameter
+        if negate_y:
+            curve = track_y.GetCurve()
+            keys = [curve.GetKey(index) for index in range(curve.GetKeyCount())]
+            values = [(key.GetValue(), key.GetValueLeft(), key.GetValueRight()) for key in keys] # Read all, then write all
+            for key, (value, left, right) in zip(keys, values):
+                key.SetValue(curve, -value)
+                key.SetValueLeft(curve, -left)
+                key.SetValueRight(curve, -right)
+            counts["keys"] += len(keys)
+        track_y.SetDescriptionID(obj, descids[2]) # Old Y -> Z
+        counts["tracks"] += 1
+    if track_z is not None:
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, track_z)
+        track_z.SetDescriptionID(obj, descids[1]) # Old Z -> Y
+        counts["tracks"] += 1
+
+
+# Function - Rotation tracks: every key time gets H, P & B keys, rotation matrix = left * rotation * right
+def convertRotationTracks(obj, left, right, counts):
+    tracks, descids = vectorTracks(obj, c4d.ID_BASEOBJECT_REL_ROTATION)
+    if all(track is None for track in tracks):
+        return
+    static = obj.GetRelRot() # Components without a track keep this value
+    order = obj[c4d.ID_BASEOBJECT_ROTATION_ORDER]
+
+    # Read every key of the three tracks in one pass
+    times = {}
+    for track in tracks:
+        if track is not None:
+            curve = track.GetCurve()
+            for index in range(curve.GetKeyCount()):
+                time = curve.GetKey(index).GetTime()
+                times[round(time.Get(), 9)] = time
+    times = [times[seconds] for seconds in sorted(times)]
+    columns = []
+    for track, value in zip(tracks, (static.x, static.y, static.z)):
+        curve = track.GetCurve() if track is not None else None
+        columns.append([curve.GetValue(time) for time in times] if curve is not None else [value] * len(times))
+
+    # Transform the rotations, each component continues from the key before it (no 360 degree jumps)
+    rows = []
+    previous = None
+    for h, p, b in zip(*columns):
+        matrix = c4d.utils.HPBToMatrix(c4d.Vector(h, p, b), order)
+        if left is not None:
+            matrix = left * matrix
+        if right is not None:
+            matrix = matrix * right
+        hpb = c4d.utils.MatrixToHPB(matrix, order)
+        row = [hpb.x, hpb.y, hpb.z]
+        if previous is not None:
+            row = [value + TWO_PI * round((last - value) / TWO_PI) for value, last in zip(row, previous)]
+        rows.append(row)
+        previous = row
+
+    # Write all keys back, missing keys & tracks are added
+    for component, (track, descid) in enumerate(zip(tracks, descids)):
+        if track is None:
+            track = c4d.CTrack(obj, descid) # Component was static, it changes with the others now
+            obj.InsertTrackSorted(track)
+            undo.AddUndo(c4d.UNDOTYPE_NEW, track) # New undo
+        else:
+            undo.AddUndo(c4d.UNDOTYPE_CHANGE, track) # Undo for the track keys
+        curve = track.GetCurve()
+        keys = [curve.AddKey(time)["key"] for time in times] # Existing key or a new one at this time
+        for key, row in zip(keys, rows):
+            key.SetValue(curve, row[component])
+        counts["tracks"] += 1
+        counts["keys"] += len(keys)
+
+
+# Function - Convert the Position/Rotation/Scale tracks like the matrix: new local = (T if parent_rotated) * local * (inverse if flips)
+def flipTracks(obj, transform, inverse, parent_rotated, flips, counts):
+    if not obj.GetCTracks():
+        return
+    if parent_rotated:
+        swapTracks(obj, c4d.ID_BASEOBJECT_REL_POSITION, True, counts) # T * position = (x, z, -y)
+    if flips:
+        swapTracks(obj, c4d.ID_BASEOBJECT_REL_SCALE, False, counts) # T * scale * inverse swaps the Y & Z scale
+    if parent_rotated or flips:
+        convertRotationTracks(obj, transform if parent_rotated else None, inverse if flips else None, counts)
+
+
 # Function - Flip Y/Z axis
 def flipYZAxis(obj):
     original_pos = obj.GetMg() # Get objects global matrix
-    points = obj.GetAllPoints() # Find all points/vertex of the object
     transform = c4d.utils.MatrixRotX(math.pi * 1.5) # Rotate 90 degrees
     default_matrix = c4d.Matrix() # Default matrix
     
-    doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo for obj
+    undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo for obj
     obj.SetMg(default_matrix) # Move object to 0,0,0 default co-ordinates
-    obj.SetAllPoints([p * transform for p in points]) # Apply new transform to the object points (rotate 90 degrees)
-    obj.Message(c4d.MSG_UPDATE) # Refresh changes to object points
+    transformPoints(obj, transform) # Apply new transform to the object points (rotate 90 degrees)
     obj.SetMg(original_pos) # Move object back to where it was
 
 
+# Function - Flip Y/Z axis of every object in one top-down pass (no recursion, nothing is removed/re-inserted), one step per object
+def flipSteps(first_obj, counts, skip=0):
+    transform = c4d.utils.MatrixRotX(math.pi * 1.5) # Rotate 90 degrees (points)
+    inverse = ~transform # Matrix correction, new global matrix = old global matrix * inverse keeps points in place
+
+    identity = c4d.Matrix()
+    stack = [] # (object, old parent global matrix, new parent global matrix, parent flipped, parent rotated)
+    obj = first_obj
+    while obj is not None: # Top level objects
+        stack.append((obj, identity, identity, False, False))
+        obj = obj.GetNext()
+    stack.reverse() # Process in Object Manager order
+
+    while stack:
+        obj, old_parent_mg, new_parent_mg, parent_flipped, parent_rotated = stack.pop()
+        obj_type = obj.GetType()
+        flips = flipsAxis(obj)
+        resumed = skip > 0
+        if resumed: # Flipped by a cancelled run (objects come in the same order), only its matrices are needed
+            skip -= 1
+            new_mg = new_parent_mg * obj.GetMl()
+            old_mg = new_mg * transform if flips else new_mg # new global matrix = old global matrix * inverse
+            flipped = flips or parent_flipped
+        elif flips:
+            old_mg = old_parent_mg * obj.GetMl() # Global matrix before the flip (parent may already be flipped)
+            new_mg = old_mg * inverse
+            undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo for object points & matrix
+            if obj_type in (c4d.Opolygon, c4d.Ospline):
+                transformPoints(obj, transform) # Rotate points, with the new matrix they stay where they were
+            if obj_type == c4d.Ospline:
+                transformTangents(obj, transform) # Tangents turn with their points
+            flipTracks(obj, transform, inverse, parent_rotated, True, counts) # Animation follows the new matrix
+            obj.SetMl(~new_parent_mg * new_mg) # Local matrix under the flipped parent
+            counts[FLIPPED_NAMES.get(obj_type, "instance")] += 1
+            flipped = True
+        else:
+            old_mg = old_parent_mg * obj.GetMl()
+            new_mg = old_mg # Keep global position/rotation of objects without points to rotate
+            if parent_flipped:
+                undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo for object matrix
+                if parent_rotated:
+                    flipTracks(obj, transform, inverse, True, False, counts)
+                obj.SetMl(~new_parent_mg * new_mg) # Compensate the flipped parent
+            counts["other"] += 1
+            flipped = parent_flipped # Children keep their local matrix if nothing above them moved
+
+        child = obj.GetDownLast()
+        while child is not None: # Push last child first, children are processed in Object Manager order
+            stack.append((child, old_mg, new_mg, flipped, flips))
+            child = child.GetPred()
+        if not resumed:
+            yield obj
+
+
+# Function - Flip Y/Z axis of every object, in chunks with a scheduler (resumes after the objects of a cancelled run)
+def flipHierarchy(first_obj, scheduler=None, checkpoint=None):
+    counts = {"polygon": 0, "spline": 0, "null": 0, "instance": 0, "other": 0, "tracks": 0, "keys": 0}
+    total = sum(1 for obj in jv_scene.walkObjects(first_obj)) # Progress & checkpoint check
+    done = 0
+    if checkpoint is not None:
+        resume = checkpoint.load()
+        if resume and resume.get("objects") == total:
+            done = resume["flipped"]
+            print("Resuming a cancelled flip after %d of %d objects (%s)" % (done, total, checkpoint.path))
+    try:
+        jv_scheduler.runSteps(scheduler, "flip objects", flipSteps(first_obj, counts, done), total, done)
+    except jv_scheduler.Cancelled as cancelled:
+        if checkpoint is not None:
+            checkpoint.save({"flipped": cancelled.completed, "objects": total}) # Objects are either flipped or untouched
+        raise
+    if checkpoint is not None:
+        checkpoint.clear() # Finished, nothing to resume
+    return counts
+
+
 # Function - Flip Y/Z axis for Null Parent
 def resetNullAxis(null_parent):
     orig_null_parent_matrix = null_parent.GetMg() # Copy current matrix for parent_null to new variable
@@ -43,12 +362,12 @@ def resetNullAxis(null_parent):
                 obj.SetMg(orig_null_parent_matrix * parent_matrix) # Move null back to where it was
             else:
                 # If child is Polygon object
-                doc.AddUndo(c4d.UNDOTYPE_DELETE, obj) # Undo
+                undo.AddUndo(c4d.UNDOTYPE_DELETE, obj) # Undo
                 GeListNode.Remove(obj) # Remove objects from null_parent
                 flipYZAxis(obj) # run Function to flip axis z/y of object
                 doc.InsertObject(obj) # Add objects back into the document without parent
-                doc.AddUndo(c4d.UNDOTYPE_NEW, obj) # Undo
-                doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo
+                undo.AddUndo(c4d.UNDOTYPE_NEW, obj) # Undo
+                undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo
                 obj.InsertUnder(null_parent) # Add object back to parent_null
                 obj.SetMg(orig_null_parent_matrix * obj.GetMg()) # Set matrix of object to matrix of parent_null
 
@@ -58,47 +377,78 @@ def resetNullAxis(null_parent):
         old_rotation = obj.GetRelRot() # Find rotation from original HPB
         new_rotation = c4d.Vector(-(old_rotation[2]),0,0) # Copy/invert B to H (flip from z axis to y)
 
-        doc.AddUndo(c4d.UNDOTYPE_DELETE, obj) # Undo
+        undo.AddUndo(c4d.UNDOTYPE_DELETE, obj) # Undo
         GeListNode.Remove(obj) # Remove objects from null_parent
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, null_parent) # Undo
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, null_parent) # Undo
         null_parent.SetRelRot(c4d.Vector(0,0,0)) # Reset rotation for null
 
         original_offset.off = obj.GetMg().off - orig_null_parent_matrix.off # Reset offset position to where it was before removing from parent_null
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo
         obj.SetMg(original_offset) # Assign offset position to object
         obj.SetRelRot(new_rotation) # Apply new rotation from local rotation
 
         doc.InsertObject(obj) # Insert object back into document
-        doc.AddUndo(c4d.UNDOTYPE_NEW, obj) # Undo
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo
+        undo.AddUndo(c4d.UNDOTYPE_NEW, obj) # Undo
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo
         obj.InsertUnder(null_parent) # Add object back to parent_null
         obj.SetRelRot(new_rotation) # Apply new rotation from local
 
 
 def main():
+    global undo, profiler
+    profiler = jv_profile.createProfiler("JV_FlipYZAxis", PROFILE, PROFILE_MEMORY) # NULL_PROFILER unless PROFILE is set
     doc = c4d.documents.GetActiveDocument() # Get active C4D document
-    doc.StartUndo() # Start recording undos
-    all_objs = doc.GetObjects() # Get all scene objects
+    undo = jv_undo.UndoRecorder(doc, UNDO_MODE, profiler) # AddUndo calls go through the selected undo strategy
+    undo.StartUndo() # Start recording undos
 
-    # Flip Y/Z axis for objects without Parents/Null
-    try:
-        for obj in all_objs:
-            if obj.GetType() == 5100: # If the object is a PolygonObject
-                old_rotation = obj.GetRelRot() # Find rotation from original HPB
-                new_rotation = c4d.Vector(-(old_rotation[2]),0,0) # Copy/invert B to H (flip from z axis to y)
-                flipYZAxis(obj)
-                doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo for object changes
-                obj.SetRelRot(new_rotation) # Apply new rotation from local rotation
+    # Flip Y/Z axis of all objects without removing them from their parents
+    if FLIP_MODE == "matrix":
+        scheduler = jv_scheduler.Scheduler("JV_FlipYZAxis", profiler=profiler) if CHUNKED else None
+        checkpoint = jv_scheduler.Checkpoint(doc, "JV_FlipYZAxis") if CHUNKED else None
+        try:
+            with profiler.stage("flip hierarchy"):
+                counts = flipHierarchy(doc.GetFirstObject(), scheduler, checkpoint) # Whole hierarchy in one pass
+        except jv_scheduler.Cancelled as cancelled:
+            print("Cancelled: %s - run the script again to resume" % cancelled)
+            scheduler.finish() # Clear the status bar
+            undo.EndUndo() # Stop recording undos
+            profiler.finish(PROFILE_REPORT)
+            c4d.EventAdd() # Refresh Cinema 4D
+            return
+        if scheduler is not None:
+            scheduler.finish()
+        for name, value in counts.items():
+            profiler.count("animation %s" % name if name in ("tracks", "keys") else "%s objects" % name, value)
+        print("Flipped %d Polygon objects, %d Splines, %d Nulls, %d Instances, kept %d other objects in place" % (
+            counts["polygon"], counts["spline"], counts["null"], counts["instance"], counts["other"]))
+        if counts["tracks"]:
+            print("Converted %d Position/Rotation/Scale tracks (%d keys rewritten)" % (counts["tracks"], counts["keys"]))
+    # Original flip: re-insert children of top level Nulls
+    else:
+        all_objs = doc.GetObjects() # Get all scene objects
+
+        # Flip Y/Z axis for objects without Parents/Null
+        try:
+            for obj in all_objs:
+                if obj.GetType() == 5100: # If the object is a PolygonObject
+                    old_rotation = obj.GetRelRot() # Find rotation from original HPB
+                    new_rotation = c4d.Vector(-(old_rotation[2]),0,0) # Copy/invert B to H (flip from z axis to y)
+                    flipYZAxis(obj)
+                    undo.AddUndo(c4d.UNDOTYPE_CHANGE, obj) # Undo for object changes
+                    obj.SetRelRot(new_rotation) # Apply new rotation from local rotation
     
-            # Flip Y/Z axis for objects with Parents/Null
-            if obj.GetType() == 5140: # If item in null/parent object
-                resetNullAxis(obj)
-            else:
-                pass # Skip if object is not Polygon or Null
-    except:
-        pass # Skip if there is an error
+                # Flip Y/Z axis for objects with Parents/Null
+                if obj.GetType() == 5140: # If item in null/parent object
+                    resetNullAxis(obj)
+                else:
+                    pass # Skip if object is not Polygon or Null
+        except:
+            pass # Skip if there is an error
 
-    doc.EndUndo() # Stop recording undos
+    undo.EndUndo() # Stop recording undos
+    print(undo.report()) # Undo entries recorded by UNDO_MODE
+    profiler.count("undo entries", undo.recorded)
+    profiler.finish(PROFILE_REPORT) # Print the summary, save the report
     c4d.EventAdd() # Refresh Cinema 4D
 
 
@@ -0,0 +1,216 @@
+"""
+jv_batch
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3 outside Cinema 4D)
+Description-US: Run one of the JV_ scripts over many scene files, one document per worker process.
+
+                Targets:
+                - vray         JV_FBXMaterialsToVray
+                - corona       JV_FBXMaterialsToCorona
+                - physical     JV_FBXMaterialsToPhysical
+                - flip         JV_FlipYZAxis
+                - subdivision  JV_AddSubdivisionAllObjects
+
+                Command line (Cinema 4D's headless Python):
+                    c4dpy jv_batch.py vray ./scenes -o ./converted --workers 8
+
+                Converted scenes are saved as <output>/<scene>_<target>.c4d and every scene gets a result record
+                (status, error, seconds, object/material counts) in <output>/batch_results.jsonl.
+
+                --undo-mode sets UNDO_MODE of the script (default none: a headless conversion is never undone).
+                --profile turns on PROFILE of the script (jv_profile.py) and saves <output>/<scene>_<target>_profile.json,
+                the result record gets the stage timings and counters.
+
+                --backend selects the module used as 'c4d'. The default is Cinema 4D itself, use
+                --backend jv_fakec4d to run on machines without Cinema 4D (scenes written by jv_fakec4d only).
+"""
+
+# Libraries
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import importlib
+import traceback
+import multiprocessing
+
+
+TARGETS = {
+    "vray": "JV_FBXMaterialsToVray",
+    "corona": "JV_FBXMaterialsToCorona",
+    "physical": "JV_FBXMaterialsToPhysical",
+    "flip": "JV_FlipYZAxis",
+    "subdivision": "JV_AddSubdivisionAllObjects",
+}
+SCENE_EXTENSIONS = (".c4d", ".fbx")
+RESULTS_NAME = "batch_results.jsonl"
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__)) # JV_ scripts live next to this file
+UNDO_MODES = ("all", "modified", "snapshot", "none") # jv_undo.UNDO_MODES (jv_undo needs c4d, the backend is loaded in the workers)
+SCRIPT_DEFAULTS = {} # Script module -> its settings (upper case globals) when it was imported, restored before every job
+
+
+# Function - Collect scene files from files and folders
+def collectScenes(inputs, recursive=False):
+    scenes = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                scenes.extend(os.path.join(folder, name) for name in sorted(files) if name.lower().endswith(SCENE_EXTENSIONS))
+                if not recursive:
+                    break
+                subfolders.sort()
+        else:
+            scenes.append(path)
+    return scenes
+
+
+# Function - Import the document backend and make it available as 'c4d'
+def loadBackend(backend):
+    if SCRIPT_FOLDER not in sys.path:
+        sys.path.insert(0, SCRIPT_FOLDER)
+    if backend != "c4d":
+        importlib.import_module(backend).install() # Stand-in registers itself as 'c4d'
+    import c4d
+    return c4d
+
+
+# Function - Count every object in a document
+def countObjects(doc):
+    import jv_scene # Needs the backend loaded as 'c4d'
+    return sum(1 for obj in jv_scene.walkObjects(doc.GetFirstObject()))
+
+
+# Function - Output path of a converted scene
+def outputPath(source, target, output_folder):
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(output_folder, "%s_%s.c4d" % (name, target))
+
+
+# Function - Restore the settings a script had when it was imported (a worker runs many jobs on the same module)
+def resetScript(script):
+    if script.__name__ not in SCRIPT_DEFAULTS:
+        SCRIPT_DEFAULTS[script.__name__] = copy.deepcopy(dict((name, value) for name, value in vars(script).items() if name.isupper()))
+    for name, value in SCRIPT_DEFAULTS[script.__name__].items():
+        setattr(script, name, copy.deepcopy(value)) # DRY_RUN, PLAN_PATH... of the previous job do not leak into this one
+
+
+# Function - Convert one scene (runs inside a worker process)
+def convertScene(job):
+    source, target, output_folder, backend, undo_mode, profile, dry_run = job
+    record = {"source": source, "target": target, "output": None, "status": "error", "error": None, "worker": os.getpid()}
+    start = time.time()
+    doc = None
+    try:
+        c4d = loadBackend(backend)
+        script = importlib.import_module(TARGETS[target])
+        resetScript(script)
+
+        doc = c4d.documents.LoadDocument(source, c4d.SCENEFILTER_OBJECTS | c4d.SCENEFILTER_MATERIALS, None)
+        if doc is None:
+            raise IOError("Cannot load scene %s" % source)
+        c4d.documents.InsertBaseDocument(doc)
+        c4d.documents.SetActiveDocument(doc) # Scripts and CallCommand work on the active document
+        script.doc = doc # Scripts use the global 'doc' the Script Manager defines
+        script.UNDO_MODE = undo_mode
+        script.PROFILE = profile
+        script.PROFILE_REPORT = os.path.splitext(outputPath(source, target, output_folder))[0] + "_profile.json" if profile else None
+        if dry_run:
+            if not hasattr(script, "DRY_RUN"):
+                raise ValueError("%s has no dry run" % target)
+            script.DRY_RUN = True
+            script.PLAN_PATH = os.path.splitext(outputPath(source, target, output_folder))[0] + "_plan.json"
+        record["objects_before"] = countObjects(doc)
+        record["materials_before"] = len(doc.GetMaterials())
+
+        script.main()
+        record["undo_entries"] = script.undo.recorded
+        if profile:
+            report = script.profiler.report()
+            record["profile"] = {"report": script.PROFILE_REPORT, "counts": report["counts"],
+                                 "stages": dict((stage["name"], round(stage["seconds"], 4)) for stage in report["stages"])}
+
+        if dry_run: # Plan only, the scene is not saved
+            record["plan"] = script.PLAN_PATH
+        else:
+            output = outputPath(source, target, output_folder)
+            if not c4d.documents.SaveDocument(doc, output, c4d.SAVEDOCUMENTFLAGS_DONTADDTORECENTLIST, c4d.FORMAT_C4DEXPORT):
+                raise IOError("Cannot save scene %s" % output)
+            record["objects"] = countObjects(doc)
+            record["materials"] = len(doc.GetMaterials())
+            record["output"] = output
+        record["status"] = "ok"
+    except Exception as error:
+        record["error"] = "%s: %s" % (type(error).__name__, error)
+        record["traceback"] = traceback.format_exc()
+    finally:
+        if doc is not None:
+            import jv_scene # Needs the backend loaded as 'c4d'
+            script.doc = None
+            jv_scene.clearSceneIndex() # The cached index holds the objects of the killed document
+            c4d.documents.KillDocument(doc) # Free the document before the worker takes the next job, failed jobs too
+    record["seconds"] = round(time.time() - start, 3)
+    return record
+
+
+# Function - Convert scenes on a pool of worker processes, yield result records as they finish
+def runBatch(scenes, target, output_folder, backend="c4d", workers=None, tasks_per_worker=None, undo_mode="none", profile=False, dry_run=False):
+    jobs = [(os.path.abspath(scene), target, os.path.abspath(output_folder), backend, undo_mode, profile, dry_run) for scene in scenes]
+    if workers == 1:
+        for job in jobs:
+            yield convertScene(job) # In process, easier to debug
+        return
+
+    pool = multiprocessing.Pool(processes=workers, maxtasksperchild=tasks_per_worker)
+    try:
+        for record in pool.imap_unordered(convertScene, jobs):
+            yield record
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+# Main function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JV_ script over many scenes using all cores.")
+    parser.add_argument("target", choices=sorted(TARGETS), help="Conversion to run")
+    parser.add_argument("inputs", nargs="+", help="Scene files and/or folders (.c4d, .fbx)")
+    parser.add_argument("-o", "--output", required=True, help="Folder for converted scenes and batch_results.jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: number of cores)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search input folders recursively")
+    parser.add_argument("--backend", default="c4d", help="Module used as 'c4d' (default: c4d, use jv_fakec4d without Cinema 4D)")
+    parser.add_argument("--tasks-per-worker", type=int, default=None, help="Restart workers after this many scenes")
+    parser.add_argument("--undo-mode", default="none", choices=UNDO_MODES, help="Undo strategy of the script (default: none)")
+    parser.add_argument("--profile", action="store_true", help="Save a stage timing report per scene (jv_profile)")
+    parser.add_argument("--dry-run", action="store_true", help="Save the conversion plan per scene (jv_plan), scenes are not converted")
+    args = parser.parse_args(argv)
+
+    scenes = collectScenes(args.inputs, args.recursive)
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+
+    failed = 0
+    start = time.time()
+    with open(os.path.join(args.output, RESULTS_NAME), "a") as results:
+        for index, record in enumerate(runBatch(scenes, args.target, args.output, args.backend, args.workers, args.tasks_per_worker, args.undo_mode, args.profile, args.dry_run)):
+            results.write(json.dumps(record, sort_keys=True) + "\n")
+            results.flush()
+            if record["status"] != "ok":
+                failed += 1
+            print("[%d/%d] %s %s (%.2fs)%s" % (index + 1, len(scenes), record["status"], record["source"], record["seconds"],
+                                              " - " + record["error"] if record["error"] else ""))
+
+    print("%d scenes, %d failed, %.1fs" % (len(scenes), failed, time.time() - start))
+    return 1 if failed else 0
+
+
+# Execute main()
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+jv_benchmark
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3 outside Cinema 4D)
+Description-US: Scaling benchmark of the JV_ scripts on synthetic scenes, runs without Cinema 4D (jv_fakec4d).
+
+                Command line:
+                    python jv_benchmark.py                                # all scripts at 1k/10k/100k objects
+                    python jv_benchmark.py --targets vray flip --scales 1000 10000 --json bench.json
+
+                For every script and scale it reports:
+                - wall time of main()
+                - peak Python memory during main() (tracemalloc, Python 3 only)
+                - undo entries and c4d API calls (total and the busiest calls)
+                --undo-modes runs every script once per undo strategy (jv_undo) to compare the undo entries they record.
+
+                generateScene() builds the synthetic scene: object/material/texture tag/vertex counts and hierarchy
+                depth and the share of duplicated meshes are parameters, the layout mimics an FBX import (Standard materials, rotated Polygon objects in Nulls).
+"""
+
+# Libraries
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import importlib
+
+try:
+    import tracemalloc # Python 3.4+
+except ImportError:
+    tracemalloc = None
+
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_FOLDER not in sys.path:
+    sys.path.insert(0, SCRIPT_FOLDER)
+
+import jv_fakec4d
+import jv_batch
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+TOP_CALLS = 5 # Busiest API calls listed per run
+
+
+# Function - Add a bitmap shader for path to material and link it to parameter_id
+def addBitmap(c4d, material, parameter_id, path):
+    shader = c4d.BaseList2D(c4d.Xbitmap)
+    shader[c4d.BITMAPSHADER_FILENAME] = path
+    material.InsertShader(shader)
+    material[parameter_id] = shader
+
+
+# Function - Standard material laid out like the FBX importer creates it
+def generateMaterial(c4d, index, rng):
+    material = c4d.BaseMaterial(c4d.Mmaterial)
+    material.SetName("Material_%d" % index)
+    material[c4d.MATERIAL_COLOR_COLOR] = c4d.Vector(rng.random(), rng.random(), rng.random())
+    addBitmap(c4d, material, c4d.MATERIAL_COLOR_SHADER, "textures/mat%d_diffuse.png" % index)
+    if rng.random() < 0.5:
+        material[c4d.MATERIAL_USE_BUMP] = True
+        addBitmap(c4d, material, c4d.MATERIAL_BUMP_SHADER, "textures/mat%d_normal.png" % index)
+    if rng.random() < 0.2:
+        material[c4d.MATERIAL_USE_ALPHA] = True
+        addBitmap(c4d, material, c4d.MATERIAL_ALPHA_SHADER, "textures/mat%d_opacity.png" % index)
+    material[c4d.MATERIAL_USE_TRANSPARENCY] = rng.random() < 0.1 # Glass
+
+    if rng.random() < 0.3: # Metal: 'Reflection' layer (index 1) below 'Specular' (index 0)
+        reflection_layer = material.GetReflectionLayerIndex(0)
+        reflection_layer.SetName("Reflection")
+        addBitmap(c4d, material, reflection_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE, "textures/mat%d_metal.png" % index)
+        specular_layer = material.AddReflectionLayer()
+    else:
+        specular_layer = material.GetReflectionLayerIndex(0)
+    specular_layer.SetName("Specular")
+    addBitmap(c4d, material, specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS, "textures/mat%d_roughness.png" % index)
+    return material
+
+
+# Function - Polygon object with vertices points (quads), rotated like a 3ds Max FBX import
+def generateMesh(c4d, index, vertices, rng):
+    polygon_count = max(1, vertices // 4)
+    mesh = c4d.PolygonObject(vertices, polygon_count)
+    mesh.SetName("Mesh_%d" % index)
+    mesh.SetAllPoints([c4d.Vector(rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-50, 50)) for i in range(vertices)])
+    for i in range(polygon_count):
+        a = (i * 4) % vertices
+        mesh.SetPolygon(i, c4d.CPolygon(a, (a + 1) % vertices, (a + 2) % vertices, (a + 3) % vertices))
+    mesh.SetRelPos(c4d.Vector(rng.uniform(-1000, 1000), rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)))
+    mesh.SetRelRot(c4d.Vector(0, -math.pi / 2, rng.uniform(-math.pi, math.pi))) # Z-up import: P -90
+    return mesh
+
+
+# Function - Build a synthetic document
+def generateScene(c4d, objects=1000, materials=100, tags=1, vertices=8, depth=3, null_ratio=0.1, seed=1, duplicates=0.0):
+    rng = random.Random(seed)
+    meshes = [] # Polygon objects that later objects can copy (duplicates: furniture libraries with repeated meshes)
+    doc = c4d.documents.BaseDocument()
+
+    scene_materials = [generateMaterial(c4d, i, rng) for i in range(max(1, materials))]
+    for material in reversed(scene_materials):
+        doc.InsertMaterial(material)
+
+    groups = [[] for level in range(max(1, depth))] # Nulls by hierarchy level
+    last_root = None
+    for index in range(objects):
+        if depth > 1 and (index == 0 or rng.random() < null_ratio):
+            obj = c4d.BaseObject(c4d.Onull)
+            obj.SetName("Group_%d" % index)
+            obj.SetRelPos(c4d.Vector(rng.uniform(-100, 100), 0, rng.uniform(-100, 100)))
+            obj.SetRelRot(c4d.Vector(0, -math.pi / 2, 0))
+            level = rng.randrange(depth - 1) if any(groups[:depth - 1]) else 0
+        elif duplicates and meshes and rng.random() < duplicates:
+            obj = rng.choice(meshes).GetClone() # Same points, polygons & materials, other position
+            obj.SetName("Mesh_%d" % index)
+            obj.SetRelPos(c4d.Vector(rng.uniform(-1000, 1000), rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)))
+            level = rng.randrange(depth)
+        else:
+            obj = generateMesh(c4d, index, vertices, rng)
+            for i in range(tags):
+                obj.MakeTag(c4d.Ttexture).SetMaterial(rng.choice(scene_materials))
+            if duplicates:
+                meshes.append(obj)
+            level = rng.randrange(depth)
+
+        parents = groups[level - 1] if level > 0 else None
+        if parents:
+            obj.InsertUnderLast(rng.choice(parents))
+        else:
+            level = 0
+            if last_root is None:
+                doc.InsertObject(obj)
+            else:
+                obj.InsertAfter(last_root) # Keep file order, InsertObject adds at the top
+            last_root = obj
+        if obj.GetType() == c4d.Onull and level < len(groups):
+            groups[level].append(obj)
+    return doc
+
+
+# Function - Run one script's main() on doc and measure it
+def benchmarkScript(c4d, target, doc, undo_mode="modified"):
+    script = importlib.import_module(jv_batch.TARGETS[target])
+    script.UNDO_MODE = undo_mode
+    c4d.documents.InsertBaseDocument(doc)
+    c4d.documents.SetActiveDocument(doc)
+    script.doc = doc
+
+    jv_fakec4d.resetCallCounts()
+    jv_fakec4d.countCalls(True)
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start = time.time()
+    try:
+        script.main()
+        seconds = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc is not None else None
+    finally:
+        if tracemalloc is not None:
+            tracemalloc.stop()
+        jv_fakec4d.countCalls(False)
+        c4d.documents.KillDocument(doc)
+
+    calls = dict(jv_fakec4d.CALL_COUNTS)
+    busiest = sorted(calls.items(), key=lambda item: (-item[1], item[0]))[:TOP_CALLS]
+    return {"target": target, "undo_mode": undo_mode, "seconds": round(seconds, 4), "peak_memory": peak, "undo_entries": len(doc.undo_log),
+            "api_calls": sum(calls.values()), "busiest_calls": busiest, "calls": calls}
+
+
+# Function - Format bytes for the console
+def formatBytes(value):
+    if value is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return "%.1f%s" % (value, unit)
+        value /= 1024.0
+
+
+# Main function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the JV_ scripts on synthetic scenes.")
+    parser.add_argument("--targets", nargs="+", choices=sorted(jv_batch.TARGETS), default=sorted(jv_batch.TARGETS))
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES), help="Object counts")
+    parser.add_argument("--materials-ratio", type=float, default=0.1, help="Materials per object (default 0.1)")
+    parser.add_argument("--tags", type=int, default=1, help="Texture tags per Polygon object")
+    parser.add_argument("--vertices", type=int, default=8, help="Points per Polygon object")
+    parser.add_argument("--depth", type=int, default=3, help="Hierarchy depth")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="Share of Polygon objects copied from earlier ones (default 0)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--undo-modes", nargs="+", choices=jv_batch.UNDO_MODES, default=["modified"], help="Undo strategies to compare")
+    parser.add_argument("--json", help="Write all results (including full call counts) to this file")
+    args = parser.parse_args(argv)
+
+    c4d = jv_fakec4d.install()
+    results = []
+    print("%-12s %-9s %8s %10s %10s %8s %10s  %s" % ("script", "undo", "objects", "seconds", "peak mem", "undos", "api calls", "busiest calls"))
+    for scale in args.scales:
+        for target in args.targets:
+            for undo_mode in args.undo_modes:
+                doc = generateScene(c4d, objects=scale, materials=max(1, int(scale * args.materials_ratio)), tags=args.tags,
+                                    vertices=args.vertices, depth=args.depth, seed=args.seed, duplicates=args.duplicates)
+                result = benchmarkScript(c4d, target, doc, undo_mode)
+                result["objects"] = scale
+                results.append(result)
+                print("%-12s %-9s %8d %10.3f %10s %8d %10d  %s" % (target, undo_mode, scale, result["seconds"], formatBytes(result["peak_memory"]),
+                                                                 result["undo_entries"], result["api_calls"],
+                                                                 ", ".join("%s=%d" % call for call in result["busiest_calls"])))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+# Execute main()
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,1729 @@
+"""
+jv_fakec4d
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Python version 2.7.18 / 3
+Description-US: In-memory stand-in for the parts of the Cinema 4D 'c4d' module used by the JV_ scripts.
+                Lets the scripts and jv_batch.py run on machines without Cinema 4D (Linux build/test boxes).
+
+                install() registers this module as 'c4d' (plus c4d.documents, c4d.utils, c4d.gui, c4d.plugins)
+                so 'import c4d' inside the scripts picks it up.
+
+                Like the c4d module, every call returning a node returns a new Python object (newWrappers): two results
+                for the same node are == with the same hash, but 'is' and id() differ. Scripts keying nodes by id() or
+                comparing them with 'is' fail here as they do in Cinema 4D.
+
+                Documents are saved/loaded with pickle, .c4d files written here can only be read by this module.
+                Parameter IDs of plugins (V-Ray, Corona) are placeholders, only their uniqueness matters.
+"""
+
+# Libraries
+import os
+import sys
+import copy
+import math
+import itertools
+import types
+import pickle
+import threading
+
+
+# Object/Tag/Material/Shader types (Cinema 4D IDs)
+Opolygon = 5100
+Ospline = 5101
+Oinstance = 5126
+Onull = 5140
+Olayer = 100004801
+Ocube = 5159
+Osds = 1007455
+Tpoint = 5600
+Tpolygon = 5604
+Ttexture = 5616
+Ttangent = 5617
+Mmaterial = 5703
+Xbitmap = 5833
+Tbasetake = 431000055
+Tbaseoverride = 431000056
+PLUGINTYPE_PREFS = 4
+
+UNDOTYPE_CHANGE = 40
+UNDOTYPE_CHANGE_SMALL = 41
+UNDOTYPE_NEW = 44
+UNDOTYPE_DELETE = 45
+UNDOTYPE_BITS = 47
+
+MSG_UPDATE = 14
+SCENEFILTER_NONE = 0
+SCENEFILTER_OBJECTS = 1
+SCENEFILTER_MATERIALS = 2
+SCENEFILTER_MERGESCENE = 16
+SAVEDOCUMENTFLAGS_NONE = 0
+SAVEDOCUMENTFLAGS_DONTADDTORECENTLIST = 2
+FORMAT_C4DEXPORT = 1001026
+COPYFLAGS_NONE = 0
+DIRTYFLAGS_NONE = 0
+DIRTYFLAGS_MATRIX = 1
+DIRTYFLAGS_DATA = 2
+DIRTYFLAGS_CHILDREN = 32
+DIRTYFLAGS_ALL = -1
+NOTOK = -1
+MODE_ON = 0
+MODE_OFF = 1
+MODE_UNDEF = 2
+ID_BASELIST_NAME = 900
+INSTANCEOBJECT_RENDERINSTANCE_MODE_SINGLEINSTANCE = 1
+DTYPE_FILENAME = 131
+BFM_INPUT_KEYBOARD = 1801812322
+BFM_INPUT_VALUE = 1000
+KEY_ESC = 27
+DTYPE_REAL = 19
+DTYPE_VECTOR = 23
+VECTOR_X = 1000
+VECTOR_Y = 1001
+VECTOR_Z = 1002
+ID_BASEOBJECT_REL_POSITION = 903
+ID_BASEOBJECT_REL_ROTATION = 904
+ID_BASEOBJECT_REL_SCALE = 905
+ID_BASEOBJECT_ROTATION_ORDER = 1041766
+
+# Parameter IDs, values only need to be unique
+PARAMETERS = (
+    "BITMAPSHADER_FILENAME", "BITMAPSHADER_COLORPROFILE",
+    "MATERIAL_COLOR_COLOR", "MATERIAL_COLOR_SHADER", "MATERIAL_USE_COLOR",
+    "MATERIAL_USE_TRANSPARENCY", "MATERIAL_TRANSPARENCY_BRIGHTNESS", "MATERIAL_TRANSPARENCY_REFRACTION_PRESET",
+    "MATERIAL_TRANSPARENCY_REFRACTION", "MATERIAL_TRANSPARENCY_COLOR",
+    "MATERIAL_USE_BUMP", "MATERIAL_BUMP_SHADER", "MATERIAL_USE_NORMAL", "MATERIAL_NORMAL_SHADER",
+    "MATERIAL_USE_ALPHA", "MATERIAL_ALPHA_SHADER", "MATERIAL_USE_REFLECTION", "MATERIAL_PREVIEWSIZE",
+    "RDATA_RENDERENGINE", "SDSOBJECT_SUBDIVIDE_UV", "SDSOBJECT_SUBEDITOR_CM", "SDSOBJECT_SUBRAY_CM",
+    "INSTANCEOBJECT_LINK", "INSTANCEOBJECT_RENDERINSTANCE_MODE",
+    "BRDFVRAYMTL_OPTION_USE_ROUGHNESS", "BRDFVRAYMTL_REFLECT_VALUE", "BRDFVRAYMTL_DIFFUSE_VALUE",
+    "BRDFVRAYMTL_DIFFUSE_TEXTURE", "BRDFVRAYMTL_REFRACT_VALUE", "BRDFVRAYMTL_REFRACT_IOR_VALUE",
+    "BRDFVRAYMTL_REFLECT_GLOSSINESS_VALUE", "BRDFVRAYMTL_REFLECT_GLOSSINESS_TEXTURE", "BRDFVRAYMTL_BUMP_MAP",
+    "BRDFVRAYMTL_OPACITY_COLOR_TEXTURE", "BRDFVRAYMTL_METALNESS_TEXTURE", "BRDFVRAYMTL_METALNESS_VALUE",
+    "TEXNORMALBUMP_BUMP_TEX_COLOR", "TEXNORMALBUMP_MAP_TYPE",
+    "VRAY_PREFS_MATERIAL_PREVIEW_ENABLE", "VRAY_PREFS_VIEWPORT_PREVIEW_SIZE",
+    "CORONA_PHYSICAL_MATERIAL_BASE_COLOR", "CORONA_PHYSICAL_MATERIAL_BASE_COLOR_TEXTURE", "CORONA_MATERIAL_PREVIEWSIZE",
+    "CORONA_PHYSICAL_MATERIAL_REFRACT", "CORONA_PHYSICAL_MATERIAL_BASE_IOR_VALUE",
+    "CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_VALUE", "CORONA_PHYSICAL_MATERIAL_BASE_ROUGHNESS_TEXTURE",
+    "CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_TEXTURE", "CORONA_PHYSICAL_MATERIAL_BASE_BUMPMAPPING_ENABLE",
+    "CORONA_NORMALMAP_TEXTURE", "CORONA_PHYSICAL_MATERIAL_ALPHA", "CORONA_PHYSICAL_MATERIAL_ALPHA_TEXTURE",
+    "CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_VALUE", "CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_TEXTURE",
+)
+for index, name in enumerate(PARAMETERS):
+    globals()[name] = 900000 + index
+
+# Reflectance layer parameters are offsets added to ReflectionLayer.GetDataID()
+REFLECTION_LAYERS = (
+    "REFLECTION_LAYER_MAIN_DISTRIBUTION", "REFLECTION_LAYER_MAIN_ADDITIVE", "REFLECTION_LAYER_MAIN_VALUE_REFLECTION",
+    "REFLECTION_LAYER_MAIN_VALUE_ROUGHNESS", "REFLECTION_LAYER_MAIN_VALUE_SPECULAR", "REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS",
+    "REFLECTION_LAYER_COLOR_COLOR", "REFLECTION_LAYER_COLOR_TEXTURE", "REFLECTION_LAYER_TRANS_TEXTURE",
+    "REFLECTION_LAYER_FRESNEL_MODE", "REFLECTION_LAYER_FRESNEL_VALUE_IOR", "REFLECTION_LAYER_FRESNEL_VALUE_ETA",
+)
+for index, name in enumerate(REFLECTION_LAYERS):
+    globals()[name] = index + 1
+REFLECTION_LAYER_DATA = 10000 # First layer data ID
+REFLECTION_LAYER_SIZE = 512 # Data IDs per layer
+
+SHADER_TYPES = set([Xbitmap, 1035405, 1057881]) # Bitmap, Corona Normal, V-Ray Normal
+
+
+# Class - 3D vector
+class Vector(object):
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0.0, y=None, z=None):
+        if isinstance(x, Vector):
+            x, y, z = x.x, x.y, x.z
+        elif y is None:
+            y = z = x # Vector(v) sets all components
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __setitem__(self, index, value):
+        setattr(self, ("x", "y", "z")[index], float(value))
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __neg__(self):
+        return Vector(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, Matrix):
+            return other * self
+        if isinstance(other, Vector):
+            return self.x * other.x + self.y * other.y + self.z * other.z # Dot product
+        return Vector(self.x * other, self.y * other, self.z * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return Vector(self.x / other, self.y / other, self.z / other)
+
+    __div__ = __truediv__
+
+    def __mod__(self, other):
+        return Vector(self.y * other.z - self.z * other.y, self.z * other.x - self.x * other.z, self.x * other.y - self.y * other.x) # Cross product
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and self.x == other.x and self.y == other.y and self.z == other.z
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __getstate__(self):
+        return (self.x, self.y, self.z)
+
+    def __setstate__(self, state):
+        self.x, self.y, self.z = state
+
+    def __repr__(self):
+        return "Vector(%g, %g, %g)" % (self.x, self.y, self.z)
+
+    def GetLength(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def GetNormalized(self):
+        length = self.GetLength()
+        return self / length if length else Vector(self)
+
+    def Dot(self, other):
+        return self * other
+
+    def Cross(self, other):
+        return self % other
+
+
+# Class - 3x4 matrix: off + x * v1 + y * v2 + z * v3
+class Matrix(object):
+    __slots__ = ("off", "v1", "v2", "v3")
+
+    def __init__(self, off=None, v1=None, v2=None, v3=None):
+        self.off = Vector(off) if off is not None else Vector(0, 0, 0)
+        self.v1 = Vector(v1) if v1 is not None else Vector(1, 0, 0)
+        self.v2 = Vector(v2) if v2 is not None else Vector(0, 1, 0)
+        self.v3 = Vector(v3) if v3 is not None else Vector(0, 0, 1)
+
+    def __mul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self * other.off, self.MulV(other.v1), self.MulV(other.v2), self.MulV(other.v3))
+        if isinstance(other, Vector):
+            return self.off + self.MulV(other)
+        return Matrix(self.off * other, self.v1 * other, self.v2 * other, self.v3 * other)
+
+    def MulV(self, vector):
+        return Vector(self.v1.x * vector.x + self.v2.x * vector.y + self.v3.x * vector.z,
+                      self.v1.y * vector.x + self.v2.y * vector.y + self.v3.y * vector.z,
+                      self.v1.z * vector.x + self.v2.z * vector.y + self.v3.z * vector.z)
+
+    def __invert__(self):
+        a, b, c = self.v1, self.v2, self.v3
+        det = a * (b % c)
+        if det == 0:
+            return Matrix()
+        # Rows of the inverse are the cross products divided by the determinant
+        r1, r2, r3 = (b % c) / det, (c % a) / det, (a % b) / det
+        inverse = Matrix(None, Vector(r1.x, r2.x, r3.x), Vector(r1.y, r2.y, r3.y), Vector(r1.z, r2.z, r3.z))
+        inverse.off = -inverse.MulV(self.off)
+        return inverse
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self.off == other.off and self.v1 == other.v1 and self.v2 == other.v2 and self.v3 == other.v3
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __getstate__(self):
+        return (self.off, self.v1, self.v2, self.v3)
+
+    def __setstate__(self, state):
+        self.off, self.v1, self.v2, self.v3 = state
+
+    def __repr__(self):
+        return "Matrix(%r, %r, %r, %r)" % (self.off, self.v1, self.v2, self.v3)
+
+    def GetScale(self):
+        return Vector(self.v1.GetLength(), self.v2.GetLength(), self.v3.GetLength())
+
+    def GetNormalized(self):
+        return Matrix(self.off, self.v1.GetNormalized(), self.v2.GetNormalized(), self.v3.GetNormalized())
+
+
+# Class - Polygon (triangles have c == d)
+class CPolygon(object):
+    __slots__ = ("a", "b", "c", "d")
+
+    def __init__(self, a, b, c, d=None):
+        self.a, self.b, self.c = a, b, c
+        self.d = c if d is None else d
+
+    def __getstate__(self):
+        return (self.a, self.b, self.c, self.d)
+
+    def __setstate__(self, state):
+        self.a, self.b, self.c, self.d = state
+
+    def IsTriangle(self):
+        return self.c == self.d
+
+
+# Class - Parameter container
+class BaseContainer(object):
+    def __init__(self, data=None):
+        self._data = dict(data or {})
+
+    def __getitem__(self, key):
+        return self._data.get(key)
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(list(self._data.items()))
+
+    def __len__(self):
+        return len(self._data)
+
+    def GetData(self, key, default=None):
+        return self._data.get(key, default)
+
+    def SetData(self, key, value):
+        self._data[key] = value
+
+    def RemoveData(self, key):
+        return self._data.pop(key, None) is not None
+
+    def GetString(self, key, default=""):
+        return self._data.get(key, default)
+
+    def GetInt32(self, key, default=0):
+        return self._data.get(key, default)
+
+    def GetFloat(self, key, default=0.0):
+        return self._data.get(key, default)
+
+    def GetBool(self, key, default=False):
+        return self._data.get(key, default)
+
+    def GetContainer(self, key):
+        return BaseContainer(self._data.get(key, BaseContainer())._data)
+
+    def GetContainerInstance(self, key):
+        return self._data.get(key)
+
+    SetString = SetInt32 = SetInt64 = SetFloat = SetBool = SetLink = SetVector = SetData
+
+    def SetContainer(self, key, container):
+        self._data[key] = BaseContainer(container._data)
+
+    def GetClone(self, flags=0):
+        return BaseContainer(self._data)
+
+
+_guids = itertools.count(1) # Object GUIDs
+
+
+# Class - Base of every scene element, == and hash compare the node (wrappers of one node share its __dict__)
+class C4DAtom(object):
+    def __init__(self, type_id=0):
+        self._type = type_id
+
+    def __eq__(self, other):
+        return isinstance(other, C4DAtom) and other.__dict__ is self.__dict__
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return id(self.__dict__)
+
+    def GetType(self):
+        return self._type
+
+    def CheckType(self, type_id):
+        return self._type == type_id
+
+    def GetClassification(self):
+        return self._type
+
+
+# Class - Linked hierarchy node (next/pred/up/down)
+class GeListNode(C4DAtom):
+    def __init__(self, type_id=0):
+        C4DAtom.__init__(self, type_id)
+        self._next = self._pred = self._up = self._down = None
+        self._doc = None
+        self._owner = None # List owner (document list or parent) when at the top level
+
+    def GetNext(self):
+        return self._next
+
+    def GetPred(self):
+        return self._pred
+
+    def GetUp(self):
+        return self._up if not isinstance(self._up, GeListHead) else None # Nodes at the top of a list have no parent
+
+    def GetDown(self):
+        return self._down
+
+    def GetDownLast(self):
+        child = self._down
+        while child is not None and child._next is not None:
+            child = child._next
+        return child
+
+    def GetChildren(self):
+        children = []
+        child = self._down
+        while child is not None:
+            children.append(child)
+            child = child._next
+        return children
+
+    def GetDocument(self):
+        return self._doc
+
+    def Remove(self):
+        if self._pred is not None:
+            self._pred._next = self._next
+        elif self._up is not None:
+            self._up._down = self._next
+        elif self._owner is not None:
+            self._owner._setFirst(self._next)
+        if self._next is not None:
+            self._next._pred = self._pred
+        if self._doc is not None:
+            self._doc._touch()
+        self._next = self._pred = self._up = None
+        self._owner = None
+        self._setDocument(None)
+
+    def _setDocument(self, doc):
+        node = self._down
+        self._doc = doc
+        while node is not None:
+            node._setDocument(doc)
+            node = node._next
+
+    def _link(self, up, pred, nxt, owner, doc):
+        self._up, self._pred, self._next, self._owner = up, pred, nxt, owner
+        if pred is not None:
+            pred._next = self
+        elif up is not None:
+            up._down = self
+        elif owner is not None:
+            owner._setFirst(self)
+        if nxt is not None:
+            nxt._pred = self
+        self._setDocument(doc)
+        if doc is not None:
+            doc._touch()
+
+    def InsertUnder(self, parent):
+        if self._up is not None or self._pred is not None or self._owner is not None:
+            self.Remove()
+        self._link(parent, None, parent._down, None, parent._doc)
+
+    def InsertUnderLast(self, parent):
+        if self._up is not None or self._pred is not None or self._owner is not None:
+            self.Remove()
+        self._link(parent, parent.GetDownLast(), None, None, parent._doc)
+
+    def InsertAfter(self, pred):
+        if self._up is not None or self._pred is not None or self._owner is not None:
+            self.Remove()
+        self._link(pred._up, pred, pred._next, pred._owner, pred._doc)
+
+    def InsertBefore(self, nxt):
+        if self._up is not None or self._pred is not None or self._owner is not None:
+            self.Remove()
+        if nxt._pred is not None:
+            self._link(nxt._up, nxt._pred, nxt, nxt._owner, nxt._doc)
+        else:
+            self._link(nxt._up, None, nxt, nxt._owner, nxt._doc)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for key in ("_next", "_pred", "_up", "_down", "_doc", "_owner"):
+            state[key] = None # Hierarchy links are rebuilt by BaseDocument.__setstate__
+        return state
+
+
+# Class - Head of a node list (layers), the first node is its child
+class GeListHead(GeListNode):
+    def GetFirst(self):
+        return self._down
+
+
+# Class - Node with a name and a parameter container
+class BaseList2D(GeListNode):
+    _layer = None # Layer of the node, None without a layer
+
+    def __new__(cls, type_id=0, *args):
+        if cls is BaseList2D and type_id in SHADER_TYPES:
+            return GeListNode.__new__(BaseShader) # c4d.BaseList2D(c4d.Xbitmap) creates a shader
+        return GeListNode.__new__(cls)
+
+    def __init__(self, type_id=0):
+        GeListNode.__init__(self, type_id)
+        self._name = ""
+        self._data = BaseContainer()
+        self._shaders = [] # Shaders owned by this node
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        if self._doc is not None:
+            self._doc._touch()
+
+    def GetName(self):
+        return self._name
+
+    def SetName(self, name):
+        self._name = name
+
+    def GetDataInstance(self):
+        return self._data
+
+    def GetLayerObject(self, doc):
+        return self._layer
+
+    def SetLayerObject(self, layer):
+        self._layer = layer
+        return True
+
+    def GetData(self):
+        return self._data.GetClone()
+
+    def SetData(self, container):
+        self._data = container.GetClone()
+
+    def InsertShader(self, shader, pred=None):
+        self._shaders.append(shader)
+        shader._doc = self._doc
+        shader._host = self
+
+    def GetFirstShader(self):
+        return self._shaders[0] if self._shaders else None
+
+    def GetShaders(self):
+        return list(self._shaders)
+
+    def GetClone(self, flags=0):
+        memo = dict((id(node), None) for node in (self._next, self._pred, self._up, self._owner, self._doc) if node is not None) # Not its list or document
+        clone = copy.deepcopy(self, memo)
+        clone._next = clone._pred = clone._up = clone._owner = clone._doc = None
+        return clone
+
+    def GetMain(self):
+        for owner in (getattr(self, "_object", None), getattr(self, "_host", None)): # Tag/track object, shader owner
+            if owner is not None:
+                return owner
+        if isinstance(self._owner, RenderData): # Video post
+            return self._owner
+        return self._doc
+
+    def Message(self, message_id, data=None):
+        return True
+
+    def GetDirty(self, flags=DIRTYFLAGS_ALL):
+        return 0
+
+
+# Class - Shader (bitmap, normal map...), GetNext/GetPred follow the shader list of the node it was inserted into
+class BaseShader(BaseList2D):
+    _host = None
+
+    def _sibling(self, offset):
+        if self._host is None:
+            return None
+        shaders = self._host._shaders
+        index = next(index for index, shader in enumerate(shaders) if shader is self) + offset
+        return shaders[index] if 0 <= index < len(shaders) else None
+
+    def GetNext(self):
+        return self._sibling(1)
+
+    def GetPred(self):
+        return self._sibling(-1)
+
+
+# Class - Tag on an object
+class BaseTag(BaseList2D):
+    def __init__(self, type_id=0):
+        BaseList2D.__init__(self, type_id)
+        self._object = None
+
+    def GetObject(self):
+        return self._object
+
+    def GetDocument(self):
+        return self._object._doc if self._object is not None else None
+
+    def Remove(self):
+        if self._object is not None:
+            self._object._tags.remove(self)
+            self._object = None
+
+
+# Class - Material assignment tag
+class TextureTag(BaseTag):
+    def __init__(self, type_id=Ttexture):
+        BaseTag.__init__(self, Ttexture)
+        self._material = None
+
+    def GetMaterial(self, ignoredoc=False):
+        return self._material
+
+    def SetMaterial(self, material):
+        self._material = material
+        if self._object is not None and self._object._doc is not None:
+            self._object._doc._touch()
+
+
+# Class - Scene object
+class BaseObject(BaseList2D):
+    _editor_mode = _render_mode = MODE_UNDEF # Class defaults: objects of documents pickled before modes were supported
+    _deform_mode = True
+
+    def __new__(cls, type_id=0, *args):
+        if cls is BaseObject:
+            cls = {Opolygon: PolygonObject, Ospline: SplineObject}.get(type_id, BaseObject)
+        return GeListNode.__new__(cls)
+
+    def __init__(self, type_id=Onull):
+        BaseList2D.__init__(self, type_id)
+        self._ml = Matrix()
+        self._tags = []
+        self._tracks = []
+        self._guid = next(_guids)
+
+    def GetGUID(self):
+        return self._guid
+
+    # Visibility & enabled
+    def GetEditorMode(self):
+        return self._editor_mode
+
+    def SetEditorMode(self, mode):
+        self._editor_mode = mode
+
+    def GetRenderMode(self):
+        return self._render_mode
+
+    def SetRenderMode(self, mode):
+        self._render_mode = mode
+
+    def GetDeformMode(self):
+        return self._deform_mode
+
+    def SetDeformMode(self, mode):
+        self._deform_mode = bool(mode)
+
+    # Animation tracks
+    def GetCTracks(self):
+        return list(self._tracks)
+
+    def FindCTrack(self, descid):
+        for track in self._tracks:
+            if track._key() == DescID._key(descid):
+                return track
+        return None
+
+    def InsertTrackSorted(self, track):
+        self._tracks.append(track)
+        track._object = self
+
+    # Matrices
+    def GetMl(self):
+        return Matrix(self._ml.off, self._ml.v1, self._ml.v2, self._ml.v3)
+
+    def SetMl(self, matrix):
+        self._ml = Matrix(matrix.off, matrix.v1, matrix.v2, matrix.v3)
+        if self._doc is not None:
+            self._doc._touch()
+
+    def GetUpMg(self):
+        return self._up.GetMg() if self._up is not None else Matrix()
+
+    def GetMg(self):
+        return self.GetUpMg() * self._ml
+
+    def SetMg(self, matrix):
+        self.SetMl(~self.GetUpMg() * matrix)
+
+    def GetRelPos(self):
+        return Vector(self._ml.off)
+
+    def SetRelPos(self, position):
+        matrix = self.GetMl()
+        matrix.off = Vector(position)
+        self.SetMl(matrix)
+
+    def GetRelScale(self):
+        return self._ml.GetScale()
+
+    def SetRelScale(self, scale):
+        matrix = self._ml.GetNormalized()
+        self.SetMl(Matrix(self._ml.off, matrix.v1 * scale.x, matrix.v2 * scale.y, matrix.v3 * scale.z))
+
+    def GetRelRot(self):
+        return MatrixToHPB(self._ml.GetNormalized())
+
+    def SetRelRot(self, rotation):
+        scale = self._ml.GetScale()
+        matrix = HPBToMatrix(rotation)
+        self.SetMl(Matrix(self._ml.off, matrix.v1 * scale.x, matrix.v2 * scale.y, matrix.v3 * scale.z))
+
+    # Tags
+    def GetTags(self):
+        return list(self._tags)
+
+    def GetTag(self, type_id, nr=0):
+        found = [tag for tag in self._tags if tag.GetType() == type_id]
+        return found[nr] if len(found) > nr else None
+
+    def GetFirstTag(self):
+        return self._tags[0] if self._tags else None
+
+    def InsertTag(self, tag, pred=None):
+        if tag._object is not None:
+            tag.Remove()
+        self._tags.insert(self._tags.index(pred) + 1 if pred in self._tags else 0, tag)
+        tag._object = self
+        if self._doc is not None:
+            self._doc._touch()
+
+    def MakeTag(self, type_id, pred=None):
+        tag = TextureTag() if type_id == Ttexture else BaseTag(type_id)
+        self.InsertTag(tag, pred)
+        return tag
+
+    def KillTag(self, type_id, nr=0):
+        tag = self.GetTag(type_id, nr)
+        if tag is None:
+            return False
+        tag.Remove()
+        return True
+
+    # Bounding box (center, half size) in local space
+    def GetMp(self):
+        return Vector(0, 0, 0)
+
+    def GetRad(self):
+        return Vector(0, 0, 0)
+
+    def GetCache(self):
+        return None
+
+    def GetClone(self, flags=0):
+        flat = flattenHierarchy([self])
+        memo = {} # Materials linked by Texture Tags are shared, not copied
+        for node, parent_index in flat:
+            if node._layer is not None: # Layers are shared too
+                memo[id(node._layer)] = node._layer
+            for tag in node._tags:
+                if isinstance(tag, TextureTag) and tag._material is not None:
+                    memo[id(tag._material)] = tag._material
+        flat = copy.deepcopy(flat, memo)
+        relinkHierarchy(flat, None, None)
+        return flat[0][0]
+
+    def GetDeformCache(self):
+        return None
+
+
+# Class - Object with points
+class PointObject(BaseObject):
+    def __init__(self, type_id=Opolygon, point_count=0):
+        BaseObject.__init__(self, type_id)
+        self._points = [Vector(0, 0, 0) for i in range(point_count)]
+
+    def GetPointCount(self):
+        return len(self._points)
+
+    def GetAllPoints(self):
+        return [Vector(p) for p in self._points]
+
+    def SetAllPoints(self, points):
+        if len(points) != len(self._points):
+            raise IndexError("SetAllPoints: expected %d points, got %d" % (len(self._points), len(points)))
+        self._points = [Vector(p) for p in points]
+        if self._doc is not None:
+            self._doc._touch()
+
+    def GetPoint(self, index):
+        return Vector(self._points[index])
+
+    def SetPoint(self, index, point):
+        self._points[index] = Vector(point)
+
+    def _bounds(self):
+        if not self._points:
+            return Vector(0, 0, 0), Vector(0, 0, 0)
+        low = Vector(min(p.x for p in self._points), min(p.y for p in self._points), min(p.z for p in self._points))
+        high = Vector(max(p.x for p in self._points), max(p.y for p in self._points), max(p.z for p in self._points))
+        return (low + high) * 0.5, (high - low) * 0.5
+
+    def GetMp(self):
+        return self._bounds()[0]
+
+    def GetRad(self):
+        return self._bounds()[1]
+
+
+# Class - Polygon mesh
+class PolygonObject(PointObject):
+    def __new__(cls, *args):
+        return GeListNode.__new__(cls)
+
+    def __init__(self, point_count=0, polygon_count=0):
+        if point_count == Opolygon and polygon_count == 0:
+            point_count = 0 # Created through c4d.BaseObject(c4d.Opolygon)
+        PointObject.__init__(self, Opolygon, point_count)
+        self._polygons = [CPolygon(0, 0, 0) for i in range(polygon_count)]
+
+    def GetPolygonCount(self):
+        return len(self._polygons)
+
+    def GetAllPolygons(self):
+        return [CPolygon(p.a, p.b, p.c, p.d) for p in self._polygons]
+
+    def GetPolygon(self, index):
+        p = self._polygons[index]
+        return CPolygon(p.a, p.b, p.c, p.d)
+
+    def SetPolygon(self, index, polygon):
+        self._polygons[index] = CPolygon(polygon.a, polygon.b, polygon.c, polygon.d)
+
+    def ResizeObject(self, point_count, polygon_count=None):
+        self._points = (self._points + [Vector(0, 0, 0)] * point_count)[:point_count]
+        if polygon_count is not None:
+            self._polygons = (self._polygons + [CPolygon(0, 0, 0)] * polygon_count)[:polygon_count]
+        return True
+
+
+# Class - Spline
+class SplineObject(PointObject):
+    def __new__(cls, *args):
+        return GeListNode.__new__(cls)
+
+    def __init__(self, point_count=0, spline_type=0):
+        if point_count == Ospline and spline_type == 0:
+            point_count = 0 # Created through c4d.BaseObject(c4d.Ospline)
+        PointObject.__init__(self, Ospline, point_count)
+        self._tangents = [(Vector(0, 0, 0), Vector(0, 0, 0)) for i in range(point_count)]
+
+    def GetTangentCount(self):
+        return len(self._tangents)
+
+    def GetTangent(self, index):
+        left, right = self._tangents[index]
+        return {"vl": Vector(left), "vr": Vector(right)}
+
+    def SetTangent(self, index, vl, vr):
+        self._tangents[index] = (Vector(vl), Vector(vr))
+
+
+# Class - Reflectance layer handle of a Standard material
+class ReflectionLayer(object):
+    def __init__(self, material, layer_id):
+        self._material = material
+        self._id = layer_id
+
+    def GetDataID(self):
+        return REFLECTION_LAYER_DATA + self._id * REFLECTION_LAYER_SIZE
+
+    def GetLayerID(self):
+        return self._id
+
+    def GetName(self):
+        return self._material._layer_names[self._id]
+
+    def SetName(self, name):
+        self._material._layer_names[self._id] = name
+
+
+# Class - Material (Standard materials have reflectance layers)
+class BaseMaterial(BaseList2D):
+    def __new__(cls, type_id=Mmaterial, *args):
+        if cls is BaseMaterial and type_id == Mmaterial:
+            cls = Material
+        return GeListNode.__new__(cls)
+
+    def __init__(self, type_id=Mmaterial):
+        BaseList2D.__init__(self, type_id)
+
+    def Update(self, preview=True, rttm=True):
+        return True
+
+
+# Class - Standard material
+class Material(BaseMaterial):
+    def __init__(self, type_id=Mmaterial):
+        BaseMaterial.__init__(self, Mmaterial)
+        self._data[MATERIAL_COLOR_COLOR] = Vector(0.8, 0.8, 0.8)
+        self._data[MATERIAL_USE_COLOR] = True
+        self._data[MATERIAL_USE_REFLECTION] = True
+        self._data[MATERIAL_USE_TRANSPARENCY] = False
+        self._data[MATERIAL_COLOR_SHADER] = None
+        self._data[MATERIAL_BUMP_SHADER] = None
+        self._data[MATERIAL_ALPHA_SHADER] = None
+        self._layer_ids = [0] # Layer IDs in index order (index 0 is the top layer)
+        self._layer_names = {0: "Default Specular"}
+        self._layer_trans = 999 # Transparency layer ID
+
+    def GetReflectionLayerCount(self):
+        return len(self._layer_ids)
+
+    def GetReflectionLayerIndex(self, index):
+        if index < 0 or index >= len(self._layer_ids):
+            return None
+        return ReflectionLayer(self, self._layer_ids[index])
+
+    def GetReflectionLayerID(self, layer_id):
+        return ReflectionLayer(self, layer_id) if layer_id in self._layer_ids else None
+
+    def GetReflectionLayerTrans(self):
+        return ReflectionLayer(self, self._layer_trans)
+
+    def AddReflectionLayer(self):
+        layer_id = max(self._layer_ids + [0]) + 1
+        self._layer_ids.insert(0, layer_id) # New layers are added on top
+        self._layer_names[layer_id] = "Layer %d" % layer_id
+        return ReflectionLayer(self, layer_id)
+
+    def _clearLayerData(self, layer_id):
+        base = REFLECTION_LAYER_DATA + layer_id * REFLECTION_LAYER_SIZE
+        for key, value in self._data:
+            if base <= key < base + REFLECTION_LAYER_SIZE:
+                self._data.RemoveData(key)
+
+    def RemoveReflectionLayerIndex(self, index):
+        layer_id = self._layer_ids.pop(index)
+        self._clearLayerData(layer_id)
+        return True
+
+    def RemoveReflectionLayerID(self, layer_id):
+        self._layer_ids.remove(layer_id)
+        self._clearLayerData(layer_id)
+        return True
+
+    def RemoveReflectionAllLayers(self):
+        for layer_id in self._layer_ids:
+            self._clearLayerData(layer_id)
+        self._layer_ids = []
+        return True
+
+
+# Class - Video post (render engine settings)
+class BaseVideoPost(BaseList2D):
+    pass
+
+
+# Class - Render settings
+class RenderData(BaseList2D):
+    def __init__(self, type_id=0):
+        BaseList2D.__init__(self, type_id)
+        self._videoposts = None
+        self._name = "My Render Setting"
+
+    def _setFirst(self, node):
+        self._videoposts = node
+
+    def GetFirstVideoPost(self):
+        return self._videoposts
+
+    def InsertVideoPost(self, videopost, pred=None):
+        if pred is not None:
+            videopost._link(None, pred, pred._next, self, self._doc)
+        else:
+            last = self._videoposts
+            while last is not None and last._next is not None:
+                last = last._next
+            videopost._link(None, last, None, self, self._doc)
+
+    def __getstate__(self):
+        state = BaseList2D.__getstate__(self)
+        videoposts = []
+        node = self._videoposts
+        while node is not None:
+            videoposts.append(node)
+            node = node._next
+        state["_videoposts"] = videoposts
+        return state
+
+    def __setstate__(self, state):
+        videoposts = state.pop("_videoposts") or []
+        self.__dict__.update(state)
+        self._videoposts = None
+        for videopost in videoposts:
+            self.InsertVideoPost(videopost)
+
+
+# Class - Parameter description ID level
+class DescLevel(object):
+    def __init__(self, id, dtype=0, creator=0):
+        self.id, self.dtype, self.creator = id, dtype, creator
+
+
+# Class - Parameter description ID
+class DescID(object):
+    def __init__(self, *levels):
+        self._levels = levels
+
+    def __getitem__(self, index):
+        return self._levels[index]
+
+    def GetDepth(self):
+        return len(self._levels)
+
+    def _key(self):
+        return tuple(level.id for level in self._levels)
+
+
+# Class - Time in seconds (BaseTime(frame, fps) for frames)
+class BaseTime(object):
+    def __init__(self, value=0.0, fps=None):
+        self._seconds = float(value) / fps if fps else float(value)
+
+    def Get(self):
+        return self._seconds
+
+    def GetFrame(self, fps):
+        return int(round(self._seconds * fps))
+
+    def __eq__(self, other):
+        return isinstance(other, BaseTime) and abs(self._seconds - other._seconds) < 1e-9
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(round(self._seconds, 9))
+
+
+# Class - Animation key, value & tangent values
+class CKey(object):
+    def __init__(self, time, value=0.0):
+        self._time = time
+        self._value = value
+        self._left = self._right = 0.0
+
+    def GetTime(self):
+        return self._time
+
+    def GetValue(self):
+        return self._value
+
+    def SetValue(self, curve, value):
+        self._value = float(value)
+
+    def GetValueLeft(self):
+        return self._left
+
+    def SetValueLeft(self, curve, value):
+        self._left = float(value)
+
+    def GetValueRight(self):
+        return self._right
+
+    def SetValueRight(self, curve, value):
+        self._right = float(value)
+
+
+# Class - Animation curve of a track, keys by time (linear between keys)
+class CCurve(object):
+    def __init__(self):
+        self._keys = []
+
+    def GetKeyCount(self):
+        return len(self._keys)
+
+    def GetKey(self, index):
+        return self._keys[index]
+
+    def FindKey(self, time, match=0):
+        for index, key in enumerate(self._keys):
+            if key._time == time:
+                return {"key": key, "idx": index}
+        return None
+
+    def AddKey(self, time, bUndo=True, synchronized=False):
+        found = self.FindKey(time)
+        if found is not None:
+            return {"key": found["key"], "nidx": found["idx"]}
+        key = CKey(time, self.GetValue(time) if self._keys else 0.0)
+        self._keys.append(key)
+        self._keys.sort(key=lambda key: key._time.Get())
+        return {"key": key, "nidx": self._keys.index(key)}
+
+    def GetValue(self, time, fps=0):
+        seconds = time.Get()
+        if not self._keys:
+            return 0.0
+        if seconds <= self._keys[0]._time.Get():
+            return self._keys[0]._value
+        for before, after in zip(self._keys, self._keys[1:]):
+            if seconds <= after._time.Get():
+                t = (seconds - before._time.Get()) / (after._time.Get() - before._time.Get())
+                return before._value + (after._value - before._value) * t
+        return self._keys[-1]._value
+
+
+# Class - Animation track of one parameter (DescID)
+class CTrack(BaseList2D):
+    def __init__(self, op=None, descid=None):
+        BaseList2D.__init__(self, 5350)
+        self._descid = descid
+        self._curve = CCurve()
+        self._object = None
+
+    def _key(self):
+        return DescID._key(self._descid)
+
+    def GetDescriptionID(self):
+        return self._descid
+
+    def SetDescriptionID(self, op, descid):
+        self._descid = descid
+        return True
+
+    def GetCurve(self, type=0, bCreate=True):
+        return self._curve
+
+
+# Class - Parameter override of a take
+class BaseOverride(BaseList2D):
+    def __init__(self, node=None, parameter=None, value=None):
+        BaseList2D.__init__(self, Tbaseoverride)
+        self._node, self._parameter, self._value = node, parameter, value
+
+    def GetSceneNode(self):
+        return self._node
+
+
+# Class - Take: parameter overrides, applied to the scene while the take is current
+class BaseTake(BaseList2D):
+    def __init__(self, name=""):
+        BaseList2D.__init__(self, Tbasetake)
+        self._name = name
+        self._checked = True
+        self._overrides = []
+
+    def IsMain(self):
+        return self._up is None
+
+    def IsChecked(self):
+        return self._checked
+
+    def SetChecked(self, checked):
+        self._checked = bool(checked)
+
+    def GetOverrides(self):
+        return list(self._overrides)
+
+    def FindOverride(self, take_data, node):
+        for override in self._overrides:
+            if override._node is node:
+                return override
+        return None
+
+    def FindOrAddOverrideParam(self, take_data, node, description, value, backup_value=None, delete_anim=False):
+        parameter = description[0].id
+        for override in self._overrides:
+            if override._node is node and override._parameter == parameter:
+                override._value = value
+                break
+        else:
+            override = BaseOverride(node, parameter, value)
+            self._overrides.append(override)
+        if take_data.GetCurrentTake() is self:
+            take_data._override(override)
+        return override
+
+
+# Class - Takes of a document, the Main take holds the scene values
+class TakeData(object):
+    def __init__(self, doc):
+        self._doc = doc
+        self._main = BaseTake("Main")
+        self._main._doc = doc
+        self._current = self._main
+        self._backups = [] # (node, parameter, Main take value) of the current take
+
+    def GetMainTake(self):
+        return self._main
+
+    def GetCurrentTake(self):
+        return self._current
+
+    def AddTake(self, name, parent, clone_from):
+        take = BaseTake(name)
+        take.InsertUnderLast(parent if parent is not None else self._main)
+        return take
+
+    def SetCurrentTake(self, take):
+        for node, parameter, value in reversed(self._backups): # Back to the Main take values
+            node[parameter] = value
+        self._backups = []
+        self._current = take
+        if not take.IsMain():
+            for override in take._overrides:
+                self._override(override)
+        return True
+
+    def _override(self, override):
+        self._backups.append((override._node, override._parameter, override._node[override._parameter]))
+        override._node[override._parameter] = override._value
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_main"] = flattenHierarchy([self._main])
+        return state
+
+    def __setstate__(self, state):
+        flat = state.pop("_main")
+        self.__dict__.update(state)
+        self._main = flat[0][0]
+        relinkHierarchy(flat, None, None)
+        for take, parent_index in flat:
+            take._doc = self._doc
+
+
+# Class - Top level node list of a document (objects, materials, render data)
+class _NodeList(object):
+    def __init__(self):
+        self.first = None
+
+    def _setFirst(self, node):
+        self.first = node
+
+    def nodes(self):
+        nodes = []
+        node = self.first
+        while node is not None:
+            nodes.append(node)
+            node = node._next
+        return nodes
+
+    def append(self, node, doc):
+        last = self.first
+        while last is not None and last._next is not None:
+            last = last._next
+        node._link(None, last, None, self, doc)
+
+    def prepend(self, node, doc):
+        node._link(None, None, self.first, self, doc)
+
+
+# Class - Layer of the Layer Manager
+class LayerObject(BaseList2D):
+    def __init__(self, type_id=Olayer):
+        BaseList2D.__init__(self, type_id)
+
+
+# Class - Cinema 4D document
+class BaseDocument(BaseList2D):
+    def __init__(self):
+        BaseList2D.__init__(self, 110059)
+        self._objects = _NodeList()
+        self._materials = _NodeList()
+        self._renderdata = _NodeList()
+        self._layers = GeListHead()
+        self._layers._doc = self
+        self._dirty = 0
+        self._undo_depth = 0
+        self.undo_log = [] # (undo type, node) recorded by AddUndo
+        self._name = "Untitled 1"
+        self._path = ""
+        render_data = RenderData()
+        self._renderdata.append(render_data, self)
+        self._active_renderdata = render_data
+        self._takedata = TakeData(self)
+        self._doc = self
+
+    def _touch(self):
+        self._dirty += 1
+
+    def GetDirty(self, flags=DIRTYFLAGS_ALL):
+        return self._dirty
+
+    def SetChanged(self):
+        self._touch()
+
+    def GetDocument(self):
+        return self
+
+    # Document file
+    def GetDocumentName(self):
+        return self._name
+
+    def SetDocumentName(self, name):
+        self._name = name
+
+    def GetDocumentPath(self):
+        return self._path
+
+    def SetDocumentPath(self, path):
+        self._path = path
+
+    # Objects
+    def GetFirstObject(self):
+        return self._objects.first
+
+    def GetObjects(self):
+        return self._objects.nodes()
+
+    def InsertObject(self, obj, parent=None, pred=None, checknames=False):
+        if obj._up is not None or obj._pred is not None or obj._owner is not None:
+            obj.Remove()
+        if pred is not None:
+            obj.InsertAfter(pred)
+        elif parent is not None:
+            obj.InsertUnder(parent)
+        else:
+            self._objects.prepend(obj, self) # Cinema 4D inserts at the top of the Object Manager
+
+    def SearchObject(self, name):
+        stack = list(reversed(self.GetObjects()))
+        while stack:
+            obj = stack.pop()
+            if obj.GetName() == name:
+                return obj
+            stack.extend(reversed(obj.GetChildren()))
+        return None
+
+    # Materials
+    def GetFirstMaterial(self):
+        return self._materials.first
+
+    def GetMaterials(self):
+        return self._materials.nodes()
+
+    def InsertMaterial(self, material, pred=None, checknames=False):
+        if pred is not None:
+            material.InsertAfter(pred)
+        else:
+            self._materials.prepend(material, self)
+        for shader in material._shaders:
+            shader._doc = self
+
+    def SearchMaterial(self, name):
+        for material in self.GetMaterials():
+            if material.GetName() == name:
+                return material
+        return None
+
+    # Render settings
+    def GetActiveRenderData(self):
+        return self._active_renderdata
+
+    def SetActiveRenderData(self, render_data):
+        self._active_renderdata = render_data
+
+    def GetFirstRenderData(self):
+        return self._renderdata.first
+
+    def InsertRenderData(self, render_data, parent=None, pred=None):
+        if parent is not None:
+            render_data.InsertUnderLast(parent)
+        elif pred is not None:
+            render_data.InsertAfter(pred)
+        else:
+            self._renderdata.append(render_data, self)
+
+    # Layers
+    def GetLayerObjectRoot(self):
+        return self._layers
+
+    # Takes
+    def GetTakeData(self):
+        if getattr(self, "_takedata", None) is None: # Documents pickled before takes were supported
+            self._takedata = TakeData(self)
+        return self._takedata
+
+    # Undo
+    def StartUndo(self):
+        self._undo_depth += 1
+        return True
+
+    def EndUndo(self):
+        self._undo_depth = max(0, self._undo_depth - 1)
+        return True
+
+    def AddUndo(self, undo_type, node):
+        self.undo_log.append((undo_type, node))
+        return True
+
+    def DoUndo(self, multiple=False):
+        return False
+
+    def GetClone(self, flags=0):
+        return pickle.loads(pickle.dumps(self, 2))
+
+    # Pickle: store hierarchies as flat (node, parent index) lists so deep/long scenes don't hit the recursion limit
+    def __getstate__(self):
+        state = BaseList2D.__getstate__(self)
+        for key, node_list in (("_objects", self._objects), ("_materials", self._materials), ("_renderdata", self._renderdata)):
+            state[key] = flattenHierarchy(node_list.nodes())
+        state["_layers"] = flattenHierarchy(self.GetLayerObjectRoot().GetChildren())
+        state["undo_log"] = []
+        return state
+
+    def __setstate__(self, state):
+        flats = dict((key, state.pop(key, [])) for key in ("_objects", "_materials", "_renderdata", "_layers"))
+        self.__dict__.update(state)
+        self._doc = self
+        for key, flat in flats.items():
+            node_list = _NodeList()
+            if key == "_layers":
+                node_list = GeListHead()
+                node_list._doc = self
+            setattr(self, key, node_list)
+            relinkHierarchy(flat, node_list, self)
+        self._dirty = 0
+
+
+# Function - Flatten node hierarchies into (node, parent index) in depth first order
+def flattenHierarchy(roots):
+    flat = []
+    stack = [(node, -1) for node in reversed(roots)]
+    while stack:
+        node, parent_index = stack.pop()
+        flat.append((node, parent_index))
+        stack.extend((child, len(flat) - 1) for child in reversed(node.GetChildren()))
+    return flat
+
+
+# Function - Rebuild the links of a flattened hierarchy, roots are appended to node_list (if given)
+def relinkHierarchy(flat, node_list, doc):
+    last_child = {} # Parent index -> last inserted child, -1 for the roots
+    for node, parent_index in flat:
+        if parent_index < 0:
+            if isinstance(node_list, GeListHead): # Layers: children of the list head
+                node._link(node_list, last_child.get(-1), None, None, doc)
+                last_child[-1] = node
+            elif node_list is not None:
+                node._link(None, last_child.get(-1), None, node_list, doc)
+                last_child[-1] = node
+        else:
+            node._link(flat[parent_index][0], last_child.get(parent_index), None, None, doc)
+            last_child[parent_index] = node
+        for shader in node._shaders:
+            shader._doc = doc
+
+
+# Functions - c4d.utils
+def MatrixRotX(w):
+    c, s = math.cos(w), math.sin(w)
+    return Matrix(None, Vector(1, 0, 0), Vector(0, c, s), Vector(0, -s, c))
+
+
+def MatrixRotY(w):
+    c, s = math.cos(w), math.sin(w)
+    return Matrix(None, Vector(c, 0, -s), Vector(0, 1, 0), Vector(s, 0, c))
+
+
+def MatrixRotZ(w):
+    c, s = math.cos(w), math.sin(w)
+    return Matrix(None, Vector(c, s, 0), Vector(-s, c, 0), Vector(0, 0, 1))
+
+
+def MatrixMove(vector):
+    return Matrix(vector)
+
+
+def MatrixScale(vector):
+    return Matrix(None, Vector(vector.x, 0, 0), Vector(0, vector.y, 0), Vector(0, 0, vector.z))
+
+
+def HPBToMatrix(hpb, order=None):
+    return MatrixRotY(hpb.x) * MatrixRotX(hpb.y) * MatrixRotZ(hpb.z)
+
+
+def MatrixToHPB(matrix, order=None):
+    m = matrix.GetNormalized()
+    p = math.asin(max(-1.0, min(1.0, -m.v3.y)))
+    if abs(math.cos(p)) > 1e-9:
+        h = math.atan2(m.v3.x, m.v3.z)
+        b = math.atan2(m.v1.y, m.v2.y)
+    else:
+        h = math.atan2(-m.v1.z, m.v1.x) # Gimbal lock: put all rotation in H
+        b = 0.0
+    return Vector(h, p, b)
+
+
+def DegToRad(value):
+    return value * math.pi / 180.0
+
+
+def RadToDeg(value):
+    return value * 180.0 / math.pi
+
+
+# Functions - c4d.documents
+_documents = []
+_active = [None]
+
+
+def GetActiveDocument():
+    if _active[0] is None:
+        InsertBaseDocument(BaseDocument())
+        _active[0] = _documents[-1]
+    return _active[0]
+
+
+def SetActiveDocument(doc):
+    if doc not in _documents:
+        InsertBaseDocument(doc)
+    _active[0] = doc
+
+
+def InsertBaseDocument(doc):
+    if doc not in _documents:
+        _documents.append(doc)
+
+
+def KillDocument(doc):
+    if doc in _documents:
+        _documents.remove(doc)
+    if _active[0] is doc:
+        _active[0] = None
+
+
+def GetFirstDocument():
+    return _documents[0] if _documents else None
+
+
+def LoadDocument(name, loadflags=SCENEFILTER_OBJECTS | SCENEFILTER_MATERIALS, thread=None):
+    try:
+        with open(name, "rb") as f:
+            doc = pickle.load(f)
+    except (IOError, OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None # Real Cinema 4D also returns None for unreadable files
+    doc.SetDocumentName(os.path.basename(name))
+    doc.SetDocumentPath(os.path.dirname(os.path.abspath(name)))
+    return doc
+
+
+def SaveDocument(doc, name, saveflags=SAVEDOCUMENTFLAGS_NONE, format=FORMAT_C4DEXPORT):
+    with open(name, "wb") as f:
+        pickle.dump(doc, f, 2)
+    return True
+
+
+# Functions - main c4d module
+_commands = []
+
+
+def CallCommand(command_id, subid=0):
+    _commands.append(command_id)
+    if command_id == 12168: # Remove Unused Materials
+        doc = GetActiveDocument()
+        used = set()
+        stack = list(doc.GetObjects())
+        while stack:
+            obj = stack.pop()
+            stack.extend(obj.GetChildren())
+            for tag in obj.GetTags():
+                if isinstance(tag, TextureTag) and tag.GetMaterial() is not None:
+                    used.add(tag.GetMaterial())
+        for material in doc.GetMaterials():
+            if material not in used:
+                material.Remove()
+
+
+def EventAdd(flags=0):
+    return True
+
+
+def StatusSetBar(value):
+    return True
+
+
+def StatusSetText(text):
+    return True
+
+
+def StatusClear():
+    return True
+
+
+def GetC4DVersion():
+    return 21207
+
+
+# Functions - c4d.plugins
+_prefs = {}
+
+
+def FindPlugin(plugin_id, plugin_type=0):
+    return _prefs.setdefault(plugin_id, BaseList2D(plugin_id))
+
+
+# Functions - c4d.gui
+def MessageDialog(text, type=0):
+    print(text)
+    return True
+
+
+def QuestionDialog(text):
+    return True
+
+
+def GetInputState(askdevice, askchannel, res):
+    return False
+
+
+# API call counting (off by default, wrapping only happens while enabled)
+CALL_COUNTS = {} # "Class.Method" or "function" -> number of calls
+_counted = [] # (owner, attribute name, original) restored by countCalls(False)
+COUNTED_CLASSES = ("GeListNode", "BaseList2D", "BaseShader", "BaseTag", "TextureTag", "BaseObject", "PointObject",
+                   "PolygonObject", "SplineObject", "ReflectionLayer", "BaseMaterial", "Material", "BaseVideoPost",
+                   "RenderData", "BaseDocument", "BaseContainer")
+COUNTED_DUNDERS = ("__getitem__", "__setitem__")
+
+
+# Function - Wrap function so every call is added to CALL_COUNTS[name]
+def countingWrapper(name, function):
+    def counted(*args, **kwargs):
+        CALL_COUNTS[name] = CALL_COUNTS.get(name, 0) + 1
+        return function(*args, **kwargs)
+    counted.__name__ = function.__name__
+    counted.__doc__ = function.__doc__
+    return counted
+
+
+# Function - Start (True) or stop (False) counting API calls
+def countCalls(enable=True):
+    module = sys.modules[__name__]
+    if enable and not _counted:
+        for class_name in COUNTED_CLASSES:
+            cls = getattr(module, class_name)
+            for name, value in list(vars(cls).items()):
+                if isinstance(value, types.FunctionType) and (name[:1].isupper() or name in COUNTED_DUNDERS):
+                    _counted.append((cls, name, value))
+                    setattr(cls, name, countingWrapper(class_name + "." + name, value))
+        owners = [module] + [getattr(module, name) for name in ("documents", "utils", "gui", "plugins") if hasattr(module, name)]
+        for owner in owners:
+            for name, value in list(vars(owner).items()):
+                if isinstance(value, types.FunctionType) and name[:1].isupper() and value.__module__ == __name__:
+                    _counted.append((owner, name, value))
+                    setattr(owner, name, countingWrapper(name, value))
+    elif not enable:
+        while _counted:
+            owner, name, value = _counted.pop()
+            setattr(owner, name, value)
+
+
+# Function - Clear CALL_COUNTS
+def resetCallCounts():
+    CALL_COUNTS.clear()
+
+
+# New wrapper per call (on by default): like the c4d module, every call returning a node returns a new Python object,
+# 'is' and id() of two results differ while == and hash match. The fake itself only works on the nodes.
+_wrapped = [] # (owner, attribute name, original) restored by newWrappers(False)
+_wrapper_classes = {} # Node class -> its wrapper class
+_inside = threading.local() # Depth of wrapped calls on this thread, calls made by the fake itself are not wrapped
+
+
+# Function - Node behind a wrapper (lists/tuples of them too)
+def unwrap(value):
+    if isinstance(value, C4DAtom):
+        return getattr(value, "_c4d_node", value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(unwrap(item) for item in value)
+    return value
+
+
+# Function - New wrapper of a node (lists/tuples of them too)
+def wrap(value):
+    if isinstance(value, C4DAtom):
+        node = unwrap(value)
+        cls = type(node)
+        if cls not in _wrapper_classes:
+            _wrapper_classes[cls] = type(cls.__name__, (cls,), {"__slots__": ("_c4d_node",), "__module__": __name__,
+                                          "__reduce_ex__": lambda self, protocol: (unwrap, (self._c4d_node,)), # Pickled & copied as the node
+                                          "__deepcopy__": lambda self, memo: copy.deepcopy(self._c4d_node, memo)})
+        wrapper = object.__new__(_wrapper_classes[cls])
+        wrapper.__dict__ = node.__dict__ # Shared state: changes through any wrapper change the node
+        wrapper._c4d_node = node
+        return wrapper
+    if isinstance(value, (list, tuple)):
+        return type(value)(wrap(item) for item in value)
+    return value
+
+
+# Function - Wrap function: nodes in arguments are unwrapped, nodes in the result get a new wrapper
+def newWrapper(function):
+    def wrapped(*args, **kwargs):
+        if getattr(_inside, "depth", 0):
+            return function(*args, **kwargs)
+        _inside.depth = 1
+        try:
+            result = function(*unwrap(args), **dict((key, unwrap(value)) for key, value in kwargs.items()))
+        finally:
+            _inside.depth = 0
+        return wrap(result)
+    wrapped.__name__ = function.__name__
+    wrapped.__doc__ = function.__doc__
+    return wrapped
+
+
+# Function - Start (True) or stop (False) returning a new wrapper per call
+def newWrappers(enable=True):
+    module = sys.modules[__name__]
+    if enable and not _wrapped:
+        classes = [value for value in vars(module).values() if isinstance(value, type) and (issubclass(value, C4DAtom) or value in (BaseContainer, TakeData))]
+        owners = classes + [module] + [getattr(module, name) for name in ("documents", "utils", "gui", "plugins") if hasattr(module, name)]
+        for owner in owners:
+            for name, value in list(vars(owner).items()):
+                if isinstance(value, types.FunctionType) and (name[:1].isupper() or name in COUNTED_DUNDERS) and value.__module__ == __name__:
+                    _wrapped.append((owner, name, value))
+                    setattr(owner, name, newWrapper(value))
+    elif not enable:
+        while _wrapped:
+            owner, name, value = _wrapped.pop()
+            setattr(owner, name, value)
+
+
+# Function - Register this module as 'c4d' so the scripts import it
+def install():
+    module = sys.modules[__name__]
+    submodules = {
+        "documents": ("BaseDocument", "BaseVideoPost", "RenderData", "LayerObject", "GetActiveDocument", "SetActiveDocument",
+                      "InsertBaseDocument", "KillDocument", "GetFirstDocument", "LoadDocument", "SaveDocument"),
+        "utils": ("MatrixRotX", "MatrixRotY", "MatrixRotZ", "MatrixMove", "MatrixScale", "HPBToMatrix", "MatrixToHPB",
+                  "DegToRad", "RadToDeg"),
+        "gui": ("MessageDialog", "QuestionDialog", "GetInputState"),
+        "plugins": ("FindPlugin",),
+    }
+    for name, members in submodules.items():
+        submodule = types.ModuleType("c4d." + name)
+        for member in members:
+            setattr(submodule, member, getattr(module, member))
+        setattr(module, name, submodule)
+        sys.modules["c4d." + name] = submodule
+    sys.modules["c4d"] = module
+    newWrappers(True)
+    return module
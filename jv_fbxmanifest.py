@@ -0,0 +1,467 @@
+"""
+jv_fbxmanifest
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3 outside Cinema 4D)
+Description-US: Read the materials of an FBX file without importing it into Cinema 4D.
+                Only the Material, Texture, Video and Connection nodes are parsed, every other node
+                (Geometry, Model, Animation...) is skipped by its byte offset (binary) or block (ASCII).
+
+                Command line:  python jv_fbxmanifest.py scene.fbx -o scene_manifest.json
+
+                The manifest holds the application that wrote the FBX (FBXHeaderExtension SceneInfo, e.g. "3ds Max"),
+                and lists for every material:
+                - name, id
+                - color (Diffuse Color)
+                - transparent (material uses Transparency -> converted to Glass)
+                - diffuse, roughness, metal, bump, alpha texture paths (None if not used)
+
+                Use buildSourceMaterial(entry) inside Cinema 4D to create the Standard material the FBX
+                importer would have created, so the JV_FBXMaterialsTo* conversions can run from a manifest.
+"""
+
+# Libraries
+import os
+import sys
+import json
+import struct
+import zlib
+import argparse
+
+
+MANIFEST_VERSION = 1 # Increase when the manifest layout changes
+
+# FBX material properties that feed each texture slot, first match wins
+SLOT_PROPERTIES = {
+    "diffuse": ("DiffuseColor", "Diffuse", "Maya|baseColor"),
+    "roughness": ("ShininessExponent", "Shininess", "Maya|specularRoughness"), # Imported as Reflectance -> 'Specular' layer texture
+    "metal": ("ReflectionFactor", "ReflectionColor", "Maya|metalness"), # Imported as Reflectance -> 'Reflection' layer texture
+    "bump": ("NormalMap", "Bump", "Maya|normalCamera"),
+    "alpha": ("TransparentColor", "TransparencyFactor", "Maya|opacity"),
+}
+SLOTS = ("diffuse", "roughness", "metal", "bump", "alpha")
+
+OBJECT_NODES = ("Material", "Texture", "Video") # Nodes parsed inside 'Objects', everything else is skipped
+HEADER_NODE = "FBXHeaderExtension" # Top level node parsed for the application name (small)
+APPLICATION_PROPERTIES = ("Original|ApplicationName", "LastSaved|ApplicationName") # SceneInfo properties, first match wins
+SKIPPED_CHILDREN = ("Content",) # Embedded media inside Video nodes
+
+BINARY_MAGIC = b"Kaydara FBX Binary  \x00"
+ARRAY_TYPES = {b"f": ("f", 4), b"d": ("d", 8), b"l": ("q", 8), b"i": ("i", 4), b"b": ("?", 1)}
+SCALAR_TYPES = {b"Y": "<h", b"C": "<?", b"I": "<i", b"F": "<f", b"D": "<d", b"L": "<q"}
+
+
+# Function - Decode FBX string bytes
+def decodeString(data):
+    return data.decode("utf-8", "replace")
+
+
+# Function - Read one property of a binary node
+def readBinaryProperty(f):
+    code = f.read(1)
+    if code in SCALAR_TYPES:
+        fmt = SCALAR_TYPES[code]
+        return struct.unpack(fmt, f.read(struct.calcsize(fmt)))[0]
+    if code in ARRAY_TYPES:
+        length, encoding, compressed_length = struct.unpack("<III", f.read(12))
+        data = f.read(compressed_length)
+        if encoding == 1:
+            data = zlib.decompress(data) # Arrays can be zlib compressed
+        item_format, item_size = ARRAY_TYPES[code]
+        return list(struct.unpack("<%d%s" % (length, item_format), data[:length * item_size]))
+    if code == b"S":
+        return decodeString(f.read(struct.unpack("<I", f.read(4))[0]))
+    if code == b"R":
+        return f.read(struct.unpack("<I", f.read(4))[0])
+    raise ValueError("Unknown FBX property type %r at offset %d" % (code, f.tell() - 1))
+
+
+# Function - Read the header of a binary node: (end_offset, property_count, name), end_offset 0 for the null record
+def readBinaryNodeHeader(f, wide):
+    if wide: # FBX 7.5+ uses 64bit offsets
+        end_offset, property_count, property_bytes, name_length = struct.unpack("<QQQB", f.read(25))
+    else:
+        end_offset, property_count, property_bytes, name_length = struct.unpack("<IIIB", f.read(13))
+    name = decodeString(f.read(name_length))
+    return end_offset, property_count, name
+
+
+# Function - Read a full binary node as (name, properties, children), skipping embedded media
+def readBinaryNode(f, wide, end_offset, property_count, name):
+    properties = [readBinaryProperty(f) for i in range(property_count)]
+    children = []
+    while f.tell() < end_offset:
+        child_end, child_count, child_name = readBinaryNodeHeader(f, wide)
+        if child_end == 0:
+            break # Null record closes the child list
+        if child_name in SKIPPED_CHILDREN:
+            f.seek(child_end) # Skip embedded textures/videos
+            continue
+        children.append(readBinaryNode(f, wide, child_end, child_count, child_name))
+    f.seek(end_offset)
+    return (name, properties, children)
+
+
+# Function - Walk a binary FBX: yield ('header', node), ('object', node) for Material/Texture/Video and ('connection', properties)
+def walkBinary(f):
+    f.seek(23)
+    version = struct.unpack("<I", f.read(4))[0]
+    wide = version >= 7500
+    file_size = os.fstat(f.fileno()).st_size
+
+    while f.tell() < file_size:
+        end_offset, property_count, name = readBinaryNodeHeader(f, wide)
+        if end_offset == 0:
+            break # Null record closes the top level node list
+        if name == HEADER_NODE:
+            yield ("header", readBinaryNode(f, wide, end_offset, property_count, name))
+            continue
+        if name not in ("Objects", "Connections"):
+            f.seek(end_offset) # Skip header, definitions, takes...
+            continue
+
+        for i in range(property_count):
+            readBinaryProperty(f)
+        while f.tell() < end_offset:
+            child_end, child_count, child_name = readBinaryNodeHeader(f, wide)
+            if child_end == 0:
+                break
+            if name == "Objects" and child_name in OBJECT_NODES:
+                yield ("object", readBinaryNode(f, wide, child_end, child_count, child_name))
+            elif name == "Connections" and child_name in ("C", "Connect"):
+                yield ("connection", [readBinaryProperty(f) for j in range(child_count)])
+                f.seek(child_end)
+            else:
+                f.seek(child_end) # Geometry, Model, Deformer... skipped by byte offset
+        f.seek(end_offset)
+
+
+# Function - Split an ASCII FBX value list on commas outside of quotes
+def splitAsciiValues(text):
+    values = []
+    current = []
+    quoted = False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+            current.append(char)
+        elif char == "," and not quoted:
+            values.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    values.append("".join(current))
+    return [parseAsciiValue(value.strip()) for value in values if value.strip() != ""]
+
+
+# Function - Convert one ASCII FBX value to str/int/float
+def parseAsciiValue(value):
+    if value.startswith('"') and value.endswith('"') and len(value) > 1:
+        return value[1:-1]
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+# Function - Split an ASCII FBX line into (key, values, opens_block)
+def parseAsciiLine(line):
+    key, separator, rest = line.partition(":")
+    opens_block = rest.rstrip().endswith("{")
+    if opens_block:
+        rest = rest.rstrip()[:-1]
+    return key.strip(), splitAsciiValues(rest), opens_block
+
+
+# Function - Count block braces on a line, ignoring braces inside strings
+def braceBalance(line):
+    balance = 0
+    quoted = False
+    for char in line:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted:
+            if char == "{":
+                balance += 1
+            elif char == "}":
+                balance -= 1
+    return balance
+
+
+# Function - Read the rest of an ASCII block as (name, properties, children)
+def readAsciiNode(lines, name, properties):
+    children = []
+    for raw_line in lines:
+        line = decodeString(raw_line).strip()
+        if line == "" or line.startswith(";"):
+            continue # Empty line or comment
+        if line.startswith("}"):
+            break
+        key, values, opens_block = parseAsciiLine(line)
+        if opens_block:
+            if key in SKIPPED_CHILDREN:
+                skipAsciiBlock(lines)
+            else:
+                children.append(readAsciiNode(lines, key, values))
+        else:
+            children.append((key, values, []))
+    return (name, properties, children)
+
+
+# Function - Skip the rest of an ASCII block by counting braces
+def skipAsciiBlock(lines):
+    depth = 1
+    for raw_line in lines:
+        depth += braceBalance(decodeString(raw_line))
+        if depth <= 0:
+            return
+
+
+# Function - Walk an ASCII FBX: yield ('header', node), ('object', node) for Material/Texture/Video and ('connection', properties)
+def walkAscii(f):
+    lines = iter(f)
+    for raw_line in lines:
+        line = decodeString(raw_line).strip()
+        if line == "" or line.startswith(";"):
+            continue
+        key, values, opens_block = parseAsciiLine(line)
+        if not opens_block:
+            continue
+        if key == HEADER_NODE:
+            yield ("header", readAsciiNode(lines, key, values))
+            continue
+        if key not in ("Objects", "Connections"):
+            skipAsciiBlock(lines) # Skip header, definitions, takes...
+            continue
+
+        for raw_child in lines:
+            child_line = decodeString(raw_child).strip()
+            if child_line == "" or child_line.startswith(";"):
+                continue
+            if child_line.startswith("}"):
+                break
+            child_key, child_values, child_opens = parseAsciiLine(child_line)
+            if key == "Objects" and child_key in OBJECT_NODES and child_opens:
+                yield ("object", readAsciiNode(lines, child_key, child_values))
+            elif key == "Connections" and child_key in ("C", "Connect"):
+                yield ("connection", child_values)
+                if child_opens:
+                    skipAsciiBlock(lines)
+            elif child_opens:
+                skipAsciiBlock(lines) # Geometry, Model, Deformer... skipped block by block
+
+
+# Function - Name of an FBX object without its class ('name\x00\x01Material' or 'Material::name')
+def objectName(value):
+    if "\x00\x01" in value:
+        return value.split("\x00\x01")[0]
+    if "::" in value:
+        return value.split("::", 1)[1]
+    return value
+
+
+# Function - Find a child node by name
+def findChild(node, name):
+    for child in node[2]:
+        if child[0] == name:
+            return child
+    return None
+
+
+# Function - Read Properties70/Properties60 of a node into {property name: [values]}
+def nodeProperties(node):
+    properties = {}
+    for block_name, first_value in (("Properties70", 4), ("Properties60", 3)):
+        block = findChild(node, block_name)
+        if block is not None:
+            for child in block[2]:
+                if child[0] in ("P", "Property") and child[1]:
+                    properties[child[1][0]] = child[1][first_value:]
+    return properties
+
+
+# Function - First string value of a child node, None if not found
+def childString(node, name):
+    child = findChild(node, name)
+    if child is not None and child[1] and child[1][0]:
+        return child[1][0]
+    return None
+
+
+# Function - Application that wrote the FBX from its FBXHeaderExtension node, None if not recorded
+def headerApplication(header):
+    scene_info = findChild(header, "SceneInfo")
+    if scene_info is None:
+        return None
+    properties = nodeProperties(scene_info)
+    for property_name in APPLICATION_PROPERTIES:
+        value = properties.get(property_name)
+        if value and value[0]:
+            return value[0]
+    return None
+
+
+# Function - Resolve a texture path, falling back to the relative path next to the FBX
+def resolvePath(absolute, relative, fbx_folder):
+    if absolute and os.path.exists(absolute):
+        return absolute
+    if relative:
+        candidate = os.path.normpath(os.path.join(fbx_folder, relative))
+        if os.path.exists(candidate):
+            return candidate
+    return absolute or relative
+
+
+# Function - Read the material manifest of an FBX file
+def readManifest(fbx_path):
+    material_ids = [] # Keep file order
+    materials = {}
+    textures = {}
+    videos = {}
+    connections = []
+    application = None
+
+    with open(fbx_path, "rb") as f:
+        binary = f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+        f.seek(0)
+        for kind, data in (walkBinary(f) if binary else walkAscii(f)):
+            if kind == "connection":
+                connections.append(data)
+                continue
+            if kind == "header":
+                application = headerApplication(data)
+                continue
+            name, properties, children = data
+            if len(properties) < 2:
+                continue # FBX 6 style objects without ids are not supported
+            node_id = properties[0]
+            if name == "Material":
+                material_ids.append(node_id)
+                materials[node_id] = {"name": objectName(properties[1]), "properties": nodeProperties(data)}
+            elif name == "Texture":
+                textures[node_id] = {"file": childString(data, "FileName"), "relative": childString(data, "RelativeFilename")}
+            elif name == "Video":
+                videos[node_id] = {"file": childString(data, "Filename") or childString(data, "FileName"), "relative": childString(data, "RelativeFilename")}
+
+    # Connect textures to material properties and videos to textures
+    material_textures = {}
+    texture_videos = {}
+    for connection in connections:
+        if len(connection) >= 4 and connection[0] == "OP" and connection[1] in textures and connection[2] in materials:
+            material_textures.setdefault(connection[2], {})[connection[3]] = connection[1]
+        elif len(connection) >= 3 and connection[0] == "OO" and connection[1] in videos and connection[2] in textures:
+            texture_videos[connection[2]] = connection[1]
+
+    fbx_folder = os.path.dirname(os.path.abspath(fbx_path))
+    entries = []
+    for material_id in material_ids:
+        material = materials[material_id]
+        properties = material["properties"]
+        connected = material_textures.get(material_id, {})
+        entry = {"id": material_id, "name": material["name"]}
+
+        for slot in SLOTS:
+            entry[slot] = None
+            for property_name in SLOT_PROPERTIES[slot]:
+                if property_name in connected:
+                    texture_id = connected[property_name]
+                    texture = textures[texture_id]
+                    video = videos.get(texture_videos.get(texture_id), {})
+                    entry[slot] = resolvePath(texture["file"] or video.get("file"), texture["relative"] or video.get("relative"), fbx_folder)
+                    break
+
+        color = properties.get("DiffuseColor") or properties.get("Diffuse") or [0.8, 0.8, 0.8]
+        entry["color"] = [float(value) for value in color[:3]]
+
+        # Transparency -> Glass (alpha textures are handled by the alpha slot instead)
+        if "Opacity" in properties:
+            transparent = float(properties["Opacity"][0]) < 1.0
+        else:
+            transparency_color = properties.get("TransparentColor", [1.0, 1.0, 1.0])
+            transparent = float(properties.get("TransparencyFactor", [0.0])[0]) * max(float(value) for value in transparency_color[:3]) > 0.0
+        entry["transparent"] = transparent and entry["alpha"] is None
+        entries.append(entry)
+
+    return {"version": MANIFEST_VERSION, "source": os.path.abspath(fbx_path), "application": application, "materials": entries}
+
+
+# Function - Save a manifest as JSON
+def saveManifest(manifest, path):
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+# Function - Load a manifest saved with saveManifest()
+def loadManifest(path):
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError("Unsupported manifest version %r in %s" % (manifest.get("version"), path))
+    return manifest
+
+
+# Function - Create a bitmap shader inside material and assign it to parameter_id
+def insertBitmap(material, parameter_id, path):
+    import c4d
+    shader = c4d.BaseList2D(c4d.Xbitmap) # Create empty bitmap shader
+    shader[c4d.BITMAPSHADER_FILENAME] = path # Assign texture path
+    material.InsertShader(shader) # Insert bitmap shader into material
+    material[parameter_id] = shader # Assign shader to the material parameter
+    return shader
+
+
+# Function - Create the Standard material the FBX importer would create for a manifest entry (not inserted into a document)
+def buildSourceMaterial(entry):
+    import c4d
+    material = c4d.BaseMaterial(c4d.Mmaterial) # Create new Standard material
+    material.SetName(entry["name"])
+    material[c4d.MATERIAL_COLOR_COLOR] = c4d.Vector(*entry["color"]) # Diffuse Color
+    material[c4d.MATERIAL_USE_TRANSPARENCY] = entry["transparent"] # Transparency -> Glass
+
+    if entry["diffuse"]:
+        insertBitmap(material, c4d.MATERIAL_COLOR_SHADER, entry["diffuse"])
+    if entry["bump"]:
+        material[c4d.MATERIAL_USE_BUMP] = True
+        insertBitmap(material, c4d.MATERIAL_BUMP_SHADER, entry["bump"])
+    if entry["alpha"]:
+        material[c4d.MATERIAL_USE_ALPHA] = True
+        insertBitmap(material, c4d.MATERIAL_ALPHA_SHADER, entry["alpha"])
+
+    # Reflectance layers: index 0 'Specular' (roughness), index 1 'Reflection' (metal) for Metal materials
+    if entry["metal"]:
+        reflection_layer = material.GetReflectionLayerIndex(0) # Default layer moves to index 1 once 'Specular' is added
+        reflection_layer.SetName("Reflection")
+        insertBitmap(material, reflection_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE, entry["metal"])
+        specular_layer = material.AddReflectionLayer() # New layers are added at index 0
+    else:
+        specular_layer = material.GetReflectionLayerIndex(0)
+    specular_layer.SetName("Specular")
+    if entry["roughness"]:
+        insertBitmap(material, specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS, entry["roughness"])
+
+    return material
+
+
+# Main function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the material/texture manifest of an FBX file without loading its geometry.")
+    parser.add_argument("fbx", help="Binary or ASCII FBX file")
+    parser.add_argument("-o", "--output", help="Manifest JSON path (default: <fbx>_manifest.json)")
+    args = parser.parse_args(argv)
+
+    manifest = readManifest(args.fbx)
+    output = args.output or os.path.splitext(args.fbx)[0] + "_manifest.json"
+    saveManifest(manifest, output)
+    print("%d materials -> %s" % (len(manifest["materials"]), output))
+    return 0
+
+
+# Execute main()
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+jv_library
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Converted material library: materials built by earlier runs (any scene) are loaded instead of built again.
+
+                The library of a renderer is a Cinema 4D document (LIBRARY_FOLDER/<renderer>.c4d) holding one material
+                per key, the key is its material name. libraryKey(material_plan) hashes everything buildMaterial writes
+                (material type, values, texture paths & shaders: the source content through the mapping table) and
+                LIBRARY_VERSION, increase it when the converters write materials differently.
+
+                MaterialLibrary.get(material_plan) returns a copy of the library material (None if it is not in the
+                library), put(material_plan, material) adds a copy of a new material. save() (once per run) removes the
+                least recently used materials above max_materials and writes the document, use times & hit/miss
+                statistics are kept in LIBRARY_FOLDER/<renderer>.json.
+"""
+
+# Libraries
+import os
+import json
+import time
+import hashlib
+import c4d
+import jv_mapping
+import jv_textures
+
+
+LIBRARY_VERSION = 1 # Increase when the converters write materials differently, older library materials are not used
+LIBRARY_FOLDER = os.path.join(jv_textures.CACHE_FOLDER, "jv_material_library")
+MAX_MATERIALS = 5000 # Materials kept per renderer, the least recently used are removed
+
+
+# Function - Library key of a material plan (jv_mapping.planMaterial), the material name is not part of it
+def libraryKey(material_plan):
+    content = [LIBRARY_VERSION, material_plan["type"], material_plan["values"], material_plan["shaders"]]
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Class - Library of converted materials of one renderer
+class MaterialLibrary(object):
+    def __init__(self, renderer, folder=LIBRARY_FOLDER, max_materials=MAX_MATERIALS):
+        self.path = os.path.join(folder, "%s.c4d" % renderer)
+        self.index_path = os.path.join(folder, "%s.json" % renderer)
+        self.max_materials = max_materials
+        self.doc = None # Library document, loaded on the first get()
+        self.materials = {} # Key -> library material
+        self.last_used = {} # Key -> time of the last get/put
+        self.totals = {"hits": 0, "misses": 0, "evictions": 0} # All runs
+        self.hits = self.misses = self.added = self.evictions = 0 # This run
+
+    # Function - Load the library document and its index
+    def load(self):
+        if os.path.isfile(self.path):
+            self.doc = c4d.documents.LoadDocument(self.path, c4d.SCENEFILTER_MATERIALS, None)
+        if self.doc is None: # First run or unreadable library
+            self.doc = c4d.documents.BaseDocument()
+        for material in self.doc.GetMaterials():
+            self.materials[material.GetName()] = material
+        if os.path.isfile(self.index_path):
+            try:
+                with open(self.index_path) as f:
+                    index = json.load(f)
+                if index.get("version") == LIBRARY_VERSION:
+                    self.last_used = dict((key, used) for key, used in index["last_used"].items() if key in self.materials)
+                    self.totals.update(index["totals"])
+            except (ValueError, KeyError, IOError):
+                pass # Unreadable index, every material counts as unused
+
+    # Function - Copy of the library material of a material plan, None if it is not in the library
+    def get(self, material_plan):
+        if self.doc is None:
+            self.load()
+        key = libraryKey(material_plan)
+        material = self.materials.get(key)
+        if material is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.last_used[key] = time.time()
+        clone = material.GetClone(c4d.COPYFLAGS_NONE) # Material & shaders, nothing is built
+        if material_plan["name"] is not None:
+            clone.SetName(material_plan["name"])
+        if material_plan["fingerprint"]:
+            jv_mapping.setFingerprint(clone, material_plan["fingerprint"]) # Source of this scene, recognised on the next run
+        return clone
+
+    # Function - Add a copy of the material built from a material plan
+    def put(self, material_plan, material):
+        if self.doc is None:
+            self.load()
+        key = libraryKey(material_plan)
+        if key in self.materials:
+            return
+        clone = material.GetClone(c4d.COPYFLAGS_NONE)
+        clone.SetName(key)
+        self.doc.InsertMaterial(clone)
+        self.materials[key] = clone
+        self.last_used[key] = time.time()
+        self.added += 1
+
+    # Function - Remove the least recently used materials above max_materials, write the library
+    def save(self):
+        if self.doc is None:
+            return
+        if len(self.materials) > self.max_materials:
+            for key in sorted(self.materials, key=lambda key: self.last_used.get(key, 0))[:len(self.materials) - self.max_materials]:
+                self.materials.pop(key).Remove()
+                self.last_used.pop(key, None)
+                self.evictions += 1
+        folder = os.path.dirname(self.path)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        if self.added or self.evictions:
+            c4d.documents.SaveDocument(self.doc, self.path, c4d.SAVEDOCUMENTFLAGS_DONTADDTORECENTLIST, c4d.FORMAT_C4DEXPORT)
+        self.totals["hits"] += self.hits
+        self.totals["misses"] += self.misses
+        self.totals["evictions"] += self.evictions
+        with open(self.index_path, "w") as f:
+            json.dump({"version": LIBRARY_VERSION, "last_used": self.last_used, "totals": self.totals}, f)
+
+    # Function - Summary line for the console (after save())
+    def report(self):
+        lookups = self.hits + self.misses
+        return "Material library: %d hits, %d misses (%.0f%% hit rate), %d added, %d evicted, %d materials (max %d), all runs: %d hits, %d misses" % (
+            self.hits, self.misses, 100.0 * self.hits / lookups if lookups else 0, self.added, self.evictions, len(self.materials),
+            self.max_materials, self.totals["hits"], self.totals["misses"])
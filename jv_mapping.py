@@ -0,0 +1,296 @@
+"""
+jv_mapping
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Shared conversion engine for the JV_FBXMaterialsTo* scripts.
+
+                A renderer is described by a mapping table (see VRAY_MAPPING in JV_FBXMaterialsToVray.py):
+                - material     plugin ID of the new material
+                - values       (parameter, value) written to every material
+                - color        parameters that receive the FBX Diffuse Color
+                - glass        (parameter, value) written to materials using Transparency
+                - metallic     (parameter, value) written to Metal materials (more than one Reflectance layer), optional
+                - slots        (slot, settings) in write order, slot is one of SLOTS, settings:
+                               parameter          material parameter that receives the texture
+                               profile            bitmap Color Profile (1 = Linear), optional
+                               wrapper            shader ID placed between material and bitmap (e.g. normal map), optional
+                               wrapper_parameter  wrapper parameter that receives the bitmap
+                               wrapper_values     (parameter, value) written to the wrapper, optional
+                               values             (parameter, value) written to the material when the slot is used, optional
+                               height             settings used instead when the bump texture is a height map, optional
+
+                compilePlan(table) resolves the table once into flat tuples, newMaterial(plan, slots) then runs the
+                same loop for every material. Add a renderer (Redshift, Octane...) by writing its table, not its code.
+                newMaterial is planMaterial (what to write, as JSON data, see jv_plan.py) + buildMaterial (the writes).
+
+                Source slots use the jv_fbxmanifest entry layout: color, transparent, diffuse, roughness, metal, bump, alpha,
+                plus metallic (Metal material, with or without a metal texture).
+                detectSlots(slots, textures) adds the texture contents found by jv_textures: the Color Profile of every
+                texture (linear/sRGB) and whether the bump texture is a normal map or a height map.
+
+                Converted materials carry a fingerprint of their source slots and plan (container ID FINGERPRINT_ID),
+                re-running a conversion reuses them instead of converting unchanged materials again.
+
+                mergeGroups(materials) finds FBX materials with the same content (Diffuse Color, texture paths, flags and
+                Reflectance layers, the name is ignored): "Wood", "Wood.001", "Wood_2"... are converted once.
+"""
+
+# Libraries
+import os
+import json
+import hashlib
+import collections
+import c4d
+
+
+SLOTS = ("diffuse", "roughness", "metal", "bump", "alpha")
+FINGERPRINT_ID = 1060418 # Container ID of the conversion fingerprint on converted materials
+COLOR_PROFILES = {"linear": 1, "srgb": 2} # jv_textures color space -> BITMAPSHADER_COLORPROFILE
+MERGE_FLAGS = ("MATERIAL_USE_COLOR", "MATERIAL_USE_BUMP", "MATERIAL_USE_NORMAL", "MATERIAL_USE_ALPHA", "MATERIAL_USE_REFLECTION") # Compared by mergeGroups()
+MERGE_REPORT_LIMIT = 20 # Merged materials listed in the console
+
+# Compiled mapping table: every field is a tuple of resolved parameter IDs/values
+WritePlan = collections.namedtuple("WritePlan", "material values color glass metallic slots signature")
+
+
+# Function - Compile the settings of one slot
+def compileSlot(settings):
+    return (settings["parameter"],
+            settings.get("profile"),
+            settings.get("wrapper"),
+            settings.get("wrapper_parameter"),
+            tuple(settings.get("wrapper_values", ())),
+            tuple(settings.get("values", ())))
+
+
+# Function - Compile a mapping table into a write plan
+def compilePlan(table):
+    slots = []
+    for slot, settings in table["slots"]:
+        if slot not in SLOTS:
+            raise ValueError("Unknown source slot: %s" % slot)
+        height = compileSlot(settings["height"]) if "height" in settings else None
+        slots.append((slot,) + compileSlot(settings) + (height,))
+    fields = (table["material"], tuple(table.get("values", ())), tuple(table.get("color", ())),
+              tuple(table.get("glass", ())), tuple(table.get("metallic", ())), tuple(slots))
+    signature = hashlib.sha1(repr(fields).encode("utf-8")).hexdigest() # Changes when the table changes
+    return WritePlan(*(fields + (signature,)))
+
+
+# Function - Texture path of a bitmap shader (None if there is no bitmap)
+def shaderPath(shader):
+    if shader is None:
+        return None
+    return shader[c4d.BITMAPSHADER_FILENAME] or None
+
+
+# Function - Read the source slots of an FBX Standard material
+def readSourceSlots(material):
+    slots = {
+        "color": material[c4d.MATERIAL_COLOR_COLOR], # Diffuse Color
+        "transparent": material[c4d.MATERIAL_USE_TRANSPARENCY] == True, # Transparency -> Glass
+        "diffuse": shaderPath(material[c4d.MATERIAL_COLOR_SHADER]),
+        "bump": shaderPath(material[c4d.MATERIAL_BUMP_SHADER]),
+        "alpha": shaderPath(material[c4d.MATERIAL_ALPHA_SHADER]),
+        "roughness": None,
+        "metal": None,
+        "metallic": material.GetReflectionLayerCount() > 1, # Metal materials have 'Specular' and 'Reflection' layers
+    }
+    specular_layer = material.GetReflectionLayerIndex(0) # Reflectance layer 'Specular' (roughness texture)
+    if specular_layer is not None:
+        slots["roughness"] = shaderPath(material[specular_layer.GetDataID() + c4d.REFLECTION_LAYER_MAIN_SHADER_ROUGHNESS])
+    if slots["metallic"]:
+        metal_layer = material.GetReflectionLayerIndex(1) # Reflectance layer 'Reflection' (metal texture)
+        slots["metal"] = shaderPath(material[metal_layer.GetDataID() + c4d.REFLECTION_LAYER_COLOR_TEXTURE])
+    return slots
+
+
+# Function - Source slots of a jv_fbxmanifest entry
+def manifestSlots(entry):
+    slots = dict((slot, entry.get(slot)) for slot in SLOTS)
+    slots["color"] = c4d.Vector(*entry["color"])
+    slots["transparent"] = bool(entry["transparent"])
+    slots["metallic"] = bool(entry["metal"]) # buildMaterial adds the 'Reflection' layer for the metal texture only
+    return slots
+
+
+# Function - Color profile & height map per slot from jv_textures records, stored in slots["detected"]
+def detectSlots(slots, textures):
+    detected = {}
+    for slot in SLOTS:
+        record = textures.get(slots[slot]) if slots[slot] else None
+        if record is None or record["missing"]:
+            continue
+        if slot == "diffuse":
+            profile = COLOR_PROFILES["linear"] if record["encoding"] == "linear" else None # Colors stay sRGB unless the file is linear (EXR/HDR)
+        else:
+            profile = COLOR_PROFILES.get(record["color_space"]) # Data: gray/normal maps linear, color images sRGB
+        height = slot == "bump" and record["normal_map"] is False
+        if profile is not None or height:
+            detected[slot] = (profile, height)
+    slots["detected"] = detected
+    return slots
+
+
+# Function - Fingerprint of source slots converted with plan
+def fingerprint(plan, slots):
+    color = slots["color"]
+    source = [plan.signature, [round(color.x, 6), round(color.y, 6), round(color.z, 6)], bool(slots["transparent"]), bool(slots.get("metallic"))]
+    source.extend(slots[slot] or "" for slot in SLOTS) # Texture paths
+    detected = slots.get("detected")
+    if detected:
+        source.append(sorted([slot, list(value)] for slot, value in detected.items())) # Texture contents
+    return hashlib.sha1(json.dumps(source).encode("utf-8")).hexdigest() # json: same text for str/unicode paths (Python 2)
+
+
+# Function - Fingerprint stored on a converted material ("" if not converted by jv_mapping)
+def getFingerprint(material):
+    return material.GetDataInstance().GetString(FINGERPRINT_ID)
+
+
+# Function - Store the fingerprint on a converted material
+def setFingerprint(material, value):
+    material.GetDataInstance().SetString(FINGERPRINT_ID, value)
+
+
+# Function - Materials converted by an earlier run with plan, by fingerprint
+def convertedMaterials(materials, plan):
+    converted = {}
+    for material in materials:
+        if material.GetType() == plan.material:
+            value = getFingerprint(material)
+            if value:
+                converted.setdefault(value, material) # First one wins if materials were duplicated
+    return converted
+
+
+# Function - Content key of an FBX Standard material: same key -> same conversion (the name is not part of it)
+def materialKey(material):
+    slots = readSourceSlots(material)
+    color = slots["color"]
+    source = [material.GetType(), [round(color.x, 6), round(color.y, 6), round(color.z, 6)], slots["transparent"],
+              material.GetReflectionLayerCount()] # Metal materials have 2 Reflectance layers
+    source.extend(os.path.normcase(os.path.normpath(slots[slot])) if slots[slot] else "" for slot in SLOTS) # Texture paths
+    source.extend(bool(material[getattr(c4d, flag)]) for flag in MERGE_FLAGS) # Enabled material channels
+    return hashlib.sha1(json.dumps(source).encode("utf-8")).hexdigest()
+
+
+# Function - Duplicate Standard materials -> representative (shortest name, then first in materials)
+def mergeGroups(materials):
+    groups = collections.OrderedDict()
+    for material in materials:
+        if material.GetType() != c4d.Mmaterial: # Only FBX Standard materials are compared
+            continue
+        groups.setdefault(materialKey(material), []).append(material)
+    merged = collections.OrderedDict()
+    for group in groups.values():
+        representative = min(group, key=lambda material: len(material.GetName())) # min keeps the first of equal lengths
+        for material in group:
+            if material is not representative:
+                merged[material] = representative
+    return merged
+
+
+# Function - Console lines for the merged materials (name -> representative name)
+def mergeReport(merged, limit=MERGE_REPORT_LIMIT):
+    representatives = set(merged.values())
+    lines = ["Merge materials: %d duplicates merged into %d materials" % (len(merged), len(representatives))]
+    for material, representative in list(merged.items())[:limit]:
+        lines.append("  %s -> %s" % (material.GetName(), representative.GetName()))
+    if len(merged) > limit:
+        lines.append("  ... and %d more" % (len(merged) - limit))
+    return lines
+
+
+# Function - JSON value of a parameter value (c4d.Vector -> {"vector": [x, y, z]})
+def encodeValue(value):
+    if isinstance(value, c4d.Vector):
+        return {"vector": [value.x, value.y, value.z]}
+    return value
+
+
+# Function - Parameter value of a JSON value
+def decodeValue(value):
+    if isinstance(value, dict):
+        return c4d.Vector(*value["vector"])
+    return value
+
+
+# Function - Material plan: everything newMaterial writes, as JSON data (nothing is created)
+def planMaterial(plan, slots, name=None, fingerprint=None):
+    values = [[parameter, encodeValue(value)] for parameter, value in plan.values] # Settings for both Metal/Dialectric materials
+    color = encodeValue(slots["color"])
+    values.extend([parameter, color] for parameter in plan.color) # Copy Diffuse Color
+    if slots["transparent"]: # Glass - OVERRIDE materials using Transparency
+        values.extend([parameter, encodeValue(value)] for parameter, value in plan.glass)
+    if slots.get("metallic"): # Metal materials, with or without a metal texture
+        values.extend([parameter, encodeValue(value)] for parameter, value in plan.metallic)
+
+    shaders = []
+    detected = slots.get("detected") or {}
+    for slot, parameter, profile, wrapper, wrapper_parameter, wrapper_values, slot_values, height in plan.slots:
+        path = slots[slot]
+        if not path: # Skip if texture is not input
+            continue
+        if slot in detected:
+            detected_profile, is_height = detected[slot]
+            if is_height and height is not None: # Height map in the bump slot -> bump settings
+                parameter, profile, wrapper, wrapper_parameter, wrapper_values, slot_values = height
+            if detected_profile is not None:
+                profile = detected_profile # Color Profile of the texture contents
+        shaders.append({"slot": slot, "path": path, "profile": profile, "parameter": parameter,
+                        "wrapper": wrapper, "wrapper_parameter": wrapper_parameter,
+                        "wrapper_values": [[wrapper_id, encodeValue(value)] for wrapper_id, value in wrapper_values],
+                        "values": [[value_id, encodeValue(value)] for value_id, value in slot_values]})
+    return {"type": plan.material, "name": name, "fingerprint": fingerprint, "values": values, "shaders": shaders}
+
+
+# Function - Create the material of a material plan (not inserted into the document, profiler: jv_profile counters)
+def buildMaterial(material_plan, profiler=None):
+    bitmap_type = c4d.Xbitmap # Resolve constants once per material, not once per write
+    filename_id = c4d.BITMAPSHADER_FILENAME
+    profile_id = c4d.BITMAPSHADER_COLORPROFILE
+    BaseList2D = c4d.BaseList2D
+
+    new_mat = c4d.BaseMaterial(material_plan["type"]) # Create new material
+    for parameter, value in material_plan["values"]:
+        new_mat[parameter] = decodeValue(value)
+    writes = len(material_plan["values"]) # Parameter writes & shader inserts, for jv_profile
+    shaders = 0
+
+    for shader in material_plan["shaders"]:
+        bitmap = BaseList2D(bitmap_type) # Create bitmap shader
+        bitmap[filename_id] = shader["path"] # Assign texture path
+        if shader["profile"] is not None:
+            bitmap[profile_id] = shader["profile"] # Set Color Profile for bitmap
+        new_mat.InsertShader(bitmap) # Insert bitmap shader into material
+        if shader["wrapper"]:
+            wrapper_shader = c4d.BaseShader(shader["wrapper"]) # Create wrapper shader (e.g. Normal Map)
+            new_mat.InsertShader(wrapper_shader) # Insert wrapper shader into material
+            wrapper_shader[shader["wrapper_parameter"]] = bitmap # Bitmap -> wrapper
+            for wrapper_id, value in shader["wrapper_values"]:
+                wrapper_shader[wrapper_id] = decodeValue(value)
+            new_mat[shader["parameter"]] = wrapper_shader # Wrapper -> material
+        else:
+            new_mat[shader["parameter"]] = bitmap # Bitmap -> material
+        for value_id, value in shader["values"]: # Settings enabled by this texture
+            new_mat[value_id] = decodeValue(value)
+        writes += 2 + (shader["profile"] is not None) + len(shader["values"]) + (1 + len(shader["wrapper_values"]) if shader["wrapper"] else 0)
+        shaders += 2 if shader["wrapper"] else 1
+
+    if material_plan["name"] is not None:
+        new_mat.SetName(material_plan["name"])
+    if material_plan["fingerprint"]:
+        setFingerprint(new_mat, material_plan["fingerprint"]) # Recognise this conversion on the next run
+    if profiler is not None:
+        profiler.count("parameter writes", writes)
+        profiler.count("shader inserts", shaders)
+    return new_mat
+
+
+# Function - Create a new material from source slots with a compiled write plan
+def newMaterial(plan, slots, profiler=None):
+    return buildMaterial(planMaterial(plan, slots), profiler)
@@ -0,0 +1,422 @@
+"""
+jv_normals
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3 outside Cinema 4D)
+Description-US: Normal map green flip: DirectX normal maps (3ds Max, Unreal...) as OpenGL normal maps for Cinema 4D, and back.
+
+                generateFlipped(paths) writes a copy of every normal map with the green channel inverted (255 - G,
+                65535 - G for 16 bit) into a content addressed cache: NORMAL_FOLDER/<sha1[:2]>/<sha1>_flipy.<ext>, the
+                same map is flipped once whatever its name, folder or scene. The SHA-1 of a file is kept in an index
+                (path, modification time, size) like the jv_proxy cache. Files already inside the cache are not flipped
+                again (resumed or repeated runs).
+
+                Uncompressed BMP, TGA, TIFF and PSD files (jv_textures.LAYOUTS) are copied and flipped in place through
+                mmap, TILE_ROWS rows per job on a process pool (thread pool inside the Cinema 4D application), a 16K map
+                never sits in memory and one map is split over all cores. PNG files are decoded row by row and written
+                again (one job per file, slower: the row filters are undone in Python). Other formats (JPEG, EXR...) keep
+                the original file. Textures found to be height maps (jv_textures.isNormalMap) keep the original file.
+
+                flipPlanNormals(doc, conversion) points the bump textures of a jv_plan conversion (Corona, V-Ray) at the
+                flipped copies before the materials are built, flipShaders(doc, shaders, undo) does the same for Bitmap
+                shaders (Physical). FLIP_NORMAL_GREEN = True in the converters. Only DirectX normal maps are flipped, the
+                others are OpenGL maps already (directXReason): listed in DIRECTX_NORMAL_MAPS of the converter (file name,
+                path or material name), a file name with a DIRECTX_NAME_HINTS word (brick_normal_DX.png), or a jv_fbxmanifest
+                manifest written by a DIRECTX_APPLICATIONS application. The summary lists the maps treated as DirectX.
+
+                Command line:  python jv_normals.py ./textures   (fill the cache before opening the scenes)
+"""
+
+# Libraries
+import os
+import sys
+import mmap
+import shutil
+import struct
+import zlib
+import re
+import argparse
+import tempfile
+import multiprocessing
+import jv_textures
+import jv_proxy
+import jv_profile
+
+
+NORMAL_FOLDER = os.path.join(jv_textures.CACHE_FOLDER, "jv_normal_cache")
+INDEX_NAME = "index.json" # path, modification time, size -> SHA-1 (inside NORMAL_FOLDER)
+FLIPPED_SUFFIX = "_flipy" # <sha1>_flipy.<ext>
+TILE_ROWS = 256 # Rows flipped per pool job (uncompressed formats)
+PNG_COLOR_TYPES = (2, 6) # RGB, RGBA (palette & gray PNGs are not normal maps)
+PNG_KEPT_CHUNKS = (b"gAMA", b"sRGB", b"iCCP", b"cHRM", b"pHYs") # Copied to the flipped PNG
+INVERT = bytes(bytearray(range(255, -1, -1))) # Translation table: byte -> 255 - byte
+DIRECTX_NAME_HINTS = ("dx", "directx") # Words of file names of DirectX normal maps (split on _ - . and spaces)
+DIRECTX_APPLICATIONS = ("3ds max",) # FBX files written by these applications (jv_fbxmanifest "application") use DirectX normal maps
+STATUSES = ("flipped", "cached", "corrected", "height", "unsupported", "missing", "error") # Result of one texture
+
+
+# Function - Cache path of the flipped copy of an image
+def flippedPath(cache_folder, digest, extension):
+    return os.path.join(cache_folder, digest[:2], "%s%s%s" % (digest, FLIPPED_SUFFIX, extension.lower()))
+
+
+# Function - File inside the cache folder (a flipped copy)
+def inCache(path, cache_folder):
+    return os.path.normcase(os.path.abspath(path)).startswith(os.path.normcase(os.path.abspath(cache_folder)) + os.sep)
+
+
+# Function - PNG the flip supports: RGB/RGBA, 8/16 bit, not interlaced
+def pngSupported(image, header):
+    color_type, compression, filter_method, interlace = struct.unpack(">BBBB", image[25:29])
+    return color_type in PNG_COLOR_TYPES and header["bit_depth"] in (8, 16) and not interlace
+
+
+# Function - Inspect one texture and copy it for the tile jobs (pool worker), job: (path, SHA-1 from the index or None, cache folder)
+def prepareFlip(job):
+    path, digest, cache_folder = job
+    result = {"path": path, "missing": True, "size": None, "mtime": None, "sha1": digest, "flipped": None, "status": "missing",
+              "error": None, "format": None, "header": None, "temporary": None}
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return result
+    result.update(missing=False, size=stat.st_size, mtime=stat.st_mtime)
+    try:
+        with open(path, "rb") as f:
+            if stat.st_size == 0:
+                raise ValueError("Empty file")
+            image = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) # Only the pages that are read are loaded
+            try:
+                header = jv_textures.readImageHeader(path, image[:jv_textures.HEADER_BYTES], image)
+                if header is None or not header["width"] or not header["height"]:
+                    raise ValueError("Unknown image format")
+                layout = jv_textures.LAYOUTS[header["format"]](image, header) if header["format"] in jv_textures.LAYOUTS else None
+                if layout is not None:
+                    samples = jv_textures.layoutSamples(image, layout)
+                elif header["format"] == "png" and pngSupported(image, header):
+                    samples = jv_textures.pngSamples(image, header)
+                else:
+                    samples = None
+                result.update(format=header["format"], header=header)
+                if (header["channels"] or 3) < 3 or (samples and not jv_textures.isNormalMap(samples)):
+                    result["status"] = "height" # Gray or not a tangent space normal map
+                elif layout is None and samples is None:
+                    result["status"] = "unsupported" # Compressed: JPEG, EXR, RLE TGA, LZW TIFF...
+                else:
+                    result["sha1"] = result["sha1"] or jv_proxy.contentHash(image)
+                    result["flipped"] = flippedPath(cache_folder, result["sha1"], os.path.splitext(path)[1])
+                    if os.path.isfile(result["flipped"]):
+                        result["status"] = "cached"
+                    else:
+                        jv_proxy.makeFolder(os.path.dirname(result["flipped"]))
+                        handle, result["temporary"] = tempfile.mkstemp(".tmp", os.path.basename(result["flipped"]) + ".", os.path.dirname(result["flipped"]))
+                        os.close(handle) # Unique per texture, flipped after all textures are prepared
+                        if layout is not None:
+                            shutil.copyfile(path, result["temporary"]) # Flipped in place by the tile jobs
+                        result["status"] = "flipped"
+            finally:
+                image.close()
+    except Exception as error: # Truncated/corrupt image
+        result.update(flipped=None, status="error", error="%s: %s" % (type(error).__name__, error))
+    return result
+
+
+# Function - Invert the green samples of stored rows first to last - 1 of an uncompressed image, in place through mmap
+def flipRows(path, image_format, header, first, last):
+    with open(path, "r+b") as f:
+        image = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) # Other workers write the other rows of the same file
+        try:
+            layout = jv_textures.LAYOUTS[image_format](image, header)
+            span = (layout.width - 1) * layout.pixel_stride + 1
+            for y in range(first, last):
+                green = layout.row_start(y)[1] - layout.high_byte
+                for start in range(green, green + layout.sample_bytes): # Both bytes of 16 bit samples
+                    if start + span > len(image):
+                        raise ValueError("Truncated image")
+                    image[start:start + span:layout.pixel_stride] = image[start:start + span:layout.pixel_stride].translate(INVERT)
+            image.flush()
+        finally:
+            image.close()
+
+
+# Function - Unfiltered rows of a PNG (8/16 bit, not interlaced), decompressed as they are needed
+def pngRows(image, header):
+    pixel_bytes = header["channels"] * header["bit_depth"] // 8
+    stride = header["width"] * pixel_bytes
+    decoder = zlib.decompressobj()
+    pending = b""
+    previous = bytearray(stride)
+    offset = 8
+    while offset + 8 <= len(image):
+        length, kind = struct.unpack(">I4s", image[offset:offset + 8])
+        if kind == b"IDAT":
+            for start in range(offset + 8, offset + 8 + length, jv_textures.HEADER_BYTES): # Feed large chunks in pieces
+                pending += decoder.decompress(image[start:min(start + jv_textures.HEADER_BYTES, offset + 8 + length)])
+                position = 0
+                while len(pending) - position > stride:
+                    row = jv_textures.unfilterRow(bytearray(pending[position + 1:position + 1 + stride]), previous,
+                                                  bytearray(pending[position:position + 1])[0], pixel_bytes)
+                    position += stride + 1
+                    yield row
+                    previous = row
+                pending = pending[position:]
+        elif kind == b"IEND":
+            break
+        offset += 12 + length
+
+
+# Function - Write a PNG with the green samples inverted, one row in memory at a time
+def flipPng(path, temporary, header):
+    with open(path, "rb") as f:
+        image = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            color_type = struct.unpack(">B", image[25:26])[0]
+            sample_bytes = header["bit_depth"] // 8
+            pixel_bytes = header["channels"] * sample_bytes
+            chunks = []
+            offset = 8
+            while offset + 8 <= len(image): # Color space chunks are kept
+                length, kind = struct.unpack(">I4s", image[offset:offset + 8])
+                if kind in PNG_KEPT_CHUNKS:
+                    chunks.append((kind, image[offset + 8:offset + 8 + length]))
+                elif kind in (b"IDAT", b"IEND"):
+                    break
+                offset += 12 + length
+            counted = [0]
+
+            # Function - Rows with the green samples inverted
+            def flippedRows():
+                for row in pngRows(image, header):
+                    row = bytearray(row) # The decoder keeps the unflipped row for the next row filter
+                    for start in range(sample_bytes, 2 * sample_bytes):
+                        row[start::pixel_bytes] = bytes(row[start::pixel_bytes]).translate(INVERT)
+                    counted[0] += 1
+                    yield row
+
+            jv_proxy.writePng(temporary, header["width"], header["height"], flippedRows(), color_type, header["bit_depth"], chunks)
+            if counted[0] != header["height"]:
+                raise ValueError("Truncated image")
+        finally:
+            image.close()
+
+
+# Function - One flip job (pool worker): ("rows", temporary, format, header, first, last) or ("png", path, temporary, header), returns an error or None
+def runFlip(job):
+    try:
+        if job[0] == "rows":
+            flipRows(*job[1:])
+        else:
+            flipPng(*job[1:])
+    except Exception as error:
+        return "%s: %s" % (type(error).__name__, error)
+    return None
+
+
+# Function - Flip jobs of prepared textures: TILE_ROWS rows per job, one job per PNG (the longest jobs first)
+def flipJobs(results, tile_rows=TILE_ROWS):
+    jobs = []
+    owners = []
+    for result in results:
+        if result["status"] != "flipped":
+            continue
+        if result["format"] == "png":
+            jobs.insert(0, ("png", result["path"], result["temporary"], result["header"]))
+            owners.insert(0, result)
+        else:
+            for first in range(0, result["header"]["height"], tile_rows):
+                jobs.append(("rows", result["temporary"], result["format"], result["header"], first, min(first + tile_rows, result["header"]["height"])))
+                owners.append(result)
+    return jobs, owners
+
+
+# Function - Green flipped copies of texture paths, returns path -> result (status, flipped path or None)
+def generateFlipped(paths, cache_folder=NORMAL_FOLDER, workers=None, tile_rows=TILE_ROWS):
+    paths = sorted(set(paths))
+    index = jv_textures.TextureCache(os.path.join(cache_folder, INDEX_NAME)) # SHA-1 of unchanged files
+    results = []
+    jobs = []
+    for path in paths:
+        if inCache(path, cache_folder): # Already a flipped copy
+            results.append({"path": path, "missing": not os.path.isfile(path), "sha1": None, "flipped": path, "status": "corrected", "error": None})
+            continue
+        try:
+            record = index.get(path, os.stat(path))
+        except OSError:
+            record = None # Missing, reported by prepareFlip
+        jobs.append((path, record["sha1"] if record is not None else None, cache_folder))
+
+    if jobs:
+        pool = jv_proxy.createPool(max(1, workers or multiprocessing.cpu_count())) # Flipping is CPU & disk bound
+        try:
+            prepared = pool.map(prepareFlip, jobs, chunksize=1)
+            flipping = set()
+            for result in prepared: # Same content under another name: flipped once
+                if result["status"] == "flipped" and result["flipped"] in flipping:
+                    if os.path.isfile(result["temporary"]):
+                        os.remove(result["temporary"])
+                    result.update(status="cached", temporary=None)
+                flipping.add(result["flipped"])
+            flip_jobs, owners = flipJobs(prepared, tile_rows)
+            errors = pool.map(runFlip, flip_jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        for result, error in zip(owners, errors):
+            if error and not result["error"]:
+                result.update(status="error", error=error) # One failed tile fails the texture
+        for result in prepared:
+            if result["temporary"] is None:
+                pass
+            elif result["status"] == "error":
+                if os.path.isfile(result["temporary"]):
+                    os.remove(result["temporary"])
+                result["flipped"] = None
+            else:
+                try:
+                    os.rename(result["temporary"], result["flipped"]) # Other scripts never see half a map
+                except OSError: # Windows: the same map was written by another worker meanwhile
+                    os.remove(result["temporary"])
+            for key in ("format", "header", "temporary"):
+                result.pop(key)
+            if result["sha1"]:
+                index.put({"path": result["path"], "missing": False, "size": result["size"], "mtime": result["mtime"], "sha1": result["sha1"]})
+        results.extend(prepared)
+    if index.changed:
+        jv_proxy.makeFolder(cache_folder)
+        index.save()
+    return dict((result["path"], result) for result in results)
+
+
+# Function - Counts for the console from generateFlipped results
+def countResults(results):
+    counts = dict((status, 0) for status in STATUSES)
+    for result in results.values():
+        counts[result["status"]] += 1
+    return counts
+
+
+# Function - Texture folders of a document (relative paths are searched there like Cinema 4D does)
+def searchFolders(doc):
+    document_path = doc.GetDocumentPath()
+    return [document_path, os.path.join(document_path, "tex")] if document_path else []
+
+
+# Function - Why the normal map path of material_name is a DirectX map, None for an OpenGL map (kept as it is)
+# directx_maps: file names, paths or material names listed by the user, application: program that wrote the FBX (manifest)
+def directXReason(path, material_name, directx_maps=(), application=None, cache_folder=NORMAL_FOLDER):
+    listed = set(name.lower() for name in directx_maps)
+    if path.lower() in listed or os.path.basename(path).lower() in listed or material_name.lower() in listed:
+        return "listed"
+    if inCache(path, cache_folder):
+        return "flipped by an earlier run"
+    words = re.split(r"[_\-.\s]+", os.path.basename(path).lower())
+    if any(hint in words for hint in DIRECTX_NAME_HINTS) or "directx" in os.path.basename(path).lower():
+        return "file name"
+    if application and any(name in application.lower() for name in DIRECTX_APPLICATIONS):
+        return "written by %s" % application
+    return None
+
+
+# Function - Count results & list the maps treated as DirectX (material, path, reason), sorted for the console
+def directXCounts(results, directx, total):
+    counts = countResults(results)
+    counts.update(shaders=total, directx=sorted(set(directx)))
+    return counts
+
+
+# Function - Point the DirectX bump textures of a jv_plan conversion at their flipped copies, returns counts for the console
+def flipPlanNormals(doc, conversion, directx_maps=(), cache_folder=NORMAL_FOLDER, workers=None, profiler=jv_profile.NULL_PROFILER):
+    search_folders = searchFolders(doc)
+    application = conversion.get("application") # jv_fbxmanifest manifest the plan was made from
+    shaders = []
+    directx = []
+    for material_plan in conversion["materials"]:
+        for shader in material_plan["shaders"]:
+            if shader["slot"] == "bump":
+                reason = directXReason(shader["path"], material_plan["name"], directx_maps, application, cache_folder)
+                if reason is not None:
+                    shaders.append(shader)
+                    directx.append((material_plan["name"], shader["path"], reason))
+    total = sum(1 for material_plan in conversion["materials"] for shader in material_plan["shaders"] if shader["slot"] == "bump")
+    resolved = dict((shader["path"], jv_textures.resolvePath(shader["path"], search_folders)) for shader in shaders)
+    results = generateFlipped(resolved.values(), cache_folder, workers)
+    counts = directXCounts(results, directx, total)
+    profiler.count("normal maps flipped", counts["flipped"])
+    replaced = 0
+    for shader in shaders:
+        flipped = results[resolved[shader["path"]]]["flipped"]
+        if flipped:
+            shader["path"] = flipped # Written by buildMaterial (and part of the jv_library key)
+            replaced += 1
+    counts.update(replaced=replaced)
+    return counts
+
+
+# Function - Point the DirectX Bitmap shaders (normal maps) at their flipped copies with undo, returns counts for the console
+# shaders: (material name, Bitmap shader) pairs
+def flipShaders(doc, shaders, undo, directx_maps=(), application=None, cache_folder=NORMAL_FOLDER, workers=None, profiler=jv_profile.NULL_PROFILER):
+    import c4d
+    search_folders = searchFolders(doc)
+    total = len(shaders)
+    directx = []
+    selected = []
+    for name, shader in shaders:
+        reason = directXReason(shader[c4d.BITMAPSHADER_FILENAME], name, directx_maps, application, cache_folder) if shader[c4d.BITMAPSHADER_FILENAME] else None
+        if reason is not None:
+            selected.append((shader, jv_textures.resolvePath(shader[c4d.BITMAPSHADER_FILENAME], search_folders)))
+            directx.append((name, shader[c4d.BITMAPSHADER_FILENAME], reason))
+    results = generateFlipped([path for shader, path in selected], cache_folder, workers)
+    counts = directXCounts(results, directx, total)
+    profiler.count("normal maps flipped", counts["flipped"])
+    replaced = 0
+    for shader, path in selected:
+        flipped = results[path]["flipped"]
+        if flipped and flipped != path:
+            undo.AddUndo(c4d.UNDOTYPE_CHANGE, shader) # Change undo
+            shader[c4d.BITMAPSHADER_FILENAME] = flipped
+            replaced += 1
+        elif flipped:
+            replaced += 1 # Flipped by an earlier (cancelled) run
+    counts.update(replaced=replaced)
+    return counts
+
+
+# Function - Summary for the console: counts, then every map treated as DirectX and why
+def summary(counts):
+    lines = ["Normal maps: %d of %d bump textures use a green flipped copy, %d kept as OpenGL maps (%d flipped, %d cached, %d already flipped), "
+             "originals kept: %d height maps, %d unsupported, %d missing, %d errors" % (counts["replaced"], counts["shaders"],
+             counts["shaders"] - len(counts["directx"]), counts["flipped"], counts["cached"], counts["corrected"], counts["height"],
+             counts["unsupported"], counts["missing"], counts["error"])]
+    for name, path, reason in counts["directx"]:
+        lines.append("  DirectX: %s (%s, %s)" % (path, name, reason))
+    return "\n".join(lines)
+
+
+# Main function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write green flipped copies (DirectX <-> OpenGL) of normal maps into the normal map cache.")
+    parser.add_argument("inputs", nargs="+", help="Normal maps and/or folders (searched recursively)")
+    parser.add_argument("--cache", default=NORMAL_FOLDER, help="Cache folder (default: %(default)s)")
+    parser.add_argument("--tile-rows", type=int, default=TILE_ROWS, help="Rows per job (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Processes (default: cores)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                paths.extend(os.path.join(folder, name) for name in files if name.lower().endswith(jv_textures.IMAGE_EXTENSIONS))
+        else:
+            paths.append(path)
+
+    results = generateFlipped(paths, args.cache, args.workers, args.tile_rows)
+    for result in sorted(results.values(), key=lambda result: result["path"]):
+        print("%-11s %s%s" % (result["status"], result["path"], " -> %s" % result["flipped"] if result["flipped"] else (": %s" % result["error"] if result["error"] else "")))
+    return 1 if any(result["status"] in ("missing", "error") for result in results.values()) else 0
+
+
+# Execute main()
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+jv_plan
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Plan a material conversion without changing the document, then apply it in one pass.
+
+                planScene(doc, plan, ...) / planManifest(doc, plan, ...) read the source materials and return a
+                conversion plan, plain JSON data:
+                - materials   material plans to create (jv_mapping.planMaterial: values, shaders, name, fingerprint)
+                - remaps      source material (index & name in doc.GetMaterials()) -> new or reused material, tag count
+                - delete      source materials left without users, removed after the remap (other unused materials are kept)
+                              material_users: Texture Tags of every object, a material also used outside object_types stays
+                - merged      duplicate source materials (jv_mapping.mergeGroups) -> their representative, converted once
+                - application program that wrote the FBX of a manifest plan (jv_fbxmanifest, used by jv_normals), else None
+
+                applyConversion(doc, conversion, ...) builds every new material before the document is touched (an
+                error leaves the scene as it was), then inserts the materials, remaps the Texture Tags and removes
+                the source materials of delete that no Texture Tag of any object uses anymore. With a jv_library library, materials converted by earlier runs are copied from it.
+                With a jv_scheduler scheduler, building and remapping run in chunks and ESC cancels between them: the
+                materials built so far are inserted, tags are either remapped or untouched, and running the script
+                again resumes (the fingerprints reuse the inserted materials, the source materials are removed at the end).
+
+                savePlan/loadPlan write and read the plan (review a dry run, apply it later on the same scene).
+"""
+
+# Libraries
+import json
+import c4d
+import jv_mapping
+import jv_scene
+import jv_profile
+import jv_scheduler
+
+
+PLAN_VERSION = 1
+
+
+# Function - Empty conversion plan for a write plan
+def newConversion(doc, plan, object_types=None):
+    return {"version": PLAN_VERSION, "renderer": plan.material, "signature": plan.signature, "document": doc.GetDocumentName(),
+            "object_types": list(object_types) if object_types is not None else None, "materials": [], "remaps": [], "delete": [], "merged": [],
+            "application": None}
+
+
+# Function - Plan the conversion of the scene materials (material_tags: material -> Texture Tags to remap)
+# material_users: material -> Texture Tags of every object (jv_scene.SceneIndex.materialTags()), None if material_tags are all of them
+# merged: duplicate material -> representative (jv_mapping.mergeGroups), duplicates get the representative's conversion
+def planScene(doc, plan, materials, material_tags, material_users=None, textures=None, object_types=None, merged=None, profiler=jv_profile.NULL_PROFILER):
+    conversion = newConversion(doc, plan, object_types)
+    converted = jv_mapping.convertedMaterials(materials, plan) # Materials of earlier runs by fingerprint
+    existing = dict((material, index) for index, material in enumerate(materials))
+    merged = merged or {}
+    targets = {} # Representative -> target
+    for index, material in enumerate(materials):
+        if material.GetType() == plan.material or material in merged: # Skip materials already converted & duplicates
+            continue
+        with profiler.item("material", material): # Time per material
+            slots = jv_mapping.readSourceSlots(material) # Diffuse Color, Glass & texture paths
+            if textures is not None:
+                jv_mapping.detectSlots(slots, textures) # Color Profiles & normal/height map of the textures
+            fingerprint = jv_mapping.fingerprint(plan, slots)
+            if fingerprint in converted: # Unchanged material -> reuse the earlier conversion
+                target = ["existing", existing[converted[fingerprint]]]
+            else:
+                target = ["new", len(conversion["materials"])]
+                conversion["materials"].append(jv_mapping.planMaterial(plan, slots, material.GetName(), fingerprint))
+        targets[material] = target
+        addRemap(conversion, index, material, target, material_tags, material_users)
+
+    for material, representative in merged.items(): # Duplicates: Texture Tags go to the representative's material
+        index = existing[material]
+        addRemap(conversion, index, material, targets[representative], material_tags, material_users)
+        conversion["merged"].append({"source": index, "name": material.GetName(), "into": representative.GetName()})
+    return conversion
+
+
+# Function - Add the Texture Tags of source material to the plan, and the material to delete if nothing else uses it
+def addRemap(conversion, index, material, target, material_tags, material_users):
+    tags = material_tags.get(material, [])
+    conversion["remaps"].append({"source": index, "name": material.GetName(), "target": target, "tags": len(tags)})
+    users = material_users.get(material, []) if material_users is not None else tags
+    if len(users) == len(tags): # Every user is remapped, nothing uses the source material afterwards
+        conversion["delete"].append({"source": index, "name": material.GetName()})
+
+
+# Function - Plan the conversion of jv_fbxmanifest entries (new materials only), application: manifest["application"]
+def planManifest(doc, plan, entries, textures=None, application=None):
+    conversion = newConversion(doc, plan)
+    conversion["application"] = application
+    converted = jv_mapping.convertedMaterials(doc.GetMaterials(), plan) # Materials of earlier runs by fingerprint
+    for entry in entries:
+        slots = jv_mapping.manifestSlots(entry) # Manifest entries already hold the source slots
+        if textures is not None:
+            jv_mapping.detectSlots(slots, textures) # Color Profiles & normal/height map of the textures
+        fingerprint = jv_mapping.fingerprint(plan, slots)
+        if fingerprint not in converted: # Skip unchanged materials
+            conversion["materials"].append(jv_mapping.planMaterial(plan, slots, entry["name"], fingerprint))
+    return conversion
+
+
+# Function - Raise ValueError if a (loaded) plan does not fit plan and the document materials
+def checkConversion(conversion, plan, materials):
+    if conversion.get("version") != PLAN_VERSION:
+        raise ValueError("Unsupported conversion plan version: %s" % conversion.get("version"))
+    if conversion["renderer"] != plan.material or conversion["signature"] != plan.signature:
+        raise ValueError("Conversion plan was made with a different mapping table")
+    for entry in conversion["remaps"] + conversion["delete"]:
+        if entry["source"] >= len(materials) or materials[entry["source"]].GetName() != entry["name"]:
+            raise ValueError("Conversion plan does not match the scene materials (%s)" % entry["name"])
+
+
+# Function - Apply a conversion plan, returns counts for the console (material_tags: Texture Tags used for planning, None for a loaded plan)
+# material_users: Texture Tags of every object by material (None: collected from the scene), planned materials still in use are kept
+# library: jv_library.MaterialLibrary, materials converted by earlier runs are copied from it instead of built
+def applyConversion(doc, conversion, undo, profiler=jv_profile.NULL_PROFILER, material_tags=None, remove_unused=True, library=None,
+                    scheduler=None, material_users=None):
+    materials = doc.GetMaterials()
+    new_materials = []
+    counts = {"tags": 0, "deleted": 0, "kept": 0}
+
+    # Function - Build the new materials, one step per material
+    def buildMaterials():
+        for material_plan in conversion["materials"]:
+            new_material = library.get(material_plan) if library is not None else None
+            if new_material is None: # Not in the library
+                new_material = jv_mapping.buildMaterial(material_plan, profiler)
+                if library is not None:
+                    library.put(material_plan, new_material)
+            new_materials.append(new_material)
+            yield new_material
+
+    # Function - Insert the built materials into the document
+    def insertMaterials():
+        for new_material in new_materials:
+            doc.InsertMaterial(new_material) # Insert new material into document
+            undo.AddUndo(c4d.UNDOTYPE_NEW, new_material) # New undo
+        profiler.count("materials created", len(new_materials))
+
+    # Function - Remap the Texture Tags, one step per source material
+    def remapTags():
+        for entry in conversion["remaps"]:
+            kind, index = entry["target"]
+            target = new_materials[index] if kind == "new" else materials[index]
+            for tag in material_tags.get(materials[entry["source"]], []):
+                undo.AddUndo(c4d.UNDOTYPE_CHANGE, tag) # Change undo
+                tag.SetMaterial(target) # Replace source material with the converted material
+                counts["tags"] += 1
+            yield entry
+
+    # Build every material first, the document is only changed when all of them were created
+    with profiler.stage("create material"):
+        try:
+            jv_scheduler.runSteps(scheduler, "create materials", buildMaterials(), len(conversion["materials"]))
+        except jv_scheduler.Cancelled:
+            insertMaterials() # Keep the finished materials, the next run finds them by fingerprint
+            raise
+
+    with profiler.stage("insert materials"):
+        insertMaterials()
+
+    if conversion["remaps"]:
+        with profiler.stage("remap tags"):
+            if material_tags is None or material_users is None:
+                index = jv_scene.sceneIndex(doc) # Texture Tags by material of the current scene
+                if material_tags is None:
+                    material_tags = index.materialTags(conversion["object_types"])
+                material_users = index.materialTags()
+            try:
+                jv_scheduler.runSteps(scheduler, "remap tags", remapTags(), len(conversion["remaps"]))
+            finally:
+                profiler.count("tags remapped", counts["tags"])
+        if remove_unused:
+            with profiler.stage("remove unused materials"):
+                for entry in conversion["delete"]: # Only the planned source materials, other unused materials stay
+                    material = materials[entry["source"]]
+                    if any(tag.GetMaterial() == material for tag in material_users.get(material, [])): # Used by a tag that was not remapped
+                        counts["kept"] += 1
+                        continue
+                    undo.AddDeleteUndo(material) # Delete undo
+                    material.Remove()
+                    counts["deleted"] += 1
+                profiler.count("materials kept in use", counts["kept"])
+    return {"created": len(new_materials), "reused": sum(1 for entry in conversion["remaps"] if entry["target"][0] == "existing"),
+            "tags": counts["tags"], "deleted": counts["deleted"], "kept": counts["kept"]}
+
+
+# Function - Save a conversion plan as JSON
+def savePlan(conversion, path):
+    with open(path, "w") as f:
+        json.dump(conversion, f, indent=1, sort_keys=True)
+
+
+# Function - Load a conversion plan saved by savePlan
+def loadPlan(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# Function - Summary line for the console
+def summary(conversion):
+    reused = sum(1 for entry in conversion["remaps"] if entry["target"][0] == "existing")
+    return "Conversion plan: %d materials to create, %d reused, %d merged, %d tags to remap, %d materials to delete" % (
+        len(conversion["materials"]), reused, len(conversion.get("merged", ())), sum(entry["tags"] for entry in conversion["remaps"]),
+        len(conversion["delete"]))
@@ -0,0 +1,124 @@
+"""
+jv_preview
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Viewport texture budget: Texture Preview Sizes of the converted materials within a total memory budget.
+
+                Every texture of a material is kept in the viewport as a preview bitmap of the material's Texture Preview
+                Size (4 bytes per pixel, 1024x1024 = 4MB), never larger than the texture itself (resolution from the
+                jv_textures preflight, unknown textures count at the full preview size).
+
+                allocatePreviews(entries, budget) starts every material at MIN_PREVIEW and raises the size of the
+                material with the most users (Texture Tags) per extra byte, until the next step no longer fits the
+                budget or MAX_PREVIEW is reached. uniformPreview(entries, budget) is the largest size shared by all
+                materials (V-Ray only has one Editor Map Size in its preferences).
+
+                budgetReport(entries, values, budget) returns the console lines: a table of the chosen sizes and the
+                projected total.
+"""
+
+# Libraries
+import heapq
+
+
+PREVIEW_SIZES = {6: 64, 7: 128, 8: 256, 9: 512, 10: 1024, 11: 2048, 12: 4096, 13: 8192} # Texture Preview Size -> pixels
+MIN_PREVIEW = 6 # 64x64
+MAX_PREVIEW = 10 # 1024x1024, the size the converters used before the budget
+BYTES_PER_PIXEL = 4 # 8 bit RGBA preview bitmaps
+MB = 1024 * 1024
+REPORT_LIMIT = 20 # Materials listed in the table
+
+
+# Function - Viewport memory of a material's textures (longest sides, None if unknown) at a Texture Preview Size
+def previewBytes(sides, value):
+    size = PREVIEW_SIZES[value]
+    return sum(min(size, side or size) ** 2 * BYTES_PER_PIXEL for side in sides)
+
+
+# Function - Longest side of every texture path (preflight records by path, None if unknown)
+def textureSides(paths, textures):
+    sides = []
+    for path in paths:
+        record = textures.get(path)
+        sides.append(max(record["width"], record["height"]) if record and record.get("width") and record.get("height") else None)
+    return sides
+
+
+# Function - Budget entries of a jv_plan conversion: name, users (Texture Tags remapped to the new material), texture sides
+def conversionEntries(conversion, textures):
+    users = [0] * len(conversion["materials"])
+    for entry in conversion["remaps"]:
+        kind, index = entry["target"]
+        if kind == "new":
+            users[index] += entry["tags"]
+    return [{"name": material_plan["name"], "users": users[index], "sides": textureSides([shader["path"] for shader in material_plan["shaders"]], textures)}
+            for index, material_plan in enumerate(conversion["materials"])]
+
+
+# Function - Texture Preview Size per entry within budget (bytes), returns the sizes and their total
+def allocatePreviews(entries, budget, min_value=MIN_PREVIEW, max_value=MAX_PREVIEW):
+    values = [min_value] * len(entries)
+    total = sum(previewBytes(entry["sides"], min_value) for entry in entries)
+
+    # Function - Priority of raising entry index one size: users per extra byte (materials without users count once)
+    def upgrade(index):
+        extra = previewBytes(entries[index]["sides"], values[index] + 1) - previewBytes(entries[index]["sides"], values[index])
+        return (-max(entries[index]["users"], 1) / float(extra), extra, index) if extra else None
+
+    heap = [item for item in (upgrade(index) for index in range(len(entries))) if item is not None] if min_value < max_value else []
+    heapq.heapify(heap)
+    while heap:
+        priority, extra, index = heapq.heappop(heap)
+        if total + extra > budget: # Too big for what is left, smaller textures may still fit
+            continue
+        values[index] += 1
+        total += extra
+        if values[index] < max_value:
+            item = upgrade(index)
+            if item is not None: # Textures are smaller than the next size, nothing to gain
+                heapq.heappush(heap, item)
+    return values, total
+
+
+# Function - Largest Texture Preview Size of all entries within budget (bytes), returns the size and the total
+def uniformPreview(entries, budget, min_value=MIN_PREVIEW, max_value=MAX_PREVIEW):
+    value = min_value
+    for candidate in range(min_value + 1, max_value + 1):
+        if sum(previewBytes(entry["sides"], candidate) for entry in entries) > budget:
+            break
+        value = candidate
+    return value, sum(previewBytes(entry["sides"], value) for entry in entries)
+
+
+# Function - Report lines: sizes histogram, the materials with the most users and the projected total
+def budgetReport(entries, values, budget, limit=REPORT_LIMIT):
+    total = sum(previewBytes(entry["sides"], value) for entry, value in zip(entries, values))
+    lines = ["Viewport texture budget: %.1f MB of %.1f MB for %d materials%s" % (total / float(MB), budget / float(MB), len(entries),
+             " - over budget" if total > budget else "")]
+    histogram = {}
+    for entry, value in zip(entries, values):
+        count, size = histogram.get(value, (0, 0))
+        histogram[value] = (count + 1, size + previewBytes(entry["sides"], value))
+    for value, (count, size) in sorted(histogram.items()):
+        lines.append("  %5dx%-5d %6d materials %10.1f MB" % (PREVIEW_SIZES[value], PREVIEW_SIZES[value], count, size / float(MB)))
+    order = sorted(range(len(entries)), key=lambda index: -entries[index]["users"])
+    lines.append("  %-40s %6s %8s %11s %10s" % ("Material", "Users", "Textures", "Preview", "MB"))
+    for index in order[:limit]:
+        entry = entries[index]
+        lines.append("  %-40s %6d %8d %11s %10.1f" % (entry["name"][:40], entry["users"], len(entry["sides"]),
+                     "%dx%d" % (PREVIEW_SIZES[values[index]], PREVIEW_SIZES[values[index]]), previewBytes(entry["sides"], values[index]) / float(MB)))
+    if len(order) > limit:
+        lines.append("  ... and %d more" % (len(order) - limit))
+    return lines
+
+
+# Function - Set the Texture Preview Size parameter in the material plans of a jv_plan conversion
+def setPreviewValues(conversion, parameter, values):
+    for material_plan, value in zip(conversion["materials"], values):
+        if any(item[0] == parameter for item in material_plan["values"]):
+            material_plan["values"] = [[item[0], value if item[0] == parameter else item[1]] for item in material_plan["values"]]
+        else:
+            material_plan["values"].append([parameter, value])
@@ -0,0 +1,207 @@
+"""
+jv_profile
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3)
+Description-US: Stage timings and counters for the JV_ scripts.
+
+                Set PROFILE = True at the top of a script (or jv_batch.py --profile) to collect:
+                - seconds and calls per stage (scene index, material creation, tag remapping, remove unused materials, undo...)
+                - seconds per material
+                - counters (parameter writes, shader inserts, undo entries, objects...)
+                - peak Python memory with PROFILE_MEMORY = True (tracemalloc, Python 3 only)
+
+                A short summary is printed in the console, PROFILE_REPORT = "report.json" or "report.csv" saves everything.
+                Stages can be nested (undo is timed inside material creation), stage times include their nested stages.
+
+                With PROFILE = False the scripts use NULL_PROFILER: stage(), item() and count() do nothing, profiling can
+                stay in the code of production runs.
+"""
+
+# Libraries
+import sys
+import csv
+import json
+import time
+
+try:
+    import tracemalloc # Python 3.4+
+except ImportError:
+    tracemalloc = None
+
+SUMMARY_ITEMS = 5 # Slowest stages/materials listed in the console summary
+
+clock = getattr(time, "perf_counter", time.time) # Python 2: time.time
+
+
+# Class - Context manager adding its elapsed time to a profiler
+class Timer(object):
+    __slots__ = ("add", "key", "start")
+
+    def __init__(self, add, key):
+        self.add = add
+        self.key = key
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.add(self.key, clock() - self.start)
+        return False
+
+
+# Class - Context manager that does nothing (disabled profiler)
+class NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+# Class - Collects stage timings, item timings and counters of one script run
+class Profiler(object):
+    enabled = True
+
+    def __init__(self, script, memory=False):
+        self.script = script
+        self.memory = memory and tracemalloc is not None
+        self.stages = {} # Stage name -> [seconds, calls]
+        self.stage_order = [] # Stage names in first-use order
+        self.items = [] # (kind, name, seconds)
+        self.counts = {} # Counter name -> value
+        self.started = None
+        self.seconds = None
+        self.peak_memory = None
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start()
+        self.started = clock()
+
+    def stop(self):
+        self.seconds = clock() - self.started
+        if self.memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    # Function - Time a stage: with profiler.stage("remap tags"): ...
+    def stage(self, name):
+        return Timer(self.addStage, name)
+
+    # Function - Time one item (material, object), node names are only read when profiling
+    def item(self, kind, node):
+        name = node.GetName() if hasattr(node, "GetName") else str(node)
+        return Timer(self.addItem, (kind, name))
+
+    # Function - Add value to a counter
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def addStage(self, name, seconds):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = [0.0, 0]
+            self.stage_order.append(name)
+        entry[0] += seconds
+        entry[1] += 1
+
+    def addItem(self, key, seconds):
+        self.items.append((key[0], key[1], seconds))
+
+    # Function - Report as a dictionary (JSON layout)
+    def report(self):
+        return {
+            "script": self.script,
+            "seconds": self.seconds,
+            "peak_memory": self.peak_memory,
+            "stages": [{"name": name, "seconds": self.stages[name][0], "calls": self.stages[name][1]} for name in self.stage_order],
+            "counts": dict(self.counts),
+            "items": [{"kind": kind, "name": name, "seconds": seconds} for kind, name, seconds in self.items],
+        }
+
+    # Function - Short summary for the console
+    def summary(self):
+        lines = ["Profile %s: %.3fs%s" % (self.script, self.seconds or 0.0,
+                                          ", peak memory %.1f MB" % (self.peak_memory / 1048576.0) if self.peak_memory is not None else "")]
+        for name in sorted(self.stage_order, key=lambda name: -self.stages[name][0])[:SUMMARY_ITEMS]:
+            seconds, calls = self.stages[name]
+            lines.append("  %-28s %9.3fs %8d calls" % (name, seconds, calls))
+        if self.counts:
+            lines.append("  " + ", ".join("%s: %d" % (name, value) for name, value in sorted(self.counts.items())))
+        if self.items:
+            slowest = sorted(self.items, key=lambda item: -item[2])[:SUMMARY_ITEMS]
+            lines.append("  Slowest: " + ", ".join("%s %.3fs" % (name, seconds) for kind, name, seconds in slowest))
+        return lines
+
+    # Function - Save the report, .csv for a table (section, kind, name, seconds, value), otherwise JSON
+    def save(self, path):
+        report = self.report()
+        if not path.lower().endswith(".csv"):
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            return
+        rows = [("total", "", report["script"], report["seconds"], report["peak_memory"])]
+        rows.extend(("stage", "", stage["name"], stage["seconds"], stage["calls"]) for stage in report["stages"])
+        rows.extend(("count", "", name, "", value) for name, value in sorted(report["counts"].items()))
+        rows.extend(("item", item["kind"], item["name"], item["seconds"], "") for item in report["items"])
+        f = open(path, "wb") if sys.version_info[0] < 3 else open(path, "w", newline="")
+        with f:
+            writer = csv.writer(f)
+            writer.writerow(("section", "kind", "name", "seconds", "value"))
+            for row in rows:
+                writer.writerow([value.encode("utf-8") if sys.version_info[0] < 3 and isinstance(value, unicode) else value for value in row])
+
+    # Function - Stop, print the summary and save the report (report_path None: console only)
+    def finish(self, report_path=None):
+        self.stop()
+        for line in self.summary():
+            print(line)
+        if report_path:
+            self.save(report_path)
+
+
+# Class - Disabled profiler, every call returns immediately
+class NullProfiler(object):
+    enabled = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stage(self, name):
+        return NULL_TIMER
+
+    def item(self, kind, node):
+        return NULL_TIMER
+
+    def count(self, name, value=1):
+        pass
+
+    def report(self):
+        return None
+
+    def finish(self, report_path=None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+# Function - Profiler of a script run, NULL_PROFILER if not enabled
+def createProfiler(script, enabled, memory=False):
+    if not enabled:
+        return NULL_PROFILER
+    profiler = Profiler(script, memory)
+    profiler.start()
+    return profiler
@@ -0,0 +1,345 @@
+"""
+jv_proxy
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3 outside Cinema 4D)
+Description-US: Viewport proxies: downscaled copies of the textures in a take the user activates for viewport work.
+
+                generateProxies(paths) writes a proxy of every texture larger than PROXY_SIZE into a content addressed
+                cache: CACHE_FOLDER/<sha1[:2]>/<sha1>_<size>.png, the same image is scaled once whatever its name or
+                folder. The SHA-1 of a file is kept in an index (path, modification time, size) like the jv_textures cache.
+                Textures are scaled on a process pool (thread pool inside the Cinema 4D application).
+
+                Uncompressed BMP, TGA, TIFF and PSD files (jv_textures.LAYOUTS) are streamed through mmap: every proxy
+                pixel is the average of its step x step block (box filter), the block rows of one proxy row are read at a
+                time, a 16K map never sits in memory. Other formats (PNG, JPEG, EXR...) are scaled by Cinema 4D's
+                BaseBitmap in the script process, outside Cinema 4D they keep the original file.
+                Textures with an alpha channel and textures of at most PROXY_SIZE pixels keep the original file.
+
+                applyProxies(doc, materials, undo) overrides the file of every Bitmap shader with its proxy in the take
+                PROXY_TAKE (child of the Main take). Cinema 4D has no editor-only file path, a take changes the viewport
+                and renders alike, so this is a manual toggle and not an automatic preview/render split:
+                - the Main take stays current, the viewport and renders keep the original files until PROXY_TAKE is activated
+                - with PROXY_TAKE active the viewport uses the proxies, and so does a plain render of the current take:
+                  activate the Main take again before rendering, or use Render Marked Takes (PROXY_TAKE is not marked)
+
+                Command line:  python jv_proxy.py ./textures --size 1024   (fill the cache before opening the scenes)
+"""
+
+# Libraries
+import os
+import sys
+import zlib
+import mmap
+import struct
+import binascii
+import hashlib
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import jv_textures
+import jv_profile
+
+
+PROXY_SIZE = 1024 # Longest side of the proxies (px)
+CACHE_FOLDER = os.path.join(jv_textures.CACHE_FOLDER, "jv_proxy_cache")
+INDEX_NAME = "index.json" # path, modification time, size -> SHA-1 (inside CACHE_FOLDER)
+PROXY_TAKE = "JV Viewport Proxies" # Take with the Bitmap shader overrides
+HASH_BLOCK = 1 << 20 # Bytes hashed per read
+PNG_CHUNK = 1 << 16 # Compressed bytes per IDAT chunk
+BOX_LANE_BYTES = 4 # Box filter: block sums in 32 bit lanes of one Python integer, a whole proxy row is added at once
+STATUSES = ("generated", "cached", "small", "alpha", "compressed", "missing", "error") # Result of one texture
+
+
+# Function - SHA-1 of an image (mmap), read in blocks
+def contentHash(image):
+    digest = hashlib.sha1()
+    for start in range(0, len(image), HASH_BLOCK):
+        digest.update(image[start:start + HASH_BLOCK])
+    return digest.hexdigest()
+
+
+# Function - Cache path of the proxy of an image (box filtered)
+def proxyPath(cache_folder, digest, size):
+    return os.path.join(cache_folder, digest[:2], "%s_%d_box.png" % (digest, size))
+
+
+# Function - Sampling step: every step-th pixel of every step-th row, the longest side fits in size
+def proxyStep(width, height, size):
+    return max(1, -(-max(width, height) // size))
+
+
+# Function - Create a folder, another worker may create it at the same time
+def makeFolder(folder):
+    if not os.path.isdir(folder):
+        try:
+            os.makedirs(folder)
+        except OSError:
+            if not os.path.isdir(folder):
+                raise
+
+
+# Function - PNG chunk
+def pngChunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+
+# Function - Write a PNG (8 bit RGB unless color_type/bit_depth say otherwise), rows are compressed as they come in, chunks: (kind, data) before the image data
+def writePng(path, width, height, rows, color_type=2, bit_depth=8, chunks=()):
+    compressor = zlib.compressobj(6)
+    pending = b""
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + pngChunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)))
+        for kind, data in chunks:
+            f.write(pngChunk(kind, data))
+        for row in rows:
+            pending += compressor.compress(b"\x00" + bytes(row)) # Filter type 0 (None)
+            if len(pending) >= PNG_CHUNK:
+                f.write(pngChunk(b"IDAT", pending))
+                pending = b""
+        f.write(pngChunk(b"IDAT", pending + compressor.flush()) + pngChunk(b"IEND", b""))
+
+
+# Function - Big endian bytes -> integer and back (Python 2 has no int.from_bytes)
+def bytesToInt(data):
+    return int(binascii.hexlify(data), 16)
+
+
+def intToBytes(value, length):
+    return binascii.unhexlify("%0*x" % (2 * length, value))
+
+
+# Function - Proxy rows (RGB, top row first) of an uncompressed image, the average of every step x step block (box filter)
+def layoutRows(image, layout, step):
+    width = -(-layout.width // step)
+    samples = 3 * width
+    count = step * step
+    stride = step * layout.pixel_stride
+    last = (layout.width - 1) * layout.pixel_stride # Blocks cut by the right/bottom edge repeat the last column/row
+    lanes = bytearray(BOX_LANE_BYTES * samples) # One lane per proxy sample (RGB), a source byte goes into the last byte of its lane
+    for block in range(0, layout.height, step):
+        total = 0 # Lane sums of the whole proxy row
+        for y in range(block, block + step):
+            y = min(y, layout.height - 1)
+            starts = layout.row_start(layout.height - 1 - y if layout.bottom_up else y)
+            for dx in range(step):
+                columns = len(range(dx, layout.width, step))
+                for channel, start in enumerate(starts):
+                    first = start + dx * layout.pixel_stride
+                    values = image[first:first + (columns - 1) * stride + 1:stride] if columns else b""
+                    if len(values) != columns or start + last >= len(image):
+                        raise ValueError("Truncated image")
+                    if columns < width:
+                        values += image[start + last:start + last + 1] * (width - columns)
+                    lanes[BOX_LANE_BYTES - 1 + channel * BOX_LANE_BYTES::3 * BOX_LANE_BYTES] = values
+                total += bytesToInt(lanes) # Adds every lane at once, sums stay below 2^32 (255 x step^2)
+        sums = struct.unpack(">%dI" % samples, intToBytes(total, len(lanes)))
+        yield bytearray((value + count // 2) // count for value in sums)
+
+
+# Function - Write the proxy through a temporary file, other workers never see half a proxy
+def saveProxy(proxy, layout, image, step):
+    makeFolder(os.path.dirname(proxy))
+    temporary = "%s.%d_%d.tmp" % (proxy, os.getpid(), threading.current_thread().ident)
+    writePng(temporary, -(-layout.width // step), -(-layout.height // step), layoutRows(image, layout, step))
+    try:
+        os.rename(temporary, proxy)
+    except OSError: # Windows: the same image was written by another worker meanwhile
+        os.remove(temporary)
+
+
+# Function - Proxy of one texture (pool worker), job: (path, SHA-1 from the index or None, cache folder, size)
+def makeProxy(job):
+    path, digest, cache_folder, size = job
+    result = {"path": path, "missing": True, "size": None, "mtime": None, "sha1": digest, "proxy": None, "status": "missing", "error": None}
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return result
+    result.update(missing=False, size=stat.st_size, mtime=stat.st_mtime)
+    try:
+        with open(path, "rb") as f:
+            if stat.st_size == 0:
+                raise ValueError("Empty file")
+            image = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) # Only the pages that are read are loaded
+            try:
+                header = jv_textures.readImageHeader(path, image[:jv_textures.HEADER_BYTES], image)
+                if header is None or not header["width"] or not header["height"]:
+                    raise ValueError("Unknown image format")
+                if max(header["width"], header["height"]) <= size:
+                    result["status"] = "small" # Already preview sized
+                elif header["channels"] == 4:
+                    result["status"] = "alpha" # RGB proxies would lose the alpha channel
+                else:
+                    result["sha1"] = result["sha1"] or contentHash(image)
+                    result["proxy"] = proxyPath(cache_folder, result["sha1"], size)
+                    layout = jv_textures.LAYOUTS[header["format"]](image, header) if header["format"] in jv_textures.LAYOUTS else None
+                    if os.path.isfile(result["proxy"]):
+                        result["status"] = "cached"
+                    elif layout is None:
+                        result["status"] = "compressed" # Scaled by bitmapProxy in the script process
+                    else:
+                        saveProxy(result["proxy"], layout, image, proxyStep(header["width"], header["height"], size))
+                        result["status"] = "generated"
+            finally:
+                image.close()
+    except Exception as error: # Truncated/corrupt image
+        result.update(proxy=None, status="error", error="%s: %s" % (type(error).__name__, error))
+    return result
+
+
+# Function - Proxy of a compressed image with Cinema 4D's BaseBitmap (loads the whole image), the original is kept outside Cinema 4D
+def bitmapProxy(result, size):
+    try:
+        import c4d
+        from c4d import bitmaps
+    except ImportError:
+        result["proxy"] = None
+        return
+    source = bitmaps.BaseBitmap()
+    if source.InitWith(result["path"])[0] != c4d.IMAGERESULT_OK:
+        result.update(proxy=None, status="error", error="Cinema 4D could not load the image")
+        return
+    width, height = source.GetSize()
+    step = proxyStep(width, height, size)
+    proxy = bitmaps.BaseBitmap()
+    proxy.Init(-(-width // step), -(-height // step), 24)
+    source.ScaleIt(proxy, 256, True, False) # Sampled (averaged) scaling
+    makeFolder(os.path.dirname(result["proxy"]))
+    if proxy.Save(result["proxy"], c4d.FILTER_PNG) != c4d.IMAGERESULT_OK:
+        result.update(proxy=None, status="error", error="Cinema 4D could not save the proxy")
+        return
+    result["status"] = "generated"
+
+
+# Function - Process pool, thread pool inside the Cinema 4D application (its executable can not start worker processes)
+def createPool(workers):
+    executable = os.path.basename(sys.executable).lower()
+    if executable.startswith(("cinema 4d", "c4dpy")):
+        return ThreadPool(workers)
+    return multiprocessing.Pool(workers)
+
+
+# Function - Proxies of texture paths, returns path -> result (status, proxy path or None)
+def generateProxies(paths, size=PROXY_SIZE, cache_folder=CACHE_FOLDER, workers=None):
+    paths = sorted(set(paths))
+    index = jv_textures.TextureCache(os.path.join(cache_folder, INDEX_NAME)) # SHA-1 of unchanged files
+    jobs = []
+    for path in paths:
+        try:
+            record = index.get(path, os.stat(path))
+        except OSError:
+            record = None # Missing, reported by makeProxy
+        jobs.append((path, record["sha1"] if record is not None else None, cache_folder, size))
+
+    results = []
+    if jobs:
+        pool = createPool(max(1, min(workers or multiprocessing.cpu_count(), len(jobs)))) # Scaling is CPU bound
+        try:
+            results = pool.map(makeProxy, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    for result in results:
+        if result["status"] == "compressed":
+            bitmapProxy(result, size)
+        if result["sha1"]:
+            index.put({"path": result["path"], "missing": False, "size": result["size"], "mtime": result["mtime"], "sha1": result["sha1"]})
+    if index.changed:
+        makeFolder(cache_folder)
+        index.save()
+    return dict((result["path"], result) for result in results)
+
+
+# Function - Bitmap shaders of materials (shaders inside shaders included)
+def bitmapShaders(materials):
+    import c4d
+    import jv_scene
+    shaders = []
+    for material in materials:
+        shaders.extend(jv_scene.walkObjects(material.GetFirstShader(), (c4d.Xbitmap,)))
+    return shaders
+
+
+# Function - Take PROXY_TAKE under the Main take, created on the first run
+def proxyTake(doc, undo):
+    import c4d
+    take_data = doc.GetTakeData()
+    main_take = take_data.GetMainTake()
+    take = main_take.GetDown()
+    while take is not None and take.GetName() != PROXY_TAKE:
+        take = take.GetNext()
+    if take is None:
+        take = take_data.AddTake(PROXY_TAKE, main_take, None)
+        undo.AddUndo(c4d.UNDOTYPE_NEW, take) # New undo
+    else:
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, take) # Change undo
+    take.SetChecked(False) # Not rendered by Render Marked Takes
+    return take_data, take
+
+
+# Function - Override the Bitmap shader files with their proxies in the proxy take (the Main take stays current), returns counts for the console
+def applyProxies(doc, materials, undo, size=PROXY_SIZE, cache_folder=CACHE_FOLDER, workers=None, profiler=jv_profile.NULL_PROFILER):
+    import c4d
+    take_data = doc.GetTakeData()
+    take_data.SetCurrentTake(take_data.GetMainTake()) # Shaders hold the original files in the Main take (proxy take of an earlier run)
+    document_path = doc.GetDocumentPath()
+    search_folders = [document_path, os.path.join(document_path, "tex")] if document_path else []
+    shaders = [(shader, jv_textures.resolvePath(shader[c4d.BITMAPSHADER_FILENAME], search_folders))
+               for shader in bitmapShaders(materials) if shader[c4d.BITMAPSHADER_FILENAME]]
+    results = generateProxies([path for shader, path in shaders], size, cache_folder, workers)
+    counts = dict((status, 0) for status in STATUSES)
+    for result in results.values():
+        counts[result["status"]] += 1
+    profiler.count("proxies generated", counts["generated"])
+
+    overrides = [(shader, results[path]["proxy"]) for shader, path in shaders if results[path]["proxy"]]
+    if overrides:
+        take_data, take = proxyTake(doc, undo)
+        description = c4d.DescID(c4d.DescLevel(c4d.BITMAPSHADER_FILENAME, c4d.DTYPE_FILENAME, 0))
+        for shader, proxy in overrides:
+            take.FindOrAddOverrideParam(take_data, shader, description, proxy) # Main take keeps the original file
+        take_data.SetCurrentTake(take_data.GetMainTake()) # Renders of the current take use the original files
+    counts.update(shaders=len(shaders), overrides=len(overrides))
+    return counts
+
+
+# Function - Summary line for the console
+def summary(counts):
+    return ("Viewport proxies: %d of %d Bitmap shaders use a proxy in take '%s' (%d generated, %d cached), originals kept: %d small, %d alpha, "
+            "%d compressed (outside Cinema 4D), %d missing, %d errors - the Main take stays current: activate '%s' for viewport work "
+            "and the Main take again before rendering" % (counts["overrides"], counts["shaders"], PROXY_TAKE, counts["generated"], counts["cached"],
+                                                        counts["small"], counts["alpha"], counts["compressed"], counts["missing"], counts["error"],
+                                                        PROXY_TAKE))
+
+
+# Main function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write viewport proxies of texture files into the proxy cache.")
+    parser.add_argument("inputs", nargs="+", help="Texture files and/or folders (searched recursively)")
+    parser.add_argument("--size", type=int, default=PROXY_SIZE, help="Longest side of the proxies (default: %(default)s)")
+    parser.add_argument("--cache", default=CACHE_FOLDER, help="Cache folder (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Processes (default: cores)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                paths.extend(os.path.join(folder, name) for name in files if name.lower().endswith(jv_textures.IMAGE_EXTENSIONS))
+        else:
+            paths.append(path)
+
+    results = generateProxies(paths, args.size, args.cache, args.workers)
+    for result in sorted(results.values(), key=lambda result: result["path"]):
+        print("%-10s %s%s" % (result["status"], result["path"], " -> %s" % result["proxy"] if result["proxy"] else (": %s" % result["error"] if result["error"] else "")))
+    return 1 if any(result["status"] in ("missing", "error") for result in results.values()) else 0
+
+
+# Execute main()
+if __name__=='__main__':
+    sys.exit(main())
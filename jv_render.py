@@ -0,0 +1,142 @@
+"""
+jv_render
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Render settings profiles: the converters set up their render engine without piling up video posts.
+
+                applyProfile(doc, name, undo) sets the render engine of the active Render Settings and its video post
+                (V-Ray, Corona or Physical settings): an existing video post of the engine is reused and updated in
+                place, duplicates of it are removed, a new one is only inserted when there is none. The profile values
+                (PROFILES: render engine, Render Settings & video post parameters) are written every time, the video
+                post keeps the name & version of the profile (container ID PROFILE_ID), the console shows the previous.
+
+                validateScene(doc, undo) walks every Render Settings entry (child settings too) and removes the video
+                posts found more than once in the same entry, the first one is kept. Run this script from the Script
+                Manager to validate the active document, or VALIDATE_RENDER_SETTINGS = True in the converters.
+
+                Add your own profiles to PROFILES ("render_data"/"video_post": (parameter, value) like jv_mapping
+                tables), increase "version" when the values change.
+"""
+
+# Libraries
+import c4d
+import jv_scene
+import jv_undo
+
+
+PROFILE_ID = 1060419 # Container ID of the applied profile (name:version) on the video post
+ENGINES = {"vray": 1053272, "corona": 1030480, "physical": 1023342} # Render engine & video post IDs
+ENGINE_NAMES = {1053272: "V-Ray", 1030480: "Corona", 1023342: "Physical"}
+
+# Render settings profiles: render engine, Render Settings values & video post values
+PROFILES = {
+    "vray": {"version": 1, "engine": ENGINES["vray"], "render_data": [], "video_post": []},
+    "corona": {"version": 1, "engine": ENGINES["corona"], "render_data": [], "video_post": []},
+    "physical": {"version": 1, "engine": ENGINES["physical"], "render_data": [], "video_post": []},
+}
+
+
+# Function - Video posts of a Render Settings entry, only of type engine_id unless None
+def findVideoPosts(render_data, engine_id=None):
+    video_posts = []
+    video_post = render_data.GetFirstVideoPost()
+    while video_post is not None:
+        if engine_id is None or video_post.GetType() == engine_id:
+            video_posts.append(video_post)
+        video_post = video_post.GetNext()
+    return video_posts
+
+
+# Function - Profile applied to a video post as "name:version", empty if none
+def profileStamp(video_post):
+    return video_post.GetDataInstance().GetString(PROFILE_ID)
+
+
+# Function - Remove video posts with undo
+def removeVideoPosts(video_posts, undo):
+    for video_post in video_posts:
+        if undo is not None:
+            undo.AddDeleteUndo(video_post) # Delete undo
+        video_post.Remove()
+
+
+# Function - Apply profile name to the active Render Settings, returns what was done
+def applyProfile(doc, name, undo, profiles=PROFILES):
+    profile = profiles[name]
+    render_data = doc.GetActiveRenderData()
+    undo.AddUndo(c4d.UNDOTYPE_CHANGE, render_data) # Change undo
+    render_data[c4d.RDATA_RENDERENGINE] = profile["engine"] # Assign render engine
+    for parameter, value in profile["render_data"]:
+        render_data[parameter] = value
+
+    video_posts = findVideoPosts(render_data, profile["engine"]) # Settings of earlier runs
+    result = {"profile": name, "version": profile["version"], "engine": profile["engine"], "created": not video_posts,
+              "removed": max(len(video_posts) - 1, 0), "previous": None}
+    if video_posts:
+        video_post = video_posts[0] # Reuse, its other settings stay as they were
+        removeVideoPosts(video_posts[1:], undo) # Duplicates of earlier runs
+        undo.AddUndo(c4d.UNDOTYPE_CHANGE, video_post) # Change undo
+        result["previous"] = profileStamp(video_post) or None
+    else:
+        video_post = c4d.documents.BaseVideoPost(profile["engine"]) # Initializes a new base video post (pvp)
+        render_data.InsertVideoPost(video_post) # Insert video post into render engine
+        undo.AddUndo(c4d.UNDOTYPE_NEW, video_post) # New undo
+    for parameter, value in profile["video_post"]:
+        video_post[parameter] = value
+    video_post.GetDataInstance().SetString(PROFILE_ID, "%s:%d" % (name, profile["version"]))
+    return result
+
+
+# Function - Console line of an applyProfile result
+def profileSummary(result):
+    action = "created" if result["created"] else "reused (%s)" % (result["previous"] or "no profile")
+    removed = ", %d duplicates removed" % result["removed"] if result["removed"] else ""
+    return "Render settings: %s profile %s:%d, video post %s%s" % (ENGINE_NAMES.get(result["engine"], result["engine"]),
+                                                                   result["profile"], result["version"], action, removed)
+
+
+# Function - Remove duplicate video posts of every Render Settings entry, returns the report lines
+def validateScene(doc, undo=None, remove=True):
+    lines = []
+    duplicates_found = 0
+    for render_data in jv_scene.walkObjects(doc.GetFirstRenderData()): # Child Render Settings too
+        seen = set()
+        duplicates = []
+        for video_post in findVideoPosts(render_data):
+            if video_post.GetType() in seen:
+                duplicates.append(video_post)
+            seen.add(video_post.GetType())
+        if not duplicates:
+            continue
+        counts = {}
+        for video_post in duplicates:
+            counts[video_post.GetType()] = counts.get(video_post.GetType(), 0) + 1
+        for type_id, count in sorted(counts.items()):
+            lines.append("  %s: %d duplicate %s video posts%s" % (render_data.GetName(), count, ENGINE_NAMES.get(type_id, type_id),
+                                                                  " removed" if remove else ""))
+        if remove:
+            if undo is not None:
+                undo.AddUndo(c4d.UNDOTYPE_CHANGE, render_data) # Change undo
+            removeVideoPosts(duplicates, undo)
+        duplicates_found += len(duplicates)
+    lines.insert(0, "Render settings validation: %d duplicate video posts%s" % (duplicates_found, " removed" if remove and duplicates_found else ""))
+    return lines
+
+
+# Function - Main: validate the active document
+def main():
+    doc = c4d.documents.GetActiveDocument() # Get active C4D document
+    undo = jv_undo.UndoRecorder(doc, "all")
+    undo.StartUndo() # Start recording undos
+    for line in validateScene(doc, undo):
+        print(line)
+    undo.EndUndo() # Stop recording undos
+    c4d.EventAdd() # Refresh Cinema 4D
+
+
+# Execute main()
+if __name__=='__main__':
+    main()
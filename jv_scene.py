@@ -0,0 +1,123 @@
+"""
+jv_scene
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3)
+Description-US: Scene traversal shared by the JV_ scripts.
+
+                walkObjects(first, types, prune) yields every object below and after first (depth first, no recursion):
+                - types   tuple of object type IDs or a function(obj) -> True to yield obj, None for all objects
+                - prune   function(obj) -> True to skip the children of obj
+
+                SceneIndex(doc) walks the document once: objects by type, tags by type, Texture Tags by material.
+                sceneIndex(doc) returns the index of the active document shared by every script of the session: it is
+                reused while doc.GetDirty(c4d.DIRTYFLAGS_ALL) is unchanged and every cached object, tag and material is
+                still in the document, and dropped when another document becomes active. Other documents (batch jobs,
+                clones) get a new index that is not kept.
+"""
+
+# Libraries
+import itertools
+import c4d
+
+
+_index_cache = {"doc": None, "dirty": None, "index": None} # Scene index of the active document
+
+
+# Function - Turn a tuple of type IDs into a test function
+def typeFilter(types):
+    if types is None or callable(types):
+        return types
+    types = frozenset(types)
+    return lambda obj: obj.GetType() in types
+
+
+# Function - Yield objects from first, its children and its next objects (depth first)
+def walkObjects(first, types=None, prune=None):
+    accept = typeFilter(types)
+    obj = first
+    stack = [] # Next objects to continue with after a subtree
+    while obj is not None:
+        if accept is None or accept(obj):
+            yield obj
+        child = obj.GetDown()
+        if child is not None and (prune is None or not prune(obj)):
+            stack.append(obj.GetNext())
+            obj = child
+        else:
+            obj = obj.GetNext()
+            while obj is None and stack:
+                obj = stack.pop()
+
+
+# Class - Objects, tags and material users of a document, built in one pass
+class SceneIndex(object):
+    def __init__(self, doc):
+        self.objects = [] # All objects in hierarchy order
+        self.objects_by_type = {} # Object type ID -> objects
+        self.tags_by_type = {} # Tag type ID -> tags
+        self.material_users = {} # Material -> Texture Tags using it
+        for obj in walkObjects(doc.GetFirstObject()):
+            self.objects.append(obj)
+            self.objects_by_type.setdefault(obj.GetType(), []).append(obj)
+            for tag in obj.GetTags():
+                tag_type = tag.GetType()
+                self.tags_by_type.setdefault(tag_type, []).append(tag)
+                if tag_type == c4d.Ttexture:
+                    material = tag.GetMaterial()
+                    if material is not None:
+                        self.material_users.setdefault(material, []).append(tag)
+
+    # Function - Objects of the given type IDs, in hierarchy order
+    def objectsOfType(self, *types):
+        if len(types) == 1:
+            return list(self.objects_by_type.get(types[0], []))
+        types = frozenset(types)
+        return [obj for obj in self.objects if obj.GetType() in types]
+
+    # Function - Tags of a type ID
+    def tagsOfType(self, tag_type):
+        return list(self.tags_by_type.get(tag_type, []))
+
+    # Function - Material -> Texture Tags, only tags on objects of object_types (None for all objects)
+    def materialTags(self, object_types=None):
+        if object_types is None:
+            return dict((material, list(tags)) for material, tags in self.material_users.items())
+        object_types = frozenset(object_types)
+        material_tags = {}
+        for material, tags in self.material_users.items():
+            tags = [tag for tag in tags if tag.GetObject().GetType() in object_types]
+            if tags:
+                material_tags[material] = tags
+        return material_tags
+
+
+    # Function - Every object, tag and material of the index is still in doc (not deleted or moved to another document)
+    def alive(self, doc):
+        try:
+            nodes = itertools.chain(self.objects, itertools.chain.from_iterable(self.tags_by_type.values()), self.material_users)
+            return all(node.GetDocument() == doc for node in nodes)
+        except ReferenceError: # Node freed by Cinema 4D
+            return False
+
+
+# Function - Scene index of doc, reused for the active document while it is unchanged
+def sceneIndex(doc):
+    cached = _index_cache
+    active = c4d.documents.GetActiveDocument()
+    if cached["doc"] is not None and cached["doc"] != active: # Another document is active now
+        clearSceneIndex()
+    if doc != active:
+        return SceneIndex(doc) # Not kept: only the active document is shared between scripts
+    if cached["doc"] == doc and cached["dirty"] == doc.GetDirty(c4d.DIRTYFLAGS_ALL) and cached["index"].alive(doc):
+        return cached["index"]
+    index = SceneIndex(doc) # Replaces the index of the document that was active before
+    cached.update(doc=doc, dirty=doc.GetDirty(c4d.DIRTYFLAGS_ALL), index=index)
+    return index
+
+
+# Function - Forget the cached scene index
+def clearSceneIndex():
+    _index_cache.update(doc=None, dirty=None, index=None)
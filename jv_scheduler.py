@@ -0,0 +1,150 @@
+"""
+jv_scheduler
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Time-sliced work for the JV_ scripts: progress in the status bar, ESC cancels between chunks.
+
+                Scheduler.run(stage, steps, total) runs the steps (an iterator, each step is one material, tag or
+                object) in chunks of CHUNK_SECONDS (or chunk_size steps). After every chunk the status bar shows the
+                progress, throughput and ETA, the checkpoint callback is called with the completed steps and ESC is
+                checked: a pressed ESC raises Cancelled. Steps are never interrupted, a cancelled run leaves every
+                material/tag/object either done or untouched.
+
+                Checkpoint(doc, script) keeps the completed steps in a JSON file next to the document (unsaved documents:
+                jv_textures.CACHE_FOLDER), <document>_<script>_checkpoint.json. The scripts resume from it on the next run
+                and remove it when they finish. Undoing a cancelled run makes its checkpoint wrong, delete the file
+                before running again.
+
+                runSteps(scheduler, ...) runs the steps without chunks when scheduler is None (CHUNKED = False).
+"""
+
+# Libraries
+import os
+import json
+import time
+import c4d
+from c4d import gui
+import jv_profile
+import jv_textures
+
+
+CHUNK_SECONDS = 0.25 # Work between two status bar updates & ESC checks
+
+
+# Class - Run stopped with ESC between two chunks
+class Cancelled(Exception):
+    def __init__(self, stage, completed, total):
+        Exception.__init__(self, "%s cancelled after %d of %d" % (stage, completed, total))
+        self.stage = stage
+        self.completed = completed
+        self.total = total
+
+
+# Function - ESC is pressed
+def escapePressed():
+    state = c4d.BaseContainer()
+    if not gui.GetInputState(c4d.BFM_INPUT_KEYBOARD, c4d.KEY_ESC, state):
+        return False
+    return state.GetInt32(c4d.BFM_INPUT_VALUE) != 0
+
+
+# Function - Progress in the Cinema 4D status bar
+def statusBar(text, fraction):
+    c4d.StatusSetText(text)
+    c4d.StatusSetBar(int(100 * fraction))
+
+
+# Function - Seconds as 1h02m, 3m05s or 12s
+def formatSeconds(seconds):
+    seconds = int(seconds + 0.5)
+    if seconds >= 3600:
+        return "%dh%02dm" % (seconds // 3600, seconds % 3600 // 60)
+    if seconds >= 60:
+        return "%dm%02ds" % (seconds // 60, seconds % 60)
+    return "%ds" % seconds
+
+
+# Class - Chunked work with progress & cancellation
+class Scheduler(object):
+    def __init__(self, name, chunk_seconds=CHUNK_SECONDS, chunk_size=None, cancel=escapePressed, progress=statusBar,
+                 profiler=jv_profile.NULL_PROFILER):
+        self.name = name
+        self.chunk_seconds = chunk_seconds
+        self.chunk_size = chunk_size # Steps per chunk (None: time bounded only)
+        self.cancel = cancel
+        self.progress = progress
+        self.profiler = profiler
+
+    # Function - Run the steps after start (already done by a cancelled run), returns the completed steps
+    def run(self, stage, steps, total, start=0, checkpoint=None):
+        completed = start
+        started = time.time()
+        steps = iter(steps)
+        while completed < total:
+            chunk_start = time.time()
+            chunk_end = completed + self.chunk_size if self.chunk_size else total
+            for step in steps:
+                completed += 1
+                if completed >= chunk_end or time.time() - chunk_start >= self.chunk_seconds:
+                    break
+            else:
+                completed = total # Fewer steps than expected (scene changed while planning)
+            self.profiler.count("chunks")
+            if checkpoint is not None:
+                checkpoint(completed)
+            elapsed = time.time() - started
+            rate = (completed - start) / elapsed if elapsed > 0 else 0.0
+            eta = formatSeconds((total - completed) / rate) if rate else "?"
+            self.progress("%s - %s: %d/%d (%.0f/s, ETA %s, ESC to cancel)" % (self.name, stage, completed, total, rate, eta),
+                          float(completed) / total)
+            if completed < total and self.cancel():
+                raise Cancelled(stage, completed, total)
+        return completed
+
+    # Function - Clear the status bar
+    def finish(self):
+        c4d.StatusClear()
+
+
+# Function - Run the steps with a scheduler, or all at once without one (scheduler None)
+def runSteps(scheduler, stage, steps, total, start=0, checkpoint=None):
+    if scheduler is not None:
+        return scheduler.run(stage, steps, total, start, checkpoint)
+    for step in steps:
+        pass
+    return total
+
+
+# Class - Completed steps of a cancelled run, next to the document
+class Checkpoint(object):
+    def __init__(self, doc, script):
+        folder = doc.GetDocumentPath() or jv_textures.CACHE_FOLDER # Unsaved documents: in the per-user cache folder
+        name = os.path.splitext(doc.GetDocumentName())[0]
+        self.path = os.path.join(folder, "%s_%s_checkpoint.json" % (name, script))
+        self.document = doc.GetDocumentName()
+
+    # Function - Checkpoint data saved by a cancelled run of this document, None if there is none
+    def load(self):
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (ValueError, IOError):
+            return None # Unreadable checkpoint, start again
+        return data if data.get("document") == self.document else None
+
+    def save(self, data):
+        data = dict(data, document=self.document)
+        folder = os.path.dirname(self.path)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+
+    def clear(self):
+        if os.path.isfile(self.path):
+            os.remove(self.path)
@@ -0,0 +1,689 @@
+"""
+jv_textures
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18 (also runs on Python 3 outside Cinema 4D)
+Description-US: Texture preflight: find missing and oversized textures before converting materials.
+
+                Every texture is checked on a thread pool: size on disk, missing or not, and from the image header
+                (the image is not decoded) resolution, bit depth and channels.
+                Supported headers: PNG, JPEG, TGA, BMP, TIFF, PSD, OpenEXR, Radiance HDR.
+
+                Results are cached in a JSON file (CACHE_PATH) by path, modification time and size, a second scan of an
+                unchanged texture library only stats the files. CACHE_FOLDER holds the caches of the jv_ modules, per user
+                (Cinema 4D preferences folder, ~/.jv_cache on the command line, or the JV_CACHE_FOLDER environment variable).
+
+                Inside Cinema 4D:  preflight(doc, materials, entries) prints a report of the textures used by Standard
+                                   materials and jv_fbxmanifest entries (TEXTURE_PREFLIGHT in the converters)
+                Command line:      python jv_textures.py ./textures --json report.json
+"""
+
+# Libraries
+import os
+import sys
+import zlib
+import mmap
+import json
+import struct
+import collections
+import itertools
+import argparse
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+
+CACHE_VERSION = 3 # Increase when the record layout or the sampling changes
+CACHE_ENV = "JV_CACHE_FOLDER" # Environment variable overriding the cache folder
+LARGE_TEXTURE_PIXELS = 8192 * 8192 # Textures with more pixels are reported as large
+REPORT_LIMIT = 5 # Files listed per problem in the report
+HEADER_BYTES = 65536 # Read at most this much of a file to find its header
+SAMPLE_GRID = 16 # Pixels sampled on a SAMPLE_GRID x SAMPLE_GRID grid
+PNG_UNFILTER_ROWS = 64 # PNG: undo the row filters on at most this many rows for the samples
+NORMAL_NAME_HINTS = ("normal", "nrm", "_nor.", "_nor_", "_n.") # File names of normal maps (images without samples)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga", ".bmp", ".tif", ".tiff", ".psd", ".exr", ".hdr")
+
+
+# Function - Per-user folder of the jv_ caches: $JV_CACHE_FOLDER, else jv_cache in the Cinema 4D preferences, else ~/.jv_cache
+def cacheFolder():
+    folder = os.environ.get(CACHE_ENV)
+    if folder:
+        return folder
+    try:
+        import c4d
+        return os.path.join(c4d.storage.GeGetC4DPath(c4d.C4D_PATH_PREFS), "jv_cache")
+    except (ImportError, AttributeError): # Command line without Cinema 4D
+        return os.path.join(os.path.expanduser("~"), ".jv_cache")
+
+
+CACHE_FOLDER = cacheFolder() # Texture records, proxies, flipped normal maps & material libraries (never the scripts folder)
+CACHE_PATH = os.path.join(CACHE_FOLDER, "jv_texture_cache.json")
+
+
+# Function - PNG: IHDR chunk, colour space chunks before the image data
+def pngHeader(data):
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", data[16:26])
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type) # Gray, RGB, Palette, Gray+Alpha, RGBA
+    encoding = None
+    offset = 8
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        if kind in (b"sRGB", b"iCCP"):
+            encoding = "srgb"
+        elif kind == b"gAMA" and offset + 12 <= len(data):
+            gamma = struct.unpack(">I", data[offset + 8:offset + 12])[0]
+            encoding = "linear" if gamma == 100000 else ("srgb" if 45000 <= gamma <= 46000 else encoding) # 1.0 or 1/2.2
+        elif kind == b"IDAT":
+            break
+        offset += 12 + length
+    return {"format": "png", "width": width, "height": height, "bit_depth": bit_depth, "channels": channels, "encoding": encoding}
+
+
+# Function - JPEG: first SOF marker, ICC profile (APP2)
+def jpegHeader(data):
+    offset = 2
+    encoding = None
+    while offset + 9 < len(data):
+        if data[offset:offset + 1] != b"\xff":
+            offset += 1 # Padding between markers
+            continue
+        marker = struct.unpack(">B", data[offset + 1:offset + 2])[0]
+        if marker in (0xd8, 0x01) or 0xd0 <= marker <= 0xd7: # Markers without length
+            offset += 2
+            continue
+        length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        if marker == 0xe2 and data[offset + 4:offset + 15] == b"ICC_PROFILE":
+            encoding = "srgb"
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc): # Start Of Frame
+            bit_depth, height, width, channels = struct.unpack(">BHHB", data[offset + 4:offset + 10])
+            return {"format": "jpeg", "width": width, "height": height, "bit_depth": bit_depth, "channels": channels, "encoding": encoding}
+        offset += 2 + length
+    return None
+
+
+# Function - TGA: 18 byte header
+def tgaHeader(data):
+    width, height, pixel_depth, descriptor = struct.unpack("<HHBB", data[12:18])
+    alpha_bits = descriptor & 0x0f
+    channels = 1 if pixel_depth == 8 else (4 if alpha_bits else 3)
+    return {"format": "tga", "width": width, "height": height, "bit_depth": 8, "channels": channels, "encoding": None}
+
+
+# Function - BMP: BITMAPINFOHEADER
+def bmpHeader(data):
+    width, height, planes, pixel_depth = struct.unpack("<iiHH", data[18:30])
+    channels = 4 if pixel_depth == 32 else (3 if pixel_depth >= 16 else 1)
+    return {"format": "bmp", "width": width, "height": abs(height), "bit_depth": 8, "channels": channels, "encoding": None}
+
+
+# Function - TIFF: tags of the first image file directory, tag -> list of values
+def tiffTags(data):
+    order = "<" if data[:2] == b"II" else ">"
+    ifd = struct.unpack(order + "I", data[4:8])[0]
+    if ifd + 2 > len(data):
+        return None # Directory after the image data, outside the bytes read
+    tags = {}
+    count = struct.unpack(order + "H", data[ifd:ifd + 2])[0]
+    for index in range(count):
+        entry = ifd + 2 + index * 12
+        if entry + 12 > len(data):
+            break
+        tag, value_type, value_count = struct.unpack(order + "HHI", data[entry:entry + 8])
+        if value_type not in (3, 4): # Only SHORT/LONG tags are used
+            continue
+        code = "H" if value_type == 3 else "I"
+        size = struct.calcsize(code) * value_count
+        position = entry + 8 if size <= 4 else struct.unpack(order + "I", data[entry + 8:entry + 12])[0] # Values in the entry or elsewhere
+        if position + size <= len(data):
+            tags[tag] = list(struct.unpack(order + code * value_count, data[position:position + size]))
+    return tags
+
+
+# Function - TIFF: first image file directory
+def tiffHeader(data):
+    tags = tiffTags(data)
+    if not tags or 256 not in tags or 257 not in tags:
+        return None
+    bit_depth = tags.get(258, [1])[0]
+    floating = tags.get(339, [1])[0] == 3 # SampleFormat: IEEE float
+    return {"format": "tiff", "width": tags[256][0], "height": tags[257][0], "bit_depth": bit_depth, "channels": tags.get(277, [1])[0],
+            "encoding": "linear" if floating else None}
+
+
+# Function - PSD: 26 byte header
+def psdHeader(data):
+    channels, height, width, bit_depth = struct.unpack(">HIIH", data[12:24])
+    return {"format": "psd", "width": width, "height": height, "bit_depth": bit_depth, "channels": channels,
+            "encoding": "linear" if bit_depth == 32 else None}
+
+
+# Function - OpenEXR: header attributes (channels, dataWindow)
+def exrHeader(data):
+    offset = 8
+    result = {"format": "exr", "width": None, "height": None, "bit_depth": None, "channels": None, "encoding": "linear"}
+    while offset < len(data) and data[offset:offset + 1] != b"\x00":
+        name_end = data.index(b"\x00", offset)
+        type_end = data.index(b"\x00", name_end + 1)
+        name = data[offset:name_end]
+        size = struct.unpack("<i", data[type_end + 1:type_end + 5])[0]
+        value = data[type_end + 5:type_end + 5 + size]
+        if name == b"dataWindow":
+            x_min, y_min, x_max, y_max = struct.unpack("<iiii", value[:16])
+            result["width"], result["height"] = x_max - x_min + 1, y_max - y_min + 1
+        elif name == b"channels":
+            depths = []
+            position = 0
+            while position < len(value) and value[position:position + 1] != b"\x00":
+                position = value.index(b"\x00", position) + 1 # Channel name
+                pixel_type = struct.unpack("<i", value[position:position + 4])[0]
+                depths.append({0: 32, 1: 16, 2: 32}.get(pixel_type)) # UINT, HALF, FLOAT
+                position += 16
+            result["channels"] = len(depths)
+            result["bit_depth"] = max(depths) if depths else None
+        offset = type_end + 5 + size
+    return result
+
+
+# Function - Radiance HDR: text header, resolution line
+def hdrHeader(data):
+    for line in data.split(b"\n")[1:64]:
+        parts = line.split()
+        if len(parts) == 4 and parts[0] in (b"-Y", b"+Y"):
+            return {"format": "hdr", "width": int(parts[3]), "height": int(parts[1]), "bit_depth": 32, "channels": 3, "encoding": "linear"}
+    return None
+
+
+HEADER_READERS = (
+    (b"\x89PNG\r\n\x1a\n", pngHeader),
+    (b"\xff\xd8", jpegHeader),
+    (b"II*\x00", tiffHeader),
+    (b"MM\x00*", tiffHeader),
+    (b"8BPS", psdHeader),
+    (b"v/1\x01", exrHeader),
+    (b"#?RADIANCE", hdrHeader),
+    (b"#?RGBE", hdrHeader),
+    (b"BM", bmpHeader),
+)
+
+
+# Function - Image information from the first bytes of a file (image: whole file, memory mapped), None if the format is unknown
+def readImageHeader(path, data=None, image=None):
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read(HEADER_BYTES)
+    for magic, reader in HEADER_READERS:
+        if data.startswith(magic):
+            if reader is tiffHeader and image is not None:
+                return reader(image) # TIFF directories are often written after the image data
+            return reader(data)
+    if path.lower().endswith(".tga") and len(data) >= 18: # TGA has no magic number
+        return tgaHeader(data)
+    return None
+
+
+# Function - Pixel positions of the sample grid
+def gridPositions(width, height):
+    columns = min(SAMPLE_GRID, width)
+    rows = min(SAMPLE_GRID, height)
+    return [((2 * column + 1) * width // (2 * columns), (2 * row + 1) * height // (2 * rows)) for row in range(rows) for column in range(columns)]
+
+
+# Function - Read RGB samples (0..1) of an uncompressed image, channel_offsets(x, y) -> byte offsets of R, G, B
+def sampleGrid(image, width, height, channel_offsets):
+    samples = []
+    for x, y in gridPositions(width, height):
+        offsets = channel_offsets(x, y)
+        if max(offsets) >= len(image):
+            return None # Truncated file
+        samples.append(tuple(bytearray(image[offset:offset + 1])[0] / 255.0 for offset in offsets))
+    return samples
+
+
+# Class - Uncompressed image: row_start(y) -> byte offsets of R, G, B in stored row y, bottom_up: the first stored row is the bottom one,
+#         sample_bytes: bytes per sample, high_byte: position of the most significant byte in a sample (the row_start offsets point at it)
+RasterLayout = collections.namedtuple("RasterLayout", "width height row_start pixel_stride bottom_up sample_bytes high_byte")
+
+
+# Function - BMP layout (uncompressed 24/32 bit, BGR)
+def bmpLayout(image, header):
+    pixel_offset, = struct.unpack("<I", image[10:14])
+    height, planes, pixel_depth, compression = struct.unpack("<iHHI", image[22:34])
+    if compression != 0 or pixel_depth not in (24, 32):
+        return None
+    pixel_bytes = pixel_depth // 8
+    stride = (header["width"] * pixel_bytes + 3) & ~3 # Rows are padded to 4 bytes
+    def rowStart(y):
+        start = pixel_offset + y * stride
+        return (start + 2, start + 1, start)
+    return RasterLayout(header["width"], header["height"], rowStart, pixel_bytes, height > 0, 1, 0) # Positive height: bottom-up rows
+
+
+# Function - TGA layout (uncompressed true color or gray)
+def tgaLayout(image, header):
+    id_length, map_type, image_type = struct.unpack("<BBB", image[:3])
+    map_length, map_depth = struct.unpack("<HB", image[5:8])
+    pixel_depth, descriptor = struct.unpack("<BB", image[16:18])
+    if image_type not in (2, 3) or pixel_depth not in (8, 24, 32):
+        return None # Run length encoded or color mapped
+    pixel_offset = 18 + id_length + (map_length * ((map_depth + 7) // 8) if map_type else 0)
+    pixel_bytes = pixel_depth // 8
+    def rowStart(y):
+        start = pixel_offset + y * header["width"] * pixel_bytes
+        return (start,) * 3 if pixel_bytes == 1 else (start + 2, start + 1, start)
+    return RasterLayout(header["width"], header["height"], rowStart, pixel_bytes, not descriptor & 0x20, 1, 0) # Bit 5: top-left origin
+
+
+# Function - TIFF layout (uncompressed strips, chunky 8/16 bit gray or RGB)
+def tiffLayout(image, header):
+    tags = tiffTags(image)
+    if tags.get(259, [1])[0] != 1 or tags.get(284, [1])[0] != 1 or 273 not in tags or 322 in tags:
+        return None # Compressed, planar or tiled
+    if header["bit_depth"] not in (8, 16) or tags.get(339, [1])[0] != 1 or tags.get(262, [2])[0] not in (1, 2):
+        return None
+    sample_bytes = header["bit_depth"] // 8
+    high_byte = sample_bytes - 1 if image[:2] == b"II" else 0 # Most significant byte of 16 bit samples
+    pixel_bytes = sample_bytes * header["channels"]
+    strip_offsets = tags[273]
+    rows_per_strip = tags.get(278, [header["height"]])[0]
+    def rowStart(y):
+        start = strip_offsets[min(y // rows_per_strip, len(strip_offsets) - 1)] + (y % rows_per_strip) * header["width"] * pixel_bytes + high_byte
+        return (start,) * 3 if header["channels"] < 3 else (start, start + sample_bytes, start + 2 * sample_bytes)
+    return RasterLayout(header["width"], header["height"], rowStart, pixel_bytes, False, sample_bytes, high_byte)
+
+
+# Function - PSD layout (raw composite image, planar 8/16 bit gray or RGB)
+def psdLayout(image, header):
+    color_mode = struct.unpack(">H", image[24:26])[0]
+    if color_mode not in (1, 3) or header["bit_depth"] not in (8, 16):
+        return None # Not gray/RGB
+    offset = 26
+    for section in range(3): # Color mode data, image resources, layer and mask information
+        offset += 4 + struct.unpack(">I", image[offset:offset + 4])[0]
+    if struct.unpack(">H", image[offset:offset + 2])[0] != 0:
+        return None # RLE compressed composite
+    sample_bytes = header["bit_depth"] // 8
+    plane = header["width"] * header["height"] * sample_bytes
+    def rowStart(y):
+        start = offset + 2 + y * header["width"] * sample_bytes
+        return (start,) * 3 if color_mode == 1 else (start, start + plane, start + 2 * plane)
+    return RasterLayout(header["width"], header["height"], rowStart, sample_bytes, False, sample_bytes, 0)
+
+
+LAYOUTS = {"bmp": bmpLayout, "tga": tgaLayout, "tiff": tiffLayout, "psd": psdLayout} # Formats jv_proxy & jv_normals can stream
+
+
+# Function - Sample grid of an uncompressed image described by a RasterLayout
+def layoutSamples(image, layout):
+    if layout is None:
+        return None
+    return sampleGrid(image, layout.width, layout.height, lambda x, y: tuple(start + x * layout.pixel_stride for start in layout.row_start(y)))
+
+
+# Function - Undo the PNG filter of a row (bytearray, changed in place) with the previous unfiltered row
+def unfilterRow(row, previous, filter_type, pixel_bytes):
+    stride = len(row)
+    if filter_type == 1: # Sub
+        for i in range(pixel_bytes, stride):
+            row[i] = (row[i] + row[i - pixel_bytes]) & 255
+    elif filter_type == 2: # Up
+        for i in range(stride):
+            row[i] = (row[i] + previous[i]) & 255
+    elif filter_type == 3: # Average
+        for i in range(stride):
+            left = row[i - pixel_bytes] if i >= pixel_bytes else 0
+            row[i] = (row[i] + ((left + previous[i]) >> 1)) & 255
+    elif filter_type == 4: # Paeth
+        for i in range(stride):
+            left = row[i - pixel_bytes] if i >= pixel_bytes else 0
+            up_left = previous[i - pixel_bytes] if i >= pixel_bytes else 0
+            estimate = left + previous[i] - up_left
+            distances = (abs(estimate - left), abs(estimate - previous[i]), abs(estimate - up_left))
+            row[i] = (row[i] + (left if distances[0] <= distances[1] and distances[0] <= distances[2] else (previous[i] if distances[1] <= distances[2] else up_left))) & 255
+    return row
+
+
+# Function - Filtered rows of a PNG as (filter type, row bytes), the image data is decompressed one row at a time
+def pngFilteredRows(image, stride):
+    decoder = zlib.decompressobj()
+    pending = b""
+    offset = 8
+    while offset + 8 <= len(image):
+        length, kind = struct.unpack(">I4s", image[offset:offset + 8])
+        if kind == b"IDAT":
+            for start in range(offset + 8, offset + 8 + length, HEADER_BYTES): # Feed large chunks in pieces
+                data = image[start:min(start + HEADER_BYTES, offset + 8 + length)]
+                while True:
+                    output = decoder.decompress(data, stride + 1) # At most one row per call
+                    data = decoder.unconsumed_tail
+                    pending += output
+                    if len(pending) > stride:
+                        yield bytearray(pending[:1])[0], pending[1:stride + 1]
+                        pending = pending[stride + 1:]
+                    elif not output and not data:
+                        break
+        elif kind == b"IEND":
+            break
+        offset += 12 + length
+
+
+# Function - PNG sample rows, one per grid band across the whole height: the row in the band with the fewest rows to unfilter
+#            (Up, Average & Paeth rows need the unfiltered row above), closest to the band centre. Bands that would exceed
+#            PNG_UNFILTER_ROWS are left out. Returns the sample rows and the rows to unfilter
+def pngSampleRows(filters):
+    starts = [] # First row the unfiltered row depends on
+    for y, filter_type in enumerate(filters):
+        starts.append(y if y == 0 or filter_type < 2 else starts[-1])
+    bands = min(SAMPLE_GRID, len(filters))
+    chains = []
+    for band in range(bands):
+        centre = (2 * band + 1) * len(filters) // (2 * bands)
+        candidates = range(band * len(filters) // bands, (band + 1) * len(filters) // bands)
+        y = min(candidates, key=lambda y: (y - starts[y], abs(y - centre)))
+        chains.append((y - starts[y], y))
+    sample_rows = set()
+    unfilter_rows = set()
+    for cost, y in sorted(chains):
+        chain = set(range(y - cost, y + 1))
+        if sample_rows and len(unfilter_rows | chain) > PNG_UNFILTER_ROWS:
+            continue
+        sample_rows.add(y)
+        unfilter_rows |= chain
+    return sample_rows, unfilter_rows
+
+
+# Function - PNG samples on rows across the whole image (non interlaced 8/16 bit). The image data is decompressed twice, a row
+#            at a time: first for the row filters, then to undo the filters on the rows leading to the sample rows
+def pngSamples(image, header):
+    color_type, compression, filter_method, interlace = struct.unpack(">BBBB", image[25:29])
+    if interlace or header["bit_depth"] < 8:
+        return None
+    sample_bytes = header["bit_depth"] // 8
+    pixel_bytes = header["channels"] * sample_bytes
+    stride = header["width"] * pixel_bytes
+
+    palette = None
+    offset = 8
+    while offset + 8 <= len(image):
+        length, kind = struct.unpack(">I4s", image[offset:offset + 8])
+        if kind == b"PLTE":
+            palette = bytearray(image[offset + 8:offset + 8 + length])
+        elif kind in (b"IDAT", b"IEND"):
+            break
+        offset += 12 + length
+    if color_type == 3 and palette is None:
+        return None
+
+    filters = bytearray(filter_type for filter_type, row in itertools.islice(pngFilteredRows(image, stride), header["height"]))
+    if not filters:
+        return None
+    sample_rows, unfilter_rows = pngSampleRows(filters)
+
+    columns = [x * pixel_bytes for x, y in gridPositions(header["width"], 1)]
+    samples = []
+    previous = bytearray(stride)
+    for y, (filter_type, row) in enumerate(pngFilteredRows(image, stride)):
+        if y > max(sample_rows):
+            break
+        if y not in unfilter_rows:
+            continue
+        previous = unfilterRow(bytearray(row), previous, filter_type, pixel_bytes) # The row above is unfiltered when this row needs it
+        if y not in sample_rows:
+            continue
+        for start in columns:
+            if color_type == 3: # Palette index
+                start = previous[start] * 3
+                samples.append(tuple(value / 255.0 for value in palette[start:start + 3]))
+            elif header["channels"] < 3: # Gray (+ Alpha)
+                samples.append((previous[start] / 255.0,) * 3)
+            else:
+                samples.append(tuple(previous[start + channel * sample_bytes] / 255.0 for channel in range(3)))
+    return samples or None
+
+
+SAMPLERS = {"png": pngSamples}
+
+
+# Function - Tangent space normal map: blue dominant, red/green centred around 0.5, unit length vectors
+def isNormalMap(samples):
+    count = float(len(samples))
+    red = sum(sample[0] for sample in samples) / count
+    green = sum(sample[1] for sample in samples) / count
+    blue = sum(sample[2] for sample in samples) / count
+    blue_dominant = sum(1 for r, g, b in samples if b >= r and b >= g) / count
+    unit_length = sum(1 for r, g, b in samples if 0.8 <= ((2 * r - 1) ** 2 + (2 * g - 1) ** 2 + (2 * b - 1) ** 2) ** 0.5 <= 1.2) / count
+    return blue > 0.6 and abs(red - 0.5) < 0.15 and abs(green - 0.5) < 0.15 and blue_dominant > 0.9 and unit_length > 0.8
+
+
+# Function - Gray image: all channels (almost) equal
+def isGrayscale(samples):
+    return sum(1 for sample in samples if max(sample) - min(sample) <= 0.02) >= 0.98 * len(samples)
+
+
+# Function - Color space & normal map from the header and samples
+def classifyTexture(path, header, samples):
+    result = {"color_space": None, "normal_map": None, "sampled": len(samples) if samples else 0}
+    if samples:
+        result["normal_map"] = isNormalMap(samples)
+        if header["encoding"] == "linear" or result["normal_map"] or isGrayscale(samples):
+            result["color_space"] = "linear" # Float image or data (normal, roughness, metal, mask)
+        else:
+            result["color_space"] = "srgb" # Colors
+    elif header["encoding"] == "linear" or (header["channels"] or 3) < 3:
+        result["color_space"] = "linear"
+        result["normal_map"] = False if (header["channels"] or 3) < 3 else None
+    else:
+        name = os.path.basename(path).lower()
+        if any(hint in name for hint in NORMAL_NAME_HINTS): # No samples (JPEG, compressed...), fall back to the name
+            result["normal_map"] = True
+            result["color_space"] = "linear"
+    return result
+
+
+# Function - Header, samples and classification of an image file, None if the format is unknown
+def inspectImage(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        image = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) # Only the pages that are read are loaded
+        try:
+            header = readImageHeader(path, image[:HEADER_BYTES], image)
+            if header is None:
+                return None
+            samples = None
+            if header["width"] and header["height"]:
+                if header["format"] in LAYOUTS:
+                    samples = layoutSamples(image, LAYOUTS[header["format"]](image, header))
+                elif header["format"] in SAMPLERS:
+                    samples = SAMPLERS[header["format"]](image, header)
+        finally:
+            image.close()
+    header.update(classifyTexture(path, header, samples))
+    return header
+
+
+# Function - Check one texture file
+def scanTexture(path):
+    record = {"path": path, "missing": True, "size": None, "mtime": None, "format": None, "width": None, "height": None,
+              "bit_depth": None, "channels": None, "encoding": None, "color_space": None, "normal_map": None, "sampled": 0, "error": None}
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return record
+    record.update(missing=False, size=stat.st_size, mtime=stat.st_mtime)
+    try:
+        header = inspectImage(path)
+        if header is None:
+            record["error"] = "Unknown image format"
+        else:
+            record.update(header)
+    except Exception as error: # Truncated/corrupt header
+        record["error"] = "%s: %s" % (type(error).__name__, error)
+    return record
+
+
+# Class - Scan results on disk, valid while path, modification time and size match
+class TextureCache(object):
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.records = {}
+        self.changed = False
+        if path and os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    cache = json.load(f)
+                if cache.get("version") == CACHE_VERSION:
+                    self.records = cache["records"]
+            except (ValueError, KeyError, IOError):
+                pass # Unreadable cache, scan again
+
+    def get(self, path, stat):
+        record = self.records.get(path)
+        if record is not None and record["mtime"] == stat.st_mtime and record["size"] == stat.st_size:
+            return record
+        return None
+
+    def put(self, record):
+        if not record["missing"]:
+            self.records[record["path"]] = record
+            self.changed = True
+
+    def save(self):
+        if self.path and self.changed:
+            folder = os.path.dirname(self.path)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            with open(self.path, "w") as f:
+                json.dump({"version": CACHE_VERSION, "records": self.records}, f)
+            self.changed = False
+
+
+# Function - Cached record of path, None if it has to be scanned
+def cachedTexture(cache, path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return scanTexture(path) # Missing file, nothing to read
+    return cache.get(path, stat)
+
+
+# Function - Scan texture paths on a thread pool, returns path -> record
+def scanTextures(paths, cache=None, workers=None):
+    paths = sorted(set(paths))
+    workers = workers or min(32, multiprocessing.cpu_count() * 4) # Waiting on disk, not on the CPU
+    pool = ThreadPool(workers)
+    try:
+        if cache is not None:
+            cached = pool.map(lambda path: cachedTexture(cache, path), paths)
+            results = dict((path, record) for path, record in zip(paths, cached) if record is not None)
+        else:
+            results = {}
+        scanned = pool.map(scanTexture, [path for path in paths if path not in results])
+    finally:
+        pool.close()
+        pool.join()
+    for record in scanned:
+        results[record["path"]] = record
+        if cache is not None:
+            cache.put(record)
+    if cache is not None:
+        cache.save()
+    return results
+
+
+# Function - Absolute texture path, relative paths are searched in the folders like Cinema 4D does
+def resolvePath(path, search_folders):
+    if os.path.isabs(path):
+        return path
+    for folder in search_folders:
+        candidate = os.path.join(folder, path)
+        if os.path.exists(candidate):
+            return candidate
+    return os.path.join(search_folders[0], path) if search_folders else path
+
+
+# Function - Texture paths of source slots, returns path -> material names (resolved: filled with slot path -> path)
+def collectTexturePaths(named_slots, search_folders=(), resolved=None):
+    import jv_mapping
+    resolved = {} if resolved is None else resolved
+    paths = {}
+    for name, slots in named_slots:
+        for slot in jv_mapping.SLOTS:
+            path = slots.get(slot)
+            if path:
+                if path not in resolved:
+                    resolved[path] = resolvePath(path, search_folders)
+                paths.setdefault(resolved[path], []).append(name)
+    return paths
+
+
+# Function - Report lines for scan results
+def summarize(results, users=None, limit=REPORT_LIMIT):
+    users = users or {}
+    missing = [record for record in results.values() if record["missing"]]
+    large = [record for record in results.values() if record["width"] and record["height"] and record["width"] * record["height"] > LARGE_TEXTURE_PIXELS]
+    unknown = [record for record in results.values() if not record["missing"] and record["error"]]
+    total = sum(record["size"] or 0 for record in results.values())
+    lines = ["Texture preflight: %d textures, %.1f MB, %d missing, %d large, %d unreadable" % (len(results), total / 1048576.0, len(missing), len(large), len(unknown))]
+    names = lambda record: " (%s)" % ", ".join(users[record["path"]]) if users.get(record["path"]) else ""
+    sections = (
+        ("Missing", sorted(missing, key=lambda record: record["path"]), lambda record: "%s%s" % (record["path"], names(record))),
+        ("Large", sorted(large, key=lambda record: -record["width"] * record["height"]),
+         lambda record: "%s %dx%d %d-bit (%.1f MB)" % (record["path"], record["width"], record["height"], record["bit_depth"] or 0, record["size"] / 1048576.0)),
+        ("Unreadable", sorted(unknown, key=lambda record: record["path"]), lambda record: "%s (%s)" % (record["path"], record["error"])),
+    )
+    for label, records, describe in sections:
+        for record in records[:limit]:
+            lines.append("  %s: %s" % (label, describe(record)))
+        if len(records) > limit:
+            lines.append("  %s: ... and %d more" % (label, len(records) - limit))
+    return lines
+
+
+# Function - Check the textures of Standard materials and/or jv_fbxmanifest entries (inside Cinema 4D)
+# Returns texture path as written in the materials -> record, prints a report if report is True
+def preflight(doc, materials=(), entries=(), cache_path=CACHE_PATH, report=True):
+    import c4d
+    import jv_mapping
+    document_path = doc.GetDocumentPath()
+    search_folders = [document_path, os.path.join(document_path, "tex")] if document_path else []
+    named_slots = [(material.GetName(), jv_mapping.readSourceSlots(material)) for material in materials if material.GetType() == c4d.Mmaterial]
+    named_slots.extend((entry["name"], jv_mapping.manifestSlots(entry)) for entry in entries)
+    resolved = {}
+    users = collectTexturePaths(named_slots, search_folders, resolved)
+    results = scanTextures(users.keys(), TextureCache(cache_path) if cache_path else None)
+    if report:
+        for line in summarize(results, users):
+            print(line)
+    return dict((path, results[resolved_path]) for path, resolved_path in resolved.items())
+
+
+# Main function
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check texture files: missing, resolution, bit depth, channels, size.")
+    parser.add_argument("inputs", nargs="+", help="Texture files and/or folders (searched recursively)")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Cache file (default: %(default)s), '' to disable")
+    parser.add_argument("--json", help="Write all records to this file")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Threads (default: 4 x cores, max 32)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                paths.extend(os.path.join(folder, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths.append(path)
+
+    results = scanTextures(paths, TextureCache(args.cache) if args.cache else None, args.workers)
+    for line in summarize(results):
+        print(line)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(sorted(results.values(), key=lambda record: record["path"]), f, indent=2)
+    return 1 if any(record["missing"] for record in results.values()) else 0
+
+
+# Execute main()
+if __name__=='__main__':
+    sys.exit(main())
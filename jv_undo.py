@@ -0,0 +1,122 @@
+"""
+jv_undo
+Author: James Vella
+Website: http://www.jamesvella.net/
+Version: 1.0.0
+Written for Maxon Cinema 4D R21.207
+Python version 2.7.18
+Description-US: Undo strategies for the JV_ scripts. UndoRecorder has the same StartUndo/AddUndo/EndUndo calls as the
+                document, the scripts call it everywhere they used doc and pick the strategy with UNDO_MODE:
+
+                - all        record every AddUndo call (as the scripts did before)
+                - modified   record every object/tag/material once, before its first change (default)
+                - snapshot   one transaction: the scene (root objects with their children & tags, materials, render
+                             settings) is recorded in StartUndo, afterwards only new nodes and changes outside
+                             the snapshot (other render settings, takes...) are recorded
+                - none       no undo at all (headless batch conversions)
+
+                recorded/skipped count the AddUndo calls that were passed on to / dropped from the document.
+                With a jv_profile profiler, time spent in the document undo calls is reported as stage "undo".
+"""
+
+# Libraries
+import c4d
+import jv_profile
+
+
+UNDO_MODES = ("all", "modified", "snapshot", "none")
+
+
+# Class - Undo recorder
+class UndoRecorder(object):
+    def __init__(self, doc, mode="modified", profiler=jv_profile.NULL_PROFILER):
+        if mode not in UNDO_MODES:
+            raise ValueError("Unknown undo mode: %s (use one of %s)" % (mode, ", ".join(UNDO_MODES)))
+        self.doc = doc
+        self.mode = mode
+        self.recorded = 0 # Undo entries added to the document
+        self.skipped = 0 # AddUndo calls not needed by this mode
+        self.seen = set() # Nodes already recorded (modified) or in the snapshot (snapshot)
+        self.profiler = profiler
+
+    def StartUndo(self):
+        if self.mode == "none":
+            return True
+        with self.profiler.stage("undo"):
+            result = self.doc.StartUndo()
+            if self.mode == "snapshot":
+                self.snapshot()
+        return result
+
+    def EndUndo(self):
+        if self.mode == "none":
+            return True
+        with self.profiler.stage("undo"):
+            return self.doc.EndUndo()
+
+    def AddUndo(self, undo_type, node):
+        if self.mode == "all":
+            return self.record(undo_type, node)
+        if self.mode == "none" or node is None:
+            self.skipped += 1
+            return True
+        if node in self.seen: # Already recorded, this one adds nothing
+            self.skipped += 1
+            return True
+
+        if self.mode == "snapshot":
+            if undo_type == c4d.UNDOTYPE_DELETE:
+                self.seen.add(node) # Existing object removed for re-insertion, covered by the snapshot
+            elif undo_type == c4d.UNDOTYPE_NEW or not self.covered(node):
+                self.seen.add(node)
+                return self.record(undo_type, node) # New node or outside the snapshot (other render settings, takes...)
+            self.skipped += 1
+            return True
+
+        # modified: one entry per node, before its first change
+        if undo_type == c4d.UNDOTYPE_DELETE:
+            undo_type = c4d.UNDOTYPE_CHANGE # Scripts only remove objects to re-insert them, CHANGE covers hierarchy moves
+        elif undo_type != c4d.UNDOTYPE_NEW and node.GetDocument() is None:
+            self.skipped += 1 # Not inserted yet, its UNDOTYPE_NEW follows
+            return True
+        self.seen.add(node)
+        return self.record(undo_type, node)
+
+    # Function - Undo for a node removed for good (AddUndo maps UNDOTYPE_DELETE to CHANGE for re-inserted nodes)
+    def AddDeleteUndo(self, node):
+        if self.mode == "none" or node is None:
+            self.skipped += 1
+            return True
+        self.seen.add(node)
+        return self.record(c4d.UNDOTYPE_DELETE, node)
+
+    # Function - Add one undo entry to the document
+    def record(self, undo_type, node):
+        self.recorded += 1
+        with self.profiler.stage("undo"):
+            return self.doc.AddUndo(undo_type, node)
+
+    # Function - Record the scene once (CHANGE includes children and tags)
+    def snapshot(self):
+        nodes = list(self.doc.GetObjects()) + list(self.doc.GetMaterials())
+        render_data = self.doc.GetActiveRenderData()
+        if render_data is not None:
+            nodes.append(render_data)
+        for node in nodes:
+            self.record(c4d.UNDOTYPE_CHANGE, node)
+        self.seen.update(nodes)
+
+    # Function - True if node is in the snapshot: a recorded node, or a child, tag, track or shader of one
+    def covered(self, node):
+        while node is not None and node != self.doc:
+            if node in self.seen:
+                return True
+            parent = node.GetUp() or node.GetMain() # Parent object, else the object/material/render settings holding the branch
+            if parent == node:
+                return False
+            node = parent
+        return False
+
+    # Function - Summary line for the console
+    def report(self):
+        return "Undo (%s): %d entries recorded, %d skipped" % (self.mode, self.recorded, self.skipped)
@@ -0,0 +1,25 @@
+"""
+Shared setup of the tests: the jv_ modules import the fake c4d module (jv_fakec4d.py), Cinema 4D is not needed.
+The caches go to a temporary folder (JV_CACHE_FOLDER) so a test run never touches the per-user cache.
+
+Run from the repository folder:  python -m pytest tests
+"""
+
+# Libraries
+import os
+import sys
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["JV_CACHE_FOLDER"] = tempfile.mkdtemp(prefix="jv_tests_") # Read by jv_textures when it is first imported
+
+import jv_fakec4d
+
+c4d = jv_fakec4d.install() # New wrapper on each call: identity bugs fail here like in Cinema 4D
+
+
+# Function - Remove the temporary cache folder after the run (pytest hook)
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(os.environ["JV_CACHE_FOLDER"], ignore_errors=True)
@@ -0,0 +1,46 @@
+# Tests - jv_fakec4d: a new wrapper on each call like the c4d module
+import copy
+import pickle
+import c4d
+
+
+def newDocument():
+    doc = c4d.documents.BaseDocument()
+    material = c4d.BaseMaterial(c4d.Mmaterial)
+    material.SetName("wood")
+    doc.InsertMaterial(material)
+    return doc
+
+
+def test_new_wrapper_per_call():
+    doc = newDocument()
+    first, second = doc.GetFirstMaterial(), doc.GetFirstMaterial()
+    assert first is not second
+    assert first == second and not first != second
+    assert hash(first) == hash(second)
+    assert doc.GetMaterials()[0] in {first: True}
+
+
+def test_wrapper_changes_the_node():
+    doc = newDocument()
+    doc.GetFirstMaterial().SetName("oak")
+    doc.GetFirstMaterial()[c4d.MATERIAL_COLOR_COLOR] = c4d.Vector(0.5, 0.25, 0.125)
+    assert doc.GetFirstMaterial().GetName() == "oak"
+    assert doc.GetFirstMaterial()[c4d.MATERIAL_COLOR_COLOR] == c4d.Vector(0.5, 0.25, 0.125)
+
+
+def test_different_nodes_differ():
+    doc = newDocument()
+    doc.InsertMaterial(c4d.BaseMaterial(c4d.Mmaterial))
+    first, second = doc.GetMaterials()
+    assert first != second
+
+
+def test_pickle_and_clone():
+    doc = newDocument()
+    material = doc.GetFirstMaterial()
+    loaded = pickle.loads(pickle.dumps(material))
+    assert loaded.GetName() == "wood" and loaded != material
+    clone = material.GetClone()
+    assert clone.GetName() == "wood" and clone != material
+    assert copy.deepcopy(material) != material
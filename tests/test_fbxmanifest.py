@@ -0,0 +1,138 @@
+# Tests - jv_fbxmanifest: binary (32 & 64 bit offsets) and ASCII FBX files
+import struct
+import zlib
+import pytest
+import jv_fbxmanifest
+
+
+# Function - Binary property record
+def binaryProperty(value):
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return b"S" + struct.pack("<I", len(data)) + data
+    if isinstance(value, float):
+        return b"D" + struct.pack("<d", value)
+    if isinstance(value, int):
+        return b"L" + struct.pack("<q", value)
+    data = zlib.compress(struct.pack("<%dd" % len(value), *value)) # Compressed double array
+    return b"d" + struct.pack("<III", len(value), 1, len(data)) + data
+
+
+# Function - Binary node record starting at offset start (wide: 7500+ 64 bit offsets)
+def binaryNode(node, wide, start):
+    name, properties, children = node
+    header_size = 25 if wide else 13
+    property_data = b"".join(binaryProperty(value) for value in properties)
+    position = start + header_size + len(name) + len(property_data)
+    child_data = b""
+    for child in children:
+        data = binaryNode(child, wide, position)
+        child_data += data
+        position += len(data)
+    if children:
+        child_data += b"\0" * header_size # Null record ends the children
+    end = start + header_size + len(name) + len(property_data) + len(child_data)
+    return struct.pack("<QQQB" if wide else "<IIIB", end, len(properties), len(property_data), len(name)) + name.encode("utf-8") + property_data + child_data
+
+
+# Function - Binary FBX file of the top level nodes
+def binaryFbx(nodes, version):
+    wide = version >= 7500
+    data = b"Kaydara FBX Binary  \x00\x1a\x00" + struct.pack("<I", version)
+    for node in nodes:
+        data += binaryNode(node, wide, len(data))
+    return data + b"\0" * (25 if wide else 13)
+
+
+def P(*values):
+    return ("P", list(values), [])
+
+
+SCENE = [
+    ("FBXHeaderExtension", [], [("FBXVersion", [7400], []),
+                                ("SceneInfo", ["GlobalInfo\x00\x01SceneInfo", "UserData"], [
+                                    ("Properties70", [], [P("Original|ApplicationName", "KString", "", "", "3ds Max 2020")])])]),
+    ("Objects", [], [
+        ("Geometry", [1, "mesh\x00\x01Geometry", "Mesh"], [("Vertices", [[0.0] * 3000], [])]), # Skipped
+        ("Material", [10, "wood\x00\x01Material", ""], [("Properties70", [], [P("DiffuseColor", "Color", "", "A", 0.2, 0.3, 0.4),
+                                                                             P("Opacity", "double", "Number", "", 1.0)])]),
+        ("Material", [11, "glass\x00\x01Material", ""], [("Properties70", [], [P("Opacity", "double", "Number", "", 0.3)])]),
+        ("Texture", [20, "diffuse\x00\x01Texture", ""], [("FileName", ["/maps/wood_diff.png"], []), ("RelativeFilename", ["wood_diff.png"], [])]),
+        ("Texture", [21, "rough\x00\x01Texture", ""], [("FileName", [""], []), ("RelativeFilename", [""], [])]),
+        ("Video", [30, "rough\x00\x01Video", "Clip"], [("Content", [[1.0] * 100], []), ("Filename", ["/maps/wood_rough.png"], []),
+                                                      ("RelativeFilename", ["wood_rough.png"], [])]),
+    ]),
+    ("Connections", [], [("C", ["OP", 20, 10, "DiffuseColor"], []), ("C", ["OP", 21, 10, "ShininessExponent"], []),
+                         ("C", ["OO", 30, 21], []), ("C", ["OO", 10, 0], []), ("C", ["OO", 11, 0], [])]),
+]
+
+ASCII_SCENE = """; FBX 7.4.0 project file
+FBXHeaderExtension:  {
+	FBXHeaderVersion: 1003
+	SceneInfo: "GlobalInfo::SceneInfo", "UserData" {
+		Type: "UserData"
+		Properties70:  {
+			P: "Original|ApplicationName", "KString", "", "", "Blender (stable FBX IO)"
+		}
+	}
+}
+Objects:  {
+	Geometry: 1, "Geometry::mesh", "Mesh" {
+		Vertices: *6 {
+			a: 0,0,0,1,1,1
+		}
+	}
+	Material: 10, "Material::wood, oak", "" {
+		Properties70:  {
+			P: "DiffuseColor", "Color", "", "A",0.2,0.3,0.4
+			P: "TransparencyFactor", "Number", "", "A",0.5
+		}
+	}
+	Texture: 20, "Texture::normal", "" {
+		FileName: "/maps/wood_normal.png"
+		RelativeFilename: "wood_normal.png"
+	}
+}
+Connections:  {
+	C: "OP",20,10, "NormalMap"
+}
+"""
+
+
+@pytest.mark.parametrize("version", [7400, 7500])
+def test_binary(tmpdir, version):
+    path = str(tmpdir.join("scene.fbx"))
+    with open(path, "wb") as f:
+        f.write(binaryFbx(SCENE, version))
+    manifest = jv_fbxmanifest.readManifest(path)
+    assert manifest["application"] == "3ds Max 2020"
+    wood, glass = manifest["materials"]
+    assert (wood["name"], glass["name"]) == ("wood", "glass")
+    assert wood["color"] == pytest.approx([0.2, 0.3, 0.4])
+    assert wood["diffuse"] == "/maps/wood_diff.png"
+    assert wood["roughness"] == "/maps/wood_rough.png" # Texture without a file name: path of its Video
+    assert not wood["transparent"] and glass["transparent"]
+    assert glass["color"] == pytest.approx([0.8, 0.8, 0.8]) and glass["diffuse"] is None
+
+
+def test_ascii(tmpdir):
+    path = str(tmpdir.join("scene.fbx"))
+    with open(path, "w") as f:
+        f.write(ASCII_SCENE)
+    manifest = jv_fbxmanifest.readManifest(path)
+    assert manifest["application"] == "Blender (stable FBX IO)"
+    wood, = manifest["materials"]
+    assert wood["name"] == "wood, oak"
+    assert wood["color"] == pytest.approx([0.2, 0.3, 0.4])
+    assert wood["bump"] == "/maps/wood_normal.png"
+    assert wood["transparent"]
+
+
+def test_save_load(tmpdir):
+    path = str(tmpdir.join("scene.fbx"))
+    with open(path, "wb") as f:
+        f.write(binaryFbx(SCENE, 7400))
+    manifest = jv_fbxmanifest.readManifest(path)
+    manifest_path = str(tmpdir.join("scene.json"))
+    jv_fbxmanifest.saveManifest(manifest, manifest_path)
+    assert jv_fbxmanifest.loadManifest(manifest_path) == manifest
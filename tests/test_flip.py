@@ -0,0 +1,42 @@
+# Tests - JV_FlipYZAxis matrix mode: the axis is flipped, the points stay where they were in world space
+import importlib
+import pytest
+import c4d
+import jv_benchmark
+
+
+# Function - World space points of every Polygon object by name, rounded
+def worldPoints(doc):
+    points = {}
+    for obj in doc.GetObjects() + [child for obj in doc.GetObjects() for child in descendants(obj)]:
+        if obj.GetType() == c4d.Opolygon:
+            matrix = obj.GetMg()
+            points[obj.GetName()] = [tuple(round(value, 6) for value in (world.x, world.y, world.z))
+                                     for world in (matrix * point for point in obj.GetAllPoints())]
+    return points
+
+
+def descendants(obj):
+    child = obj.GetDown()
+    while child:
+        yield child
+        for grandchild in descendants(child):
+            yield grandchild
+        child = child.GetNext()
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_matrix_mode(monkeypatch, chunked):
+    script = importlib.import_module("JV_FlipYZAxis")
+    monkeypatch.setattr(script, "FLIP_MODE", "matrix")
+    monkeypatch.setattr(script, "CHUNKED", chunked)
+    doc = jv_benchmark.generateScene(c4d, objects=80, materials=5, seed=7)
+    before = worldPoints(doc)
+    polygon = next(obj for obj in doc.GetObjects() if obj.GetType() == c4d.Opolygon)
+    local_before = [c4d.Vector(point) for point in polygon.GetAllPoints()]
+    c4d.documents.SetActiveDocument(doc)
+    script.doc = doc
+    script.main()
+    assert len(before) > 10
+    assert worldPoints(doc) == before
+    assert polygon.GetAllPoints() != local_before # The points were rotated into the flipped axis
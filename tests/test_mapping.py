@@ -0,0 +1,53 @@
+# Tests - jv_mapping: duplicate FBX materials -> representative, keys found with new wrappers, Metal materials without a metal texture
+import importlib
+import c4d
+import jv_mapping
+
+
+# Function - FBX Standard material with a color and a diffuse texture
+def newMaterial(doc, name, color, path=None):
+    material = c4d.BaseMaterial(c4d.Mmaterial)
+    material.SetName(name)
+    material[c4d.MATERIAL_COLOR_COLOR] = color
+    if path:
+        shader = c4d.BaseShader(c4d.Xbitmap)
+        shader[c4d.BITMAPSHADER_FILENAME] = path
+        material.InsertShader(shader)
+        material[c4d.MATERIAL_COLOR_SHADER] = shader
+    doc.InsertMaterial(material)
+    return material
+
+
+def test_merge_groups():
+    doc = c4d.documents.BaseDocument()
+    newMaterial(doc, "wood.001", c4d.Vector(0.5, 0.3, 0.1), "/maps/wood.png")
+    newMaterial(doc, "wood", c4d.Vector(0.5, 0.3, 0.1), "/maps/wood.png")
+    newMaterial(doc, "wood.002", c4d.Vector(0.5, 0.3, 0.1), "/maps/wood.png")
+    newMaterial(doc, "oak", c4d.Vector(0.5, 0.3, 0.1), "/maps/oak.png") # Other texture
+    newMaterial(doc, "red", c4d.Vector(1, 0, 0))
+    newMaterial(doc, "red.001", c4d.Vector(1, 0, 0))
+    merged = jv_mapping.mergeGroups(doc.GetMaterials())
+    names = dict((material.GetName(), representative.GetName()) for material, representative in merged.items())
+    assert names == {"wood.001": "wood", "wood.002": "wood", "red.001": "red"}
+
+    for material in doc.GetMaterials(): # New wrappers: the keys are found by node, not by wrapper
+        if material.GetName() in names:
+            assert merged[material].GetName() == names[material.GetName()]
+        else:
+            assert material not in merged
+
+
+def test_metal_mode_without_texture():
+    plan = jv_mapping.compilePlan(importlib.import_module("JV_FBXMaterialsToCorona").CORONA_MAPPING)
+    doc = c4d.documents.BaseDocument()
+    metal = newMaterial(doc, "steel", c4d.Vector(0.8, 0.8, 0.8))
+    metal.AddReflectionLayer() # 'Specular' + 'Reflection', no metal texture
+    plain = newMaterial(doc, "plastic", c4d.Vector(0.8, 0.8, 0.8))
+    metal_slots = jv_mapping.readSourceSlots(metal)
+    assert metal_slots["metallic"] and metal_slots["metal"] is None
+    assert metal.GetReflectionLayerCount() > 1 and plain.GetReflectionLayerCount() <= 1
+
+    mode = c4d.CORONA_PHYSICAL_MATERIAL_METALLIC_MODE_VALUE
+    assert jv_mapping.newMaterial(plan, metal_slots)[mode] == 0
+    assert jv_mapping.newMaterial(plan, jv_mapping.readSourceSlots(plain))[mode] is None
+    assert jv_mapping.fingerprint(plan, metal_slots) != jv_mapping.fingerprint(plan, jv_mapping.readSourceSlots(plain))
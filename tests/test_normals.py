@@ -0,0 +1,93 @@
+# Tests - jv_normals: green flip of 8 & 16 bit PNG and TGA normal maps, DirectX detection
+import os
+import struct
+import zlib
+import pytest
+import jv_normals
+
+
+# Function - Normal map pixel at x, y (tangent space, mostly blue) scaled to maximum
+def normalPixel(x, y, maximum):
+    red, green = 0.5 + 0.02 * (x % 5), 0.5 - 0.02 * (y % 5)
+    return [int(round(value * maximum)) for value in (red, green, 0.95)]
+
+
+# Function - RGB PNG, rows unfiltered
+def writePng(path, width, height, bit_depth):
+    sample = ">B" if bit_depth == 8 else ">H"
+    raw = b"".join(b"\0" + b"".join(struct.pack(sample, value) for x in range(width) for value in normalPixel(x, y, (1 << bit_depth) - 1))
+                   for y in range(height))
+
+    # Function - PNG chunk with its CRC
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, 2, 0, 0, 0)) +
+                chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+# Function - Pixels of a PNG written by writePng or jv_normals (rows unfiltered by jv_normals.pngRows)
+def readPng(path):
+    with open(path, "rb") as f:
+        image = f.read()
+    width, height, bit_depth = struct.unpack(">IIB", image[16:25])
+    header = {"width": width, "height": height, "channels": 3, "bit_depth": bit_depth}
+    sample = ">%d%s" % (width * 3, "B" if bit_depth == 8 else "H")
+    return [struct.unpack(sample, bytes(row)) for row in jv_normals.pngRows(image, header)]
+
+
+# Function - Uncompressed 24 bit TGA (BGR, bottom up)
+def writeTga(path, width, height):
+    rows = [b"".join(struct.pack("<BBB", blue, green, red) for red, green, blue in (normalPixel(x, y, 255) for x in range(width)))
+            for y in range(height)]
+    with open(path, "wb") as f:
+        f.write(struct.pack("<BBBHHBHHHHBB", 0, 0, 2, 0, 0, 0, 0, 0, width, height, 24, 0) + b"".join(reversed(rows)))
+
+
+def readTga(path, width, height):
+    with open(path, "rb") as f:
+        data = f.read()[18:]
+    stride = width * 3
+    rows = [struct.unpack("<%dB" % stride, data[row * stride:(row + 1) * stride]) for row in reversed(range(height))]
+    return [sum(([red, green, blue] for blue, green, red in zip(row[0::3], row[1::3], row[2::3])), []) for row in rows]
+
+
+def flippedPixels(rows, maximum):
+    return [[maximum - value if index % 3 == 1 else value for index, value in enumerate(row)] for row in rows]
+
+
+@pytest.mark.parametrize("bit_depth", [8, 16])
+def test_png(tmpdir, bit_depth):
+    path = str(tmpdir.join("wall_normal_%d.png" % bit_depth))
+    writePng(path, 40, 30, bit_depth)
+    results = jv_normals.generateFlipped([path], str(tmpdir.join("cache")), workers=1)
+    result = results[path]
+    assert result["status"] == "flipped" and result["error"] is None
+    expected = flippedPixels(readPng(path), (1 << bit_depth) - 1)
+    assert [list(row) for row in readPng(result["flipped"])] == expected # Green inverted, red & blue kept
+
+
+def test_tga(tmpdir):
+    path = str(tmpdir.join("wall_normal.tga"))
+    writeTga(path, 40, 30)
+    cache_folder = str(tmpdir.join("cache"))
+    result = jv_normals.generateFlipped([path], cache_folder, workers=1, tile_rows=7)[path] # Several tile jobs
+    assert result["status"] == "flipped" and result["error"] is None
+    assert readTga(result["flipped"], 40, 30) == flippedPixels(readTga(path, 40, 30), 255)
+
+    again = jv_normals.generateFlipped([path, result["flipped"]], cache_folder, workers=1)
+    assert again[path]["flipped"] == result["flipped"] # Same content: the cached copy
+    assert again[result["flipped"]]["status"] == "corrected" # A flipped copy is not flipped back
+
+
+def test_directx_reason(tmpdir):
+    cache_folder = str(tmpdir.join("cache"))
+    assert jv_normals.directXReason("/maps/brick_normal_DX.png", "brick", cache_folder=cache_folder) == "file name"
+    assert jv_normals.directXReason("/maps/brick_normal.png", "brick", cache_folder=cache_folder) is None
+    assert jv_normals.directXReason("/maps/index_normal.png", "brick", cache_folder=cache_folder) is None # "dx" inside a word
+    assert jv_normals.directXReason("/maps/brick_normal.png", "Brick", ("brick",), cache_folder=cache_folder) == "listed"
+    assert jv_normals.directXReason("/maps/brick_normal.png", "brick", (), "3ds Max 2020", cache_folder) == "written by 3ds Max 2020"
+    assert jv_normals.directXReason("/maps/brick_normal.png", "brick", (), "Blender (stable FBX IO)", cache_folder) is None
+    flipped = os.path.join(cache_folder, "ab", "ab12_flipy.png")
+    assert jv_normals.directXReason(flipped, "brick", cache_folder=cache_folder) == "flipped by an earlier run"
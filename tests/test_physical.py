@@ -0,0 +1,27 @@
+# Tests - JV_FBXMaterialsToPhysical: Reflectance stack of materials without Reflectance layers
+import importlib
+import c4d
+
+
+def test_material_without_reflectance_layers(monkeypatch):
+    script = importlib.import_module("JV_FBXMaterialsToPhysical")
+    monkeypatch.setattr(script, "CHUNKED", False)
+    doc = c4d.documents.BaseDocument()
+    material = c4d.BaseMaterial(c4d.Mmaterial)
+    shader = c4d.BaseShader(c4d.Xbitmap)
+    shader[c4d.BITMAPSHADER_FILENAME] = "/maps/wood.png"
+    material.InsertShader(shader)
+    material[c4d.MATERIAL_COLOR_SHADER] = shader
+    material.RemoveReflectionAllLayers()
+    doc.InsertMaterial(material)
+    assert script.readReflectanceLayers(material) == {"count": 0, "metal": False, "metal_shader": None, "roughness_shader": None}
+
+    c4d.documents.SetActiveDocument(doc)
+    script.doc = doc
+    script.main()
+    material = doc.GetFirstMaterial()
+    names = [material.GetReflectionLayerIndex(index).GetName() for index in range(material.GetReflectionLayerCount())]
+    assert names == ["Reflection", "Diffuse"] # Top to bottom
+    diffuse_id = material.GetReflectionLayerIndex(1).GetDataID()
+    assert material[diffuse_id + c4d.REFLECTION_LAYER_COLOR_TEXTURE][c4d.BITMAPSHADER_FILENAME] == "/maps/wood.png"
+    assert material[c4d.MATERIAL_COLOR_SHADER] is None
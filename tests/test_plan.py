@@ -0,0 +1,91 @@
+# Tests - jv_plan: saved plans load back, match the scene and apply to the planned materials only
+import importlib
+import json
+import pytest
+import c4d
+import jv_benchmark
+import jv_mapping
+import jv_plan
+import jv_scene
+
+
+@pytest.fixture
+def vray(monkeypatch):
+    script = importlib.import_module("JV_FBXMaterialsToVray")
+    monkeypatch.setattr(script, "CHUNKED", False)
+    return script
+
+
+# Function - Run a converter on doc like Cinema 4D does (doc is the active document)
+def runScript(script, doc):
+    c4d.documents.SetActiveDocument(doc)
+    script.doc = doc
+    script.main()
+
+
+def planScene(script, doc):
+    materials = doc.GetMaterials()
+    material_tags = jv_scene.SceneIndex(doc).materialTags(script.OBJECT_TYPES)
+    return jv_plan.planScene(doc, jv_mapping.compilePlan(script.VRAY_MAPPING), materials, material_tags)
+
+
+def test_round_trip(tmpdir, vray):
+    doc = jv_benchmark.generateScene(c4d, objects=60, materials=12, seed=3)
+    conversion = planScene(vray, doc)
+    path = str(tmpdir.join("plan.json"))
+    jv_plan.savePlan(conversion, path)
+    loaded = jv_plan.loadPlan(path)
+    assert loaded == json.loads(json.dumps(conversion))
+    assert conversion["materials"] and conversion["remaps"]
+    jv_plan.checkConversion(loaded, jv_mapping.compilePlan(vray.VRAY_MAPPING), doc.GetMaterials())
+
+
+def test_changed_scene(tmpdir, vray):
+    doc = jv_benchmark.generateScene(c4d, objects=60, materials=12, seed=3)
+    path = str(tmpdir.join("plan.json"))
+    jv_plan.savePlan(planScene(vray, doc), path)
+    loaded = jv_plan.loadPlan(path)
+    with pytest.raises(ValueError):
+        jv_plan.checkConversion(dict(loaded, signature="other"), jv_mapping.compilePlan(vray.VRAY_MAPPING), doc.GetMaterials()) # Other mapping table
+    doc.GetMaterials()[loaded["remaps"][0]["source"]].SetName("renamed")
+    with pytest.raises(ValueError):
+        jv_plan.checkConversion(loaded, jv_mapping.compilePlan(vray.VRAY_MAPPING), doc.GetMaterials())
+
+
+def test_dry_run_then_apply(tmpdir, vray, monkeypatch):
+    doc = jv_benchmark.generateScene(c4d, objects=60, materials=12, seed=3)
+    path = str(tmpdir.join("plan.json"))
+    before = [material.GetName() for material in doc.GetMaterials()]
+    monkeypatch.setattr(vray, "DRY_RUN", True)
+    monkeypatch.setattr(vray, "PLAN_PATH", path)
+    runScript(vray, doc)
+    assert [material.GetName() for material in doc.GetMaterials()] == before # Nothing changed by the dry run
+
+    unused = c4d.BaseMaterial(c4d.Mmaterial)
+    unused.SetName("not in the plan")
+    doc.InsertMaterial(unused, doc.GetMaterials()[-1]) # After the planned materials, their indices still match
+    monkeypatch.setattr(vray, "DRY_RUN", False)
+    monkeypatch.setattr(vray, "PLAN_PATH", None)
+    monkeypatch.setattr(vray, "APPLY_PLAN", path)
+    runScript(vray, doc)
+    conversion = jv_plan.loadPlan(path)
+    standard = [material.GetName() for material in doc.GetMaterials() if material.GetType() == c4d.Mmaterial]
+    assert standard == ["not in the plan"] # The planned FBX materials are deleted, the others are kept
+    converted = sorted(material.GetName() for material in doc.GetMaterials() if material.GetType() != c4d.Mmaterial)
+    assert converted == sorted(material_plan["name"] for material_plan in conversion["materials"])
+
+
+def test_material_used_by_other_objects(vray):
+    doc = jv_benchmark.generateScene(c4d, objects=10, materials=2, seed=3, depth=1)
+    material = doc.GetFirstMaterial()
+    name = material.GetName()
+    sphere = c4d.BaseObject(5160) # Sphere: not in OBJECT_TYPES, its Texture Tag is not remapped
+    sphere.MakeTag(c4d.Ttexture).SetMaterial(material)
+    doc.InsertObject(sphere)
+    polygon = next(obj for obj in doc.GetObjects() if obj.GetType() == c4d.Opolygon)
+    polygon.GetTag(c4d.Ttexture).SetMaterial(material)
+    runScript(vray, doc)
+    kept = sphere.GetTag(c4d.Ttexture).GetMaterial()
+    assert kept == material and kept.GetDocument() == doc # Still in the document
+    assert polygon.GetTag(c4d.Ttexture).GetMaterial().GetType() != c4d.Mmaterial # Converted
+    assert [mat.GetName() for mat in doc.GetMaterials() if mat.GetType() == c4d.Mmaterial] == [name]
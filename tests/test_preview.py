@@ -0,0 +1,32 @@
+# Tests - jv_preview.allocatePreviews: Texture Preview Sizes within the viewport budget
+import random
+import jv_preview
+
+
+def newEntries(count, seed=1):
+    generator = random.Random(seed)
+    return [{"name": "material_%d" % index, "users": generator.randint(0, 50),
+             "sides": [generator.choice([None, 256, 1024, 2048, 4096]) for side in range(generator.randint(0, 4))]}
+            for index in range(count)]
+
+
+def test_within_budget():
+    entries = newEntries(200)
+    for budget in (1, 8, 64, 256):
+        values, total = jv_preview.allocatePreviews(entries, budget * jv_preview.MB)
+        assert total <= budget * jv_preview.MB or all(value == jv_preview.MIN_PREVIEW for value in values)
+        assert total == sum(jv_preview.previewBytes(entry["sides"], value) for entry, value in zip(entries, values))
+        assert all(jv_preview.MIN_PREVIEW <= value <= jv_preview.MAX_PREVIEW for value in values)
+
+
+def test_used_materials_first():
+    entries = [{"name": "many", "users": 40, "sides": [2048]}, {"name": "few", "users": 1, "sides": [2048]}]
+    budget = jv_preview.previewBytes([2048], 9) + jv_preview.previewBytes([2048], 8) # Room for one 512x512 preview
+    values, total = jv_preview.allocatePreviews(entries, budget)
+    assert values == [9, 8] and total <= budget
+
+
+def test_large_budget():
+    entries = newEntries(20)
+    values, total = jv_preview.allocatePreviews(entries, 1 << 40)
+    assert total == sum(jv_preview.previewBytes(entry["sides"], jv_preview.MAX_PREVIEW) for entry in entries)
@@ -0,0 +1,45 @@
+# Tests - jv_scene.sceneIndex: one index of the active document while it is unchanged
+import c4d
+import jv_benchmark
+import jv_scene
+
+
+def newActiveScene(seed=1):
+    doc = jv_benchmark.generateScene(c4d, objects=30, materials=4, seed=seed)
+    c4d.documents.SetActiveDocument(doc)
+    return doc
+
+
+def test_reused_while_unchanged():
+    doc = newActiveScene()
+    index = jv_scene.sceneIndex(doc)
+    assert jv_scene.sceneIndex(doc) is index
+    doc.GetFirstObject().MakeTag(c4d.Ttexture).SetMaterial(doc.GetFirstMaterial()) # Changes the dirty counter
+    rebuilt = jv_scene.sceneIndex(doc)
+    assert rebuilt is not index
+    assert len(rebuilt.tagsOfType(c4d.Ttexture)) == len(index.tagsOfType(c4d.Ttexture)) + 1
+
+
+def test_other_documents():
+    doc = newActiveScene()
+    index = jv_scene.sceneIndex(doc)
+    other = jv_benchmark.generateScene(c4d, objects=30, materials=4, seed=2)
+    assert jv_scene.sceneIndex(other) is not jv_scene.sceneIndex(other) # Not the active document: never kept
+    assert jv_scene.sceneIndex(doc) is index
+    c4d.documents.SetActiveDocument(other)
+    assert jv_scene._index_cache["doc"] is not None
+    jv_scene.sceneIndex(other)
+    assert jv_scene._index_cache["doc"] == other # The index of doc is dropped
+    c4d.documents.SetActiveDocument(doc)
+    assert jv_scene.sceneIndex(doc) is not index
+
+
+def test_removed_node():
+    doc = newActiveScene()
+    index = jv_scene.sceneIndex(doc)
+    obj = doc.GetFirstObject()
+    dirty = doc.GetDirty(c4d.DIRTYFLAGS_ALL)
+    obj.Remove()
+    doc._dirty = dirty # A change the dirty counter missed
+    assert not index.alive(doc)
+    assert jv_scene.sceneIndex(doc) is not index
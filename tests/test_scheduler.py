@@ -0,0 +1,63 @@
+# Tests - jv_scheduler: a cancelled run resumed by the next run ends like one uncancelled run
+import importlib
+import pytest
+import c4d
+import jv_batch
+import jv_benchmark
+import jv_scheduler
+
+
+# Function - Comparable state of a value: node type & parameters, vectors & matrices rounded
+def dump(value, depth=0):
+    if isinstance(value, c4d.BaseList2D) and depth < 3:
+        return (value.GetType(), sorted((key, dump(item, depth + 1)) for key, item in value.GetDataInstance()._data.items()))
+    if isinstance(value, c4d.Vector):
+        return (round(value.x, 6), round(value.y, 6), round(value.z, 6))
+    if isinstance(value, c4d.Matrix):
+        return tuple(dump(vector) for vector in (value.off, value.v1, value.v2, value.v3))
+    return repr(value)
+
+
+# Function - Objects, their matrices, points & material tags (hierarchy)
+def objectState(obj):
+    state = []
+    while obj:
+        points = [dump(point) for point in obj.GetAllPoints()] if isinstance(obj, c4d.PointObject) else None
+        tags = [tag.GetMaterial().GetName() if tag.GetMaterial() else None for tag in obj.GetTags() if tag.GetType() == c4d.Ttexture]
+        state.append((obj.GetName(), obj.GetType(), dump(obj.GetMg()), points, tags, dump(obj), objectState(obj.GetDown())))
+        obj = obj.GetNext()
+    return state
+
+
+def documentState(doc):
+    materials = sorted(repr((material.GetName(), dump(material), [dump(shader) for shader in material.GetShaders()])) for material in doc.GetMaterials())
+    return materials, objectState(doc.GetFirstObject())
+
+
+# Function - Run a target runs times on a new scene, the scheduler cancels when cancel() returns True
+def runTarget(monkeypatch, target, cancel, runs):
+    doc = jv_benchmark.generateScene(c4d, objects=200, materials=40, seed=5)
+    script = importlib.import_module(jv_batch.TARGETS[target])
+    scheduler = jv_scheduler.Scheduler
+    monkeypatch.setattr(jv_scheduler, "Scheduler", lambda name, profiler=None: scheduler(name, chunk_size=7, cancel=cancel,
+                                                                                          progress=lambda text, fraction: None))
+    for run in range(runs):
+        c4d.documents.SetActiveDocument(doc)
+        script.doc = doc
+        script.main()
+    monkeypatch.setattr(jv_scheduler, "Scheduler", scheduler)
+    return documentState(doc)
+
+
+@pytest.mark.parametrize("target", sorted(jv_batch.TARGETS))
+def test_cancel_resume(monkeypatch, target):
+    calls = [0]
+
+    # Function - ESC after the third chunk
+    def cancel():
+        calls[0] += 1
+        return calls[0] == 3
+
+    expected = runTarget(monkeypatch, target, lambda: False, 1)
+    assert runTarget(monkeypatch, target, cancel, 2) == expected
+    assert calls[0] > 3 # Cancelled, then resumed in more chunks
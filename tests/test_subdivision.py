@@ -0,0 +1,80 @@
+# Tests - JV_AddSubdivisionAllObjects DEDUPLICATE: only exact, static copies become Render Instances
+import importlib
+import pytest
+import c4d
+
+
+# Function - Document with count copies of one mesh (own positions), returns the document and the copies
+def newScene(count=3):
+    doc = c4d.documents.BaseDocument()
+    mesh = c4d.PolygonObject(4, 1)
+    mesh.SetAllPoints([c4d.Vector(0, 0, 0), c4d.Vector(100, 0, 0), c4d.Vector(100, 0, 100), c4d.Vector(0, 0, 100)])
+    mesh.SetPolygon(0, c4d.CPolygon(0, 1, 2, 3))
+    copies = []
+    for index in range(count):
+        copy = mesh.GetClone()
+        copy.SetName("Chair_%d" % index)
+        copy.SetRelPos(c4d.Vector(300 * index, 0, 0))
+        doc.InsertObject(copy)
+        copies.append(copy)
+    return doc, copies
+
+
+# Function - Run the script with DEDUPLICATE, returns the names of the top objects replaced by instances
+def deduplicate(monkeypatch, doc):
+    script = importlib.import_module("JV_AddSubdivisionAllObjects")
+    monkeypatch.setattr(script, "DEDUPLICATE", True)
+    monkeypatch.setattr(script, "CHUNKED", False)
+    c4d.documents.SetActiveDocument(doc)
+    script.doc = doc
+    script.main()
+    return sorted(obj.GetName() for obj in doc.GetObjects() if obj.GetType() == c4d.Oinstance)
+
+
+def test_copies(monkeypatch):
+    doc, copies = newScene()
+    assert deduplicate(monkeypatch, doc) == ["Chair_0", "Chair_1"] # Chair_2 is the master (top of the Object Manager)
+
+
+def test_animated_copy(monkeypatch):
+    doc, copies = newScene()
+    track = c4d.CTrack(copies[0], c4d.DescID(c4d.DescLevel(c4d.ID_BASEOBJECT_REL_POSITION, c4d.DTYPE_VECTOR, 0),
+                                             c4d.DescLevel(c4d.VECTOR_X, c4d.DTYPE_REAL, 0)))
+    copies[0].InsertTrackSorted(track)
+    assert deduplicate(monkeypatch, doc) == ["Chair_1"] # The animated copy keeps its geometry & track
+
+
+def test_animated_child(monkeypatch):
+    doc, copies = newScene(2)
+    for copy in copies:
+        c4d.BaseObject(c4d.Onull).InsertUnder(copy)
+    child = copies[0].GetDown()
+    child.InsertTrackSorted(c4d.CTrack(child, c4d.DescID(c4d.DescLevel(c4d.ID_BASEOBJECT_REL_ROTATION, c4d.DTYPE_VECTOR, 0),
+                                                          c4d.DescLevel(c4d.VECTOR_X, c4d.DTYPE_REAL, 0))))
+    assert deduplicate(monkeypatch, doc) == []
+
+
+@pytest.mark.parametrize("change", ["render", "editor", "enabled", "parameter"])
+def test_other_parameters(monkeypatch, change):
+    doc, copies = newScene()
+    if change == "render":
+        copies[0].SetRenderMode(c4d.MODE_OFF)
+    elif change == "editor":
+        copies[0].SetEditorMode(c4d.MODE_OFF)
+    elif change == "enabled":
+        copies[0].SetDeformMode(False)
+    else:
+        copies[0][c4d.ID_BASEOBJECT_ROTATION_ORDER] = 5
+    assert deduplicate(monkeypatch, doc) == ["Chair_1"]
+
+
+def test_layers(monkeypatch):
+    doc, copies = newScene()
+    root = doc.GetLayerObjectRoot()
+    furniture, hidden = c4d.documents.LayerObject(), c4d.documents.LayerObject()
+    furniture.InsertUnder(root)
+    hidden.InsertUnder(root)
+    copies[1].SetLayerObject(furniture)
+    copies[2].SetLayerObject(furniture)
+    copies[0].SetLayerObject(hidden)
+    assert deduplicate(monkeypatch, doc) == ["Chair_1"] # Same layer as the master
@@ -0,0 +1,74 @@
+# Tests - jv_textures: PNG samples spread over the whole height, through the row filters
+import struct
+import zlib
+import jv_textures
+
+
+# Function - Top rows red, the rest a tangent space normal map
+def pixel(x, y):
+    return (230, 20, 20) if y < 4 else (128 + 5 * (x % 3), 128 - 5 * (y % 3), 240)
+
+
+# Function - Apply a PNG row filter (1 Sub, 2 Up, 4 Paeth) to an unfiltered row
+def filterRow(row, previous, filter_type):
+    filtered = bytearray(len(row))
+    for i in range(len(row)):
+        left = row[i - 3] if i >= 3 else 0
+        up_left = previous[i - 3] if i >= 3 else 0
+        if filter_type == 1:
+            estimate = left
+        elif filter_type == 2:
+            estimate = previous[i]
+        elif filter_type == 4:
+            distances = (abs(previous[i] - up_left), abs(left - up_left), abs(left + previous[i] - 2 * up_left))
+            estimate = left if distances[0] <= distances[1] and distances[0] <= distances[2] else (previous[i] if distances[1] <= distances[2] else up_left)
+        else:
+            estimate = 0
+        filtered[i] = (row[i] - estimate) & 255
+    return filtered
+
+
+# Function - 8 bit RGB PNG, filters(y) -> filter type of row y
+def writePng(path, width, height, filters):
+    raw = b""
+    previous = bytearray(width * 3)
+    for y in range(height):
+        row = bytearray(value for x in range(width) for value in pixel(x, y))
+        raw += struct.pack(">B", filters(y)) + bytes(filterRow(row, previous, filters(y)))
+        previous = row
+
+    # Function - PNG chunk with its CRC
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+                chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def test_png_samples_cover_the_whole_height(tmp_path):
+    path = str(tmp_path / "normal.png")
+    writePng(path, 64, 400, lambda y: 1 if y % 10 == 0 else (4 if y % 2 else 2))
+    record = jv_textures.inspectImage(path)
+    assert record["sampled"] == 256
+    assert record["normal_map"] is True # The red top rows are one band of sixteen
+
+    with open(path, "rb") as f:
+        image = f.read()
+    filters = bytearray(filter_type for filter_type, row in jv_textures.pngFilteredRows(image, 64 * 3))
+    sample_rows, unfilter_rows = jv_textures.pngSampleRows(filters)
+    assert len(sample_rows) == 16 and max(sample_rows) >= 375
+    assert len(unfilter_rows) <= jv_textures.PNG_UNFILTER_ROWS
+    expected = [tuple(value / 255.0 for value in pixel(x, y)) for y in sorted(sample_rows) for x, row in jv_textures.gridPositions(64, 1)]
+    assert jv_textures.pngSamples(image, {"width": 64, "height": 400, "channels": 3, "bit_depth": 8}) == expected
+
+
+def test_png_unfilter_budget(tmp_path):
+    path = str(tmp_path / "up.png")
+    writePng(path, 16, 1600, lambda y: 2) # Every row depends on all rows above
+    with open(path, "rb") as f:
+        image = f.read()
+    filters = bytearray(filter_type for filter_type, row in jv_textures.pngFilteredRows(image, 16 * 3))
+    sample_rows, unfilter_rows = jv_textures.pngSampleRows(filters)
+    assert len(filters) == 1600
+    assert sample_rows == set([0]) and unfilter_rows == set([0])